@@ -5,3 +5,114 @@ load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
+
+# Monitor del event loop (lag y callbacks lentos)
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100"))
+LOOP_SLOW_CALLBACK_MS = float(os.getenv("LOOP_SLOW_CALLBACK_MS", "100"))
+
+# Token para /monitoring/* (header X-Monitoring-Token); sin token los endpoints no existen
+MONITORING_TOKEN = os.getenv("MONITORING_TOKEN", "")
+
+# Hashing de contraseñas (bcrypt fuera del event loop)
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", "4"))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "32"))
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "14"))
+# Si se define, se usa este costo fijo en lugar de calibrarlo al arrancar
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+
+# Certificados de Google para verificar ID tokens (se puede apuntar a un endpoint local)
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+
+# Cache de tokens decodificados y del contexto del usuario actual
+ACCESS_TOKEN_CACHE_SIZE = int(os.getenv("ACCESS_TOKEN_CACHE_SIZE", "10000"))
+USER_CONTEXT_CACHE_SIZE = int(os.getenv("USER_CONTEXT_CACHE_SIZE", "10000"))
+USER_CONTEXT_TTL_SECONDS = int(os.getenv("USER_CONTEXT_TTL_SECONDS", "30"))
+
+# Revocación de refresh tokens
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", "3600"))
+
+# Validar respuestas del camino rápido contra su schema (tests / modo debug)
+VALIDATE_RESPONSES = os.getenv("VALIDATE_RESPONSES", os.getenv("DEBUG", "false")).lower() == "true"
+
+# Compresión de respuestas HTTP
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+
+# Cache stale-while-revalidate de endpoints de exploración
+EXPLORE_CACHE_FRESH_SECONDS = float(os.getenv("EXPLORE_CACHE_FRESH_SECONDS", "30"))
+EXPLORE_CACHE_STALE_SECONDS = float(os.getenv("EXPLORE_CACHE_STALE_SECONDS", "300"))
+
+# Logging estructurado asíncrono
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Muestreo por logger para INFO/DEBUG: "app.routes.posts=0.1,app.access=0.5"
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
+# Outbox de efectos secundarios (notificaciones, push, WebSocket)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "8"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETENTION_HOURS = int(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+
+# Agrupación de notificaciones ("X y 12 personas más...")
+NOTIFICATION_COALESCE_WINDOW_SECONDS = int(os.getenv("NOTIFICATION_COALESCE_WINDOW_SECONDS", "3600"))
+NOTIFICATION_RECENT_ACTORS = int(os.getenv("NOTIFICATION_RECENT_ACTORS", "5"))
+PUSH_DEBOUNCE_SECONDS = int(os.getenv("PUSH_DEBOUNCE_SECONDS", "60"))
+NOTIFICATION_READ_TTL_DAYS = int(os.getenv("NOTIFICATION_READ_TTL_DAYS", "30"))
+
+# Replay de eventos perdidos al reconectar el WebSocket (/ws?since=...)
+WS_REPLAY_BATCH_SIZE = int(os.getenv("WS_REPLAY_BATCH_SIZE", "100"))
+WS_REPLAY_MAX_ITEMS = int(os.getenv("WS_REPLAY_MAX_ITEMS", "1000"))
+
+# Presencia: heartbeat de sockets, last_seen en lote y límite de eventos "escribiendo"
+# 0 = solo el ping del protocolo detecta sockets muertos (ver Procfile)
+PRESENCE_TIMEOUT_SECONDS = float(os.getenv("PRESENCE_TIMEOUT_SECONDS", "0"))
+PRESENCE_SWEEP_SECONDS = float(os.getenv("PRESENCE_SWEEP_SECONDS", "15"))
+PRESENCE_FLUSH_SECONDS = float(os.getenv("PRESENCE_FLUSH_SECONDS", "30"))
+USERNAME_CACHE_SIZE = int(os.getenv("USERNAME_CACHE_SIZE", "50000"))
+USERNAME_CACHE_TTL_SECONDS = float(os.getenv("USERNAME_CACHE_TTL_SECONDS", "600"))
+TYPING_INTERVAL_SECONDS = float(os.getenv("TYPING_INTERVAL_SECONDS", "2"))
+
+# Frames binarios (MessagePack) de este tamaño o más se comprimen con zlib
+WS_COMPRESS_MIN_BYTES = int(os.getenv("WS_COMPRESS_MIN_BYTES", "1024"))
+# Un envío que tarda más que esto cierra el socket (cliente lento o muerto)
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+# Tamaño máximo de un frame del cliente ya descomprimido (se cierra con 1009 si lo pasa)
+WS_MAX_FRAME_BYTES = int(os.getenv("WS_MAX_FRAME_BYTES", str(1024 * 1024)))
+
+# Contadores en vivo de los posts en pantalla (un envío por post por intervalo)
+POST_COUNTS_INTERVAL_SECONDS = float(os.getenv("POST_COUNTS_INTERVAL_SECONDS", "1"))
+POST_SUBSCRIPTIONS_MAX = int(os.getenv("POST_SUBSCRIPTIONS_MAX", "100"))
+
+# Contadores por shards para posts calientes (escrituras por ventana para activarlos)
+SHARDED_COUNTERS_ENABLED = os.getenv("SHARDED_COUNTERS_ENABLED", "true").lower() == "true"
+COUNTER_SHARDS = int(os.getenv("COUNTER_SHARDS", "16"))
+COUNTER_HOT_THRESHOLD = int(os.getenv("COUNTER_HOT_THRESHOLD", "50"))
+COUNTER_HOT_WINDOW_SECONDS = float(os.getenv("COUNTER_HOT_WINDOW_SECONDS", "10"))
+COUNTER_HOT_TTL_SECONDS = float(os.getenv("COUNTER_HOT_TTL_SECONDS", "300"))
+COUNTER_FOLD_SECONDS = float(os.getenv("COUNTER_FOLD_SECONDS", "5"))
+
+# Índice en memoria para recomendar intercambios de habilidades
+SKILL_MATCHER_RELOAD_SECONDS = float(os.getenv("SKILL_MATCHER_RELOAD_SECONDS", "3600"))
+SKILL_MATCHER_COMPACT_SECONDS = float(os.getenv("SKILL_MATCHER_COMPACT_SECONDS", "60"))
+
+# Grafo de seguidos en memoria para "personas que quizás conozcas"
+FOLLOW_GRAPH_REBUILD_SECONDS = float(os.getenv("FOLLOW_GRAPH_REBUILD_SECONDS", "1800"))
+FOLLOW_GRAPH_MAX_DELTA = int(os.getenv("FOLLOW_GRAPH_MAX_DELTA", "100000"))
+FOLLOW_GRAPH_CHECK_SECONDS = float(os.getenv("FOLLOW_GRAPH_CHECK_SECONDS", "30"))
+PEOPLE_CACHE_SIZE = int(os.getenv("PEOPLE_CACHE_SIZE", "20000"))
+PEOPLE_CACHE_TTL_SECONDS = float(os.getenv("PEOPLE_CACHE_TTL_SECONDS", "300"))
+
+# Matriz de co-ocurrencia de habilidades para "habilidades relacionadas" en explore
+SKILL_COOCCURRENCE_PATH = os.getenv("SKILL_COOCCURRENCE_PATH", "data/skill_cooccurrence.npz")
+SKILL_COOCCURRENCE_REBUILD_SECONDS = float(os.getenv("SKILL_COOCCURRENCE_REBUILD_SECONDS", "21600"))
+RELATED_SKILLS_LIMIT = int(os.getenv("RELATED_SKILLS_LIMIT", "5"))
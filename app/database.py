@@ -10,6 +10,9 @@ user_collection = db["users"]
 # colección de notificaciones
 notification_collection = db["notifications"]
 
+# Actores contados en cada grupo de notificaciones (uno por grupo, ventana y actor)
+notification_actor_collection = db["notification_actors"]
+
 # colección de mensajes
 conversation_collection = db["conversations"]
 message_collection = db["messages"]
@@ -20,3 +23,15 @@ comment_collection = db["comments"]
 
 # Colección de historial de búsqueda
 search_history_collection = db["search_history"]
+
+# Colección de refresh tokens revocados (expiran con un índice TTL)
+revoked_token_collection = db["revoked_tokens"]
+
+# Outbox de efectos secundarios pendientes (notificaciones, push, WebSocket)
+outbox_collection = db["outbox"]
+
+# Shards de contadores de posts calientes (se consolidan en el post)
+post_counter_collection = db["post_counters"]
+
+# Usuarios con socket abierto, por worker (expiran si el worker deja de refrescarlos)
+online_collection = db["online_users"]
@@ -4,7 +4,10 @@ import os
 # Añade la carpeta raíz del proyecto (backend) al path para que funcione el import "app"
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.utils.logging_setup import setup_logging, shutdown_logging, RequestLogMiddleware
+from app.config import LOOP_MONITOR_ENABLED, COMPRESSION_ENABLED
 from app.routes import auth
 from app.routes.navigation.profileTabRoute import profileSettingsRoute
 from app.routes.navigation.profileTabRoute import profileScreenRoute
@@ -15,9 +18,66 @@ from app.routes import websocketRoute
 from app.routes.posts import postRoute
 from app.routes.posts import commentRoute
 from app.routes.explore import exploreRoute
+from app.routes import monitoringRoute
+from app.routes import recommendationRoute
+from app.utils.loop_monitor import loop_monitor, LoopMonitorMiddleware
+from app.utils.compression import CompressionMiddleware
+from app.utils.securityUtils import calibrate_bcrypt_cost, shutdown_executor
+from app.utils.google_oauth_utils import google_certs
+from app.utils.token_revocation import revocation_store
+from app.utils.outbox import outbox
+import app.utils.outbox_handlers  # registra los handlers del outbox
+from app.utils.notifications import ensure_notification_indexes
+from app.utils.ws_replay import ensure_replay_indexes
+from app.utils.messaging import ensure_message_indexes
+from app.utils.presence import presence
+from app.utils.post_subscriptions import post_subscriptions
+from app.utils.sharded_counters import sharded_counters
+from app.utils.skill_matcher import skill_matcher
+from app.utils.follow_graph import follow_graph
+from app.utils.skill_cooccurrence import skill_cooccurrence
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+# Logs por cola en un hilo aparte (antes de que se registren las rutas)
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Arranque de tareas en segundo plano
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    await calibrate_bcrypt_cost()
+    await google_certs.start()
+    await revocation_store.start()
+    await ensure_notification_indexes()
+    await ensure_replay_indexes()
+    await ensure_message_indexes()
+    await outbox.start()
+    await presence.start()
+    await post_subscriptions.start()
+    await sharded_counters.start()
+    await skill_matcher.start()
+    await follow_graph.start()
+    await skill_cooccurrence.start()
+
+    yield
+
+    # Apagado ordenado
+    await skill_cooccurrence.stop()
+    await follow_graph.stop()
+    await skill_matcher.stop()
+    await sharded_counters.stop()
+    await post_subscriptions.stop()
+    await presence.stop()
+    await outbox.stop()
+    await revocation_store.stop()
+    await google_certs.stop()
+    await loop_monitor.stop()
+    shutdown_executor()
+    shutdown_logging()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = ["*"]
 
@@ -29,6 +89,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión gzip de respuestas grandes (feed, explore, conversaciones)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Log de acceso estructurado: ruta, usuario, status y latencia
+app.add_middleware(RequestLogMiddleware)
+
+# Atribuye bloqueos del event loop a la ruta en curso
+if LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware)
+
 # Rutas existentes
 app.include_router(auth.router)
 app.include_router(profileSettingsRoute.router)
@@ -49,6 +120,12 @@ app.include_router(exploreRoute.router)
 # Rutas de Historial de busqueda
 app.include_router(search_router)
 
+# Rutas de recomendaciones
+app.include_router(recommendationRoute.router)
+
+# Rutas de monitoreo
+app.include_router(monitoringRoute.router)
+
 # Punto de entrada 
 if __name__ == "__main__":
     import uvicorn
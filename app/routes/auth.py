@@ -5,8 +5,13 @@ from fastapi import APIRouter, HTTPException, status, Request, Depends
 from pydantic import BaseModel
 from app.schemas.authSchema import UserCreate
 from app.utils.authUtils import create_token_pair, verify_refresh_token, create_access_token
-from app.utils.securityUtils import hash_password, verify_password
+from app.utils.securityUtils import hash_password_async, verify_password_async, needs_rehash
 from app.utils.auth_guardUtils import auth_required, get_current_user, auth_required_depends
+from app.utils.user_context import current_user_context, invalidate_user_context, get_user_context
+from app.utils.token_revocation import revocation_store
+from app.utils.presence import presence
+from app.utils.skill_matcher import skill_matcher
+from app.utils.compression import no_compression
 from app.database import user_collection
 from datetime import datetime, date
 from bson import ObjectId
@@ -41,7 +46,7 @@ async def signup(user: UserCreate):
         user_data["birth_date"] = datetime.combine(user_data["birth_date"], datetime.min.time())
 
     # Hashear la contraseña
-    user_data["password"] = hash_password(user.password)
+    user_data["password"] = await hash_password_async(user.password)
 
     # Imagen de perfil por defecto según género
     DEFAULT_IMAGES = {
@@ -57,6 +62,8 @@ async def signup(user: UserCreate):
     # Inicializar seguidores y seguidos vacíos
     user_data["followers"] = []
     user_data["following"] = []
+    # Contador de notificaciones no leídas (ver adjust_unread)
+    user_data["unread_notifications"] = 0
     
     # Asegurar que los arrays de habilidades estén inicializados
     user_data["interests_offered"] = user_data.get("interests_offered", [])
@@ -68,6 +75,7 @@ async def signup(user: UserCreate):
 
     result = await user_collection.insert_one(user_data)
     user_id = str(result.inserted_id)
+    skill_matcher.update(user_id, user_data["interests_offered"], user_data["interests_wanted"])
 
     # Crear ambos tokens
     tokens = create_token_pair({"sub": user_id})
@@ -99,17 +107,24 @@ async def login(data: LoginRequest):
             detail="Usuario no encontrado"
         )
 
-    if not verify_password(data.password, user["password"]):
+    if not await verify_password_async(data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Contraseña incorrecta"
         )
 
     # Actualizar último login
+    login_update = {"last_login": datetime.utcnow()}
+
+    # Re-hashear si el hash guardado usa un costo menor al calibrado
+    if needs_rehash(user["password"]):
+        login_update["password"] = await hash_password_async(data.password)
+
     await user_collection.update_one(
         {"_id": user["_id"]},
-        {"$set": {"last_login": datetime.utcnow()}}
+        {"$set": login_update}
     )
+    invalidate_user_context(str(user["_id"]))
 
     # Crear ambos tokens
     tokens = create_token_pair({"sub": str(user["_id"])})
@@ -135,6 +150,7 @@ async def login(data: LoginRequest):
 
 
 @router.post("/refresh")
+@no_compression
 async def refresh_access_token(request: RefreshTokenRequest):
     """Renovar access token usando refresh token"""
     try:
@@ -147,13 +163,15 @@ async def refresh_access_token(request: RefreshTokenRequest):
                 detail="Token payload inválido"
             )
         
-        try:
-            user = await user_collection.find_one({"_id": ObjectId(user_id)})
-        except:
+        # Tokens emitidos antes de agregar jti no se pueden revocar
+        jti = payload.get("jti")
+        if jti and await revocation_store.is_revoked(jti):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Usuario no válido"
+                detail="Refresh token revocado. Por favor inicia sesión de nuevo"
             )
+        
+        user = await get_user_context(user_id)
             
         if not user:
             raise HTTPException(
@@ -185,6 +203,14 @@ async def logout(request: RefreshTokenRequest):
     try:
         payload = verify_refresh_token(request.refresh_token)
         
+        jti = payload.get("jti")
+        if jti:
+            await revocation_store.revoke(
+                jti,
+                payload.get("sub"),
+                datetime.utcfromtimestamp(payload["exp"])
+            )
+        
         return {
             "message": "Sesión cerrada exitosamente",
             "logged_out": True
@@ -203,51 +229,28 @@ async def logout(request: RefreshTokenRequest):
 
 
 @router.get("/verify")
-async def verify_token(current_user_id: str = Depends(auth_required_depends)):
+async def verify_token(user: dict = Depends(current_user_context)):
     """Verificar si un token es válido y obtener info del usuario"""
-    try:
-        user = await user_collection.find_one({"_id": ObjectId(current_user_id)})
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Usuario no encontrado"
-            )
-        
-        return {
-            "message": "Token válido",
-            "user": {
-                "id": str(user["_id"]),
-                "username": user["username"],
-                "email": user["email"],
-                "first_name": user.get("first_name", ""),
-                "last_name": user.get("last_name", ""),
-                "about_me": user.get("about_me", ""),
-                "interests_offered": user.get("interests_offered", []),
-                "interests_wanted": user.get("interests_wanted", []),
-                "profile_image": str(user.get("profile_image") or "")
-            }
+    return {
+        "message": "Token válido",
+        "user": {
+            "id": str(user["_id"]),
+            "username": user["username"],
+            "email": user["email"],
+            "first_name": user.get("first_name", ""),
+            "last_name": user.get("last_name", ""),
+            "about_me": user.get("about_me", ""),
+            "interests_offered": user.get("interests_offered", []),
+            "interests_wanted": user.get("interests_wanted", []),
+            "profile_image": str(user.get("profile_image") or "")
         }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido"
-        )
+    }
 
 
 @router.get("/me")
-async def get_current_user_info(current_user_id: str = Depends(auth_required_depends)):
+async def get_current_user_info(user: dict = Depends(current_user_context)):
     """Obtener información del usuario actual"""
     try:
-        user = await user_collection.find_one({"_id": ObjectId(current_user_id)})
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Usuario no encontrado"
-            )
-        
         def serialize_datetime(dt):
             return dt.isoformat() if dt else None
         
@@ -327,6 +330,7 @@ async def google_auth(request: GoogleAuthRequest):
                 {"_id": existing_user["_id"]},
                 {"$set": {"last_login": datetime.utcnow()}}
             )
+        invalidate_user_context(str(existing_user["_id"]))
         
         # Crear tokens
         user_id = str(existing_user["_id"])
@@ -384,6 +388,7 @@ async def google_auth(request: GoogleAuthRequest):
             "allow_be_added": True,
             "followers": [],
             "following": [],
+            "unread_notifications": 0,
             "needs_profile_completion": True,  # ← IMPORTANTE
             "created_at": datetime.utcnow(),
             "last_login": datetime.utcnow()
@@ -471,6 +476,10 @@ async def complete_profile(
         {"_id": ObjectId(current_user_id)},
         {"$set": update_data}
     )
+    invalidate_user_context(current_user_id)
+    if "username" in update_data:
+        presence.forget_user(current_user_id)
+    skill_matcher.update(current_user_id, request.interests_offered, request.interests_wanted)
     
     # Obtener usuario actualizado
     updated_user = await user_collection.find_one({"_id": ObjectId(current_user_id)})
@@ -9,14 +9,23 @@ from app.schemas.explore.exploreSchema import (
 from app.utils.auth_guardUtils import auth_required_depends
 from app.database import post_collection, user_collection
 from app.schemas.authSchema import PREDEFINED_SKILLS
+from app.utils.swr_cache import SWRCache
+from app.utils.skill_cooccurrence import skill_cooccurrence
+from app.config import EXPLORE_CACHE_FRESH_SECONDS, EXPLORE_CACHE_STALE_SECONDS
 from bson import ObjectId
 from typing import List, Optional
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/explore", tags=["Explore"])
 
+# {limit: categorías calculadas} compartido entre todos los usuarios
+explore_categories_cache = SWRCache(
+    "explore_categories", EXPLORE_CACHE_FRESH_SECONDS, EXPLORE_CACHE_STALE_SECONDS
+)
+
 
 async def format_post_simple(post: dict, current_user_id: str) -> dict:
     """Formato simplificado de post para explore"""
@@ -47,6 +56,169 @@ async def format_post_simple(post: dict, current_user_id: str) -> dict:
     }
 
 
+async def compute_explore_categories(limit: int) -> list:
+    """
+    Calcula las categorías con sus previews (parte independiente del usuario).
+    Cada preview guarda en `_likers` los ids que le dieron like para aplicar
+    is_liked por usuario después de leer el cache.
+    """
+    start_time = time.time()
+    
+    # ⚡ AGGREGATION PIPELINE - 1 SOLA QUERY para todo
+    pipeline = [
+        # Filtrar solo posts con skills
+        {
+            "$match": {
+                "type": {"$in": ["skill_offer", "skill_request"]},
+                "skills": {"$ne": None}
+            }
+        },
+        # Descomponer arrays de skills
+        {
+            "$project": {
+                "type": 1,
+                "user_id": 1,
+                "content": 1,
+                "images": 1,
+                "skills": 1,
+                "likes": 1,
+                "likes_count": 1,
+                "comments_count": 1,
+                "created_at": 1,
+                "all_skills": {
+                    "$concatArrays": [
+                        {"$ifNull": ["$skills.offering", []]},
+                        {"$ifNull": ["$skills.seeking", []]}
+                    ]
+                }
+            }
+        },
+        # Desenrollar el array de skills
+        {"$unwind": "$all_skills"},
+        # Agrupar por skill y contar
+        {
+            "$group": {
+                "_id": "$all_skills",
+                "posts_offering": {
+                    "$sum": {
+                        "$cond": [
+                            {
+                                "$and": [
+                                    {"$eq": ["$type", "skill_offer"]},
+                                    {"$in": ["$all_skills", {"$ifNull": ["$skills.offering", []]}]}
+                                ]
+                            },
+                            1,
+                            0
+                        ]
+                    }
+                },
+                "posts_seeking": {
+                    "$sum": {
+                        "$cond": [
+                            {
+                                "$and": [
+                                    {"$eq": ["$type", "skill_request"]},
+                                    {"$in": ["$all_skills", {"$ifNull": ["$skills.seeking", []]}]}
+                                ]
+                            },
+                            1,
+                            0
+                        ]
+                    }
+                },
+                "preview_posts": {"$push": "$$ROOT"}
+            }
+        },
+        # Calcular total y limitar previews
+        {
+            "$project": {
+                "skill_name": "$_id",
+                "posts_offering": 1,
+                "posts_seeking": 1,
+                "total_posts": {"$add": ["$posts_offering", "$posts_seeking"]},
+                "preview_posts": {"$slice": ["$preview_posts", 3]}
+            }
+        },
+        # Ordenar por total de posts
+        {"$sort": {"total_posts": -1}},
+        # Limitar resultados
+        {"$limit": limit}
+    ]
+    
+    results = await post_collection.aggregate(pipeline).to_list(length=limit)
+    
+    # Formatear resultados
+    categories_data = []
+    
+    # Obtener todos los user_ids únicos de los previews
+    all_user_ids = set()
+    for result in results:
+        for post in result.get("preview_posts", []):
+            all_user_ids.add(post["user_id"])
+    
+    # Cargar todos los usuarios de una vez
+    users = await user_collection.find(
+        {"_id": {"$in": list(all_user_ids)}},
+        {"username": 1, "first_name": 1, "last_name": 1, "profile_image": 1}
+    ).to_list(length=len(all_user_ids))
+    
+    user_map = {
+        str(user["_id"]): {
+            "id": str(user["_id"]),
+            "username": user["username"],
+            "first_name": user.get("first_name", ""),
+            "last_name": user.get("last_name", ""),
+            "profile_image": user.get("profile_image")
+        }
+        for user in users
+    }
+    
+    # Formatear categorías con previews
+    for result in results:
+        formatted_previews = []
+        
+        for post in result.get("preview_posts", []):
+            user_id = str(post["user_id"])
+            user_info = user_map.get(user_id)
+            
+            if user_info:
+                content = post["content"]
+                
+                formatted_previews.append({
+                    "id": str(post["_id"]),
+                    "user": user_info,
+                    "content": content[:100] + "..." if len(content) > 100 else content,
+                    "images": post.get("images", [])[:1],
+                    "type": post["type"],
+                    "skills": post.get("skills"),
+                    "likes_count": post.get("likes_count", 0),
+                    "comments_count": post.get("comments_count", 0),
+                    "created_at": post["created_at"],
+                    "_likers": frozenset(post.get("likes", []))
+                })
+        
+        categories_data.append({
+            "skill_name": result["skill_name"],
+            "posts_offering": result["posts_offering"],
+            "posts_seeking": result["posts_seeking"],
+            "total_posts": result["total_posts"],
+            "preview_posts": formatted_previews
+        })
+    
+    elapsed = time.time() - start_time
+    logger.info(f"🔍 Categorías explore recalculadas: {len(categories_data)} categorías en {elapsed:.2f}s")
+    
+    return categories_data
+
+
+def apply_is_liked(post: dict, current_user_obj_id: ObjectId) -> dict:
+    """Copia un preview cacheado agregando el is_liked del usuario actual"""
+    formatted = {key: value for key, value in post.items() if key != "_likers"}
+    formatted["is_liked"] = current_user_obj_id in post["_likers"]
+    return formatted
+
+
 @router.get("/categories", response_model=ExploreResponse)
 async def get_explore_categories(
     current_user_id: str = Depends(auth_required_depends),
@@ -54,155 +226,26 @@ async def get_explore_categories(
 ):
     """
     Obtener categorías de habilidades con estadísticas usando aggregation (OPTIMIZADO)
+    El cálculo se comparte entre usuarios (stale-while-revalidate); solo is_liked es por usuario.
     """
     try:
-        import time
-        start_time = time.time()
+        categories = await explore_categories_cache.get(
+            limit, lambda: compute_explore_categories(limit)
+        )
         
-        # ⚡ AGGREGATION PIPELINE - 1 SOLA QUERY para todo
-        pipeline = [
-            # Filtrar solo posts con skills
-            {
-                "$match": {
-                    "type": {"$in": ["skill_offer", "skill_request"]},
-                    "skills": {"$ne": None}
-                }
-            },
-            # Descomponer arrays de skills
-            {
-                "$project": {
-                    "type": 1,
-                    "user_id": 1,
-                    "content": 1,
-                    "images": 1,
-                    "skills": 1,
-                    "likes": 1,
-                    "likes_count": 1,
-                    "comments_count": 1,
-                    "created_at": 1,
-                    "all_skills": {
-                        "$concatArrays": [
-                            {"$ifNull": ["$skills.offering", []]},
-                            {"$ifNull": ["$skills.seeking", []]}
-                        ]
-                    }
-                }
-            },
-            # Desenrollar el array de skills
-            {"$unwind": "$all_skills"},
-            # Agrupar por skill y contar
-            {
-                "$group": {
-                    "_id": "$all_skills",
-                    "posts_offering": {
-                        "$sum": {
-                            "$cond": [
-                                {
-                                    "$and": [
-                                        {"$eq": ["$type", "skill_offer"]},
-                                        {"$in": ["$all_skills", {"$ifNull": ["$skills.offering", []]}]}
-                                    ]
-                                },
-                                1,
-                                0
-                            ]
-                        }
-                    },
-                    "posts_seeking": {
-                        "$sum": {
-                            "$cond": [
-                                {
-                                    "$and": [
-                                        {"$eq": ["$type", "skill_request"]},
-                                        {"$in": ["$all_skills", {"$ifNull": ["$skills.seeking", []]}]}
-                                    ]
-                                },
-                                1,
-                                0
-                            ]
-                        }
-                    },
-                    "preview_posts": {"$push": "$$ROOT"}
-                }
-            },
-            # Calcular total y limitar previews
+        current_user_obj_id = ObjectId(current_user_id)
+        categories_data = [
             {
-                "$project": {
-                    "skill_name": "$_id",
-                    "posts_offering": 1,
-                    "posts_seeking": 1,
-                    "total_posts": {"$add": ["$posts_offering", "$posts_seeking"]},
-                    "preview_posts": {"$slice": ["$preview_posts", 3]}
-                }
-            },
-            # Ordenar por total de posts
-            {"$sort": {"total_posts": -1}},
-            # Limitar resultados
-            {"$limit": limit}
-        ]
-        
-        results = await post_collection.aggregate(pipeline).to_list(length=limit)
-        
-        # Formatear resultados
-        categories_data = []
-        
-        # Obtener todos los user_ids únicos de los previews
-        all_user_ids = set()
-        for result in results:
-            for post in result.get("preview_posts", []):
-                all_user_ids.add(post["user_id"])
-        
-        # Cargar todos los usuarios de una vez
-        users = await user_collection.find(
-            {"_id": {"$in": list(all_user_ids)}}
-        ).to_list(length=len(all_user_ids))
-        
-        user_map = {
-            str(user["_id"]): {
-                "id": str(user["_id"]),
-                "username": user["username"],
-                "first_name": user.get("first_name", ""),
-                "last_name": user.get("last_name", ""),
-                "profile_image": user.get("profile_image")
+                **category,
+                "preview_posts": [
+                    apply_is_liked(post, current_user_obj_id)
+                    for post in category["preview_posts"]
+                ],
+                # Fuera del cache: refleja la matriz vigente
+                "related_skills": skill_cooccurrence.related(category["skill_name"])
             }
-            for user in users
-        }
-        
-        # Formatear categorías con previews
-        for result in results:
-            formatted_previews = []
-            
-            for post in result.get("preview_posts", []):
-                user_id = str(post["user_id"])
-                user_info = user_map.get(user_id)
-                
-                if user_info:
-                    is_liked = ObjectId(current_user_id) in post.get("likes", [])
-                    content = post["content"]
-                    
-                    formatted_previews.append({
-                        "id": str(post["_id"]),
-                        "user": user_info,
-                        "content": content[:100] + "..." if len(content) > 100 else content,
-                        "images": post.get("images", [])[:1],
-                        "type": post["type"],
-                        "skills": post.get("skills"),
-                        "likes_count": post.get("likes_count", 0),
-                        "comments_count": post.get("comments_count", 0),
-                        "is_liked": is_liked,
-                        "created_at": post["created_at"]
-                    })
-            
-            categories_data.append({
-                "skill_name": result["skill_name"],
-                "posts_offering": result["posts_offering"],
-                "posts_seeking": result["posts_seeking"],
-                "total_posts": result["total_posts"],
-                "preview_posts": formatted_previews
-            })
-        
-        elapsed = time.time() - start_time
-        logger.info(f"🔍 Categorías explore: {len(categories_data)} categorías en {elapsed:.2f}s")
+            for category in categories
+        ]
         
         return {
             "categories": categories_data,
@@ -286,7 +329,8 @@ async def get_skill_detail(
             "offering_posts": offering_posts,
             "seeking_posts": seeking_posts,
             "total_posts": total_posts,
-            "has_more": has_more
+            "has_more": has_more,
+            "related_skills": skill_cooccurrence.related(skill_name)
         }
         
     except HTTPException as e:
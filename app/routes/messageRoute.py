@@ -2,10 +2,10 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from app.schemas.messages.messageSchema import SendMessageRequest, MessageResponse, ConversationResponse, ConversationDetailResponse, MessageUser
 from app.utils.auth_guardUtils import auth_required_depends
+from app.utils.user_context import current_user_context
 from app.models.messageModel import conversation_collection, message_collection
 from app.database import user_collection, notification_collection
-from app.utils.websocket_manager import manager
-from app.utils.push_notifications import send_push_notification
+from app.utils.messaging import send_direct_message
 from bson import ObjectId
 from datetime import datetime
 from typing import List
@@ -180,63 +180,22 @@ async def get_conversation_with_user(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @router.post("/send")
-async def send_message(message_data: SendMessageRequest, current_user_id: str = Depends(auth_required_depends)):
-    """Envía un mensaje"""
+async def send_message(
+    message_data: SendMessageRequest,
+    current_user: dict = Depends(current_user_context)
+):
+    """Envía un mensaje (también disponible como frame `send_message` por WebSocket)"""
     try:
-        # 🔍 LOG: Inicio del envío
-        logger.info(f"📨 Enviando mensaje de {current_user_id} a {message_data.recipient_username}")
-        
-        # Buscar destinatario
-        recipient = await user_collection.find_one({"username": message_data.recipient_username})
-        if not recipient:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        
-        recipient_id = str(recipient["_id"])
-        logger.info(f"✅ Destinatario encontrado: {recipient_id}")
-        
-        # Obtener usuario actual
-        current_user = await user_collection.find_one({"_id": ObjectId(current_user_id)})
-        
-        # Buscar o crear conversación
-        conversation = await conversation_collection.find_one({
-            "participants": {"$all": [ObjectId(current_user_id), recipient["_id"]]}
-        })
-        
-        is_new_conversation = conversation is None
-        
-        if not conversation:
-            # Crear nueva conversación
-            logger.info(f"🆕 Creando nueva conversación")
-            conv_data = {
-                "participants": [ObjectId(current_user_id), recipient["_id"]],
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-            conv_result = await conversation_collection.insert_one(conv_data)
-            conversation = {"_id": conv_result.inserted_id}
-        else:
-            logger.info(f"✅ Conversación existente: {str(conversation['_id'])}")
-        
-        # Crear mensaje
-        message_doc = {
-            "conversation_id": conversation["_id"],
-            "sender_id": ObjectId(current_user_id),
-            "content": message_data.content,
-            "created_at": datetime.utcnow(),
-            "is_read": False
-        }
-        
-        message_result = await message_collection.insert_one(message_doc)
-        
-        # Actualizar conversación
-        await conversation_collection.update_one(
-            {"_id": conversation["_id"]},
-            {"$set": {"updated_at": datetime.utcnow()}}
+        logger.debug("📨 Enviando mensaje a %s", message_data.recipient_username)
+
+        sent = await send_direct_message(
+            current_user, message_data.recipient_username, message_data.content, message_data.client_id
         )
-        
+        message_doc = sent["message"]
+
         # Crear objeto de respuesta
         message_response = MessageResponse(
-            id=str(message_result.inserted_id),
+            id=str(message_doc["_id"]),
             sender=MessageUser(
                 id=str(current_user["_id"]),
                 username=current_user["username"],
@@ -244,50 +203,11 @@ async def send_message(message_data: SendMessageRequest, current_user_id: str =
                 last_name=current_user.get("last_name", ""),
                 profile_image=current_user.get("profile_image", "")
             ),
-            content=message_data.content,
+            content=message_doc["content"],
             created_at=message_doc["created_at"],
-            is_read=False
+            is_read=message_doc.get("is_read", False)
         )
         
-        # 🔔 ENVIAR VIA WEBSOCKET AL DESTINATARIO
-        websocket_message = {
-            "type": "new_message",
-            "data": {
-                "sender_username": current_user["username"],
-                "content": message_data.content,
-                "created_at": message_doc["created_at"].isoformat(),
-                "is_new_conversation": is_new_conversation  # 🆕 AÑADIDO
-            }
-        }
-        
-        # Verificar si el destinatario está conectado
-        is_recipient_online = manager.is_user_online(recipient_id)
-        logger.info(f"🔌 Destinatario online: {is_recipient_online}")
-        
-        if is_recipient_online:
-            logger.info(f"📤 Enviando WebSocket a destinatario: {recipient_id}")
-            await manager.send_personal_message(websocket_message, recipient_id)
-            logger.info(f"✅ WebSocket enviado exitosamente")
-        else:
-            logger.info(f"⚠️ Destinatario offline, no se envía WebSocket")
-        
-        # 📲 Enviar push notification si el usuario no está online
-        if not is_recipient_online:
-            if recipient.get("expo_push_token"):
-                logger.info(f"📲 Enviando push notification")
-                await send_push_notification(
-                    token=recipient["expo_push_token"],
-                    title=f"Nuevo mensaje de {current_user['username']}",
-                    body=message_data.content,
-                    data={
-                        "type": "message",
-                        "sender_username": current_user["username"],
-                        "conversation_id": str(conversation["_id"])
-                    }
-                )
-        
-        logger.info(f"✅ Mensaje enviado completamente")
-        
         # Retornar datos del mensaje creado
         return {
             "message": "Mensaje enviado exitosamente",
@@ -295,8 +215,8 @@ async def send_message(message_data: SendMessageRequest, current_user_id: str =
         }
         
     except HTTPException as e:
-        logger.error(f"❌ HTTPException: {str(e)}")
+        logger.warning("❌ HTTPException: %s", e.detail)
         raise e
     except Exception as e:
-        logger.error(f"❌ Error inesperado: {str(e)}")
+        logger.exception("❌ Error inesperado enviando mensaje: %s", e)
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,28 @@
+# app/routes/monitoringRoute.py
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from app.utils.loop_monitor import loop_monitor
+from app.utils.compression import compression_stats
+from app.config import MONITORING_TOKEN
+
+def monitoring_access(x_monitoring_token: str = Header(None)):
+    """
+    Los endpoints de monitoreo exponen rutas y stacks internos: solo con
+    MONITORING_TOKEN. Sin token configurado responden 404, como si no existieran.
+    """
+    if not MONITORING_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_monitoring_token or not secrets.compare_digest(x_monitoring_token, MONITORING_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de monitoreo inválido")
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"], dependencies=[Depends(monitoring_access)])
+
+@router.get("/loop-lag")
+async def get_loop_lag():
+    """Histograma de lag del event loop y últimos callbacks lentos detectados"""
+    return loop_monitor.snapshot()
+
+@router.get("/compression")
+async def get_compression_stats():
+    """Bytes originales vs comprimidos por ruta y ratio logrado"""
+    return compression_stats.snapshot()
@@ -1,11 +1,12 @@
 #app/routes/notificationsRoute.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
 from app.database import notification_collection, user_collection
 from app.schemas.navigation.notificationsSchema import NotificationResponse, PushTokenRequest
 from app.utils.auth_guardUtils import auth_required_depends
+from app.utils.notifications import render_notifications, adjust_unread, unread_count, publish_badge
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timezone
 
 router = APIRouter(
     prefix="/notifications",
@@ -14,41 +15,61 @@ router = APIRouter(
 
 # ========= OBTENER NOTIFICACIONES DEL USUARIO ACTUAL =========
 @router.get("/", response_model=List[NotificationResponse])
-async def get_notifications(current_user_id: str = Depends(auth_required_depends)):
+async def get_notifications(
+    limit: int = Query(50, ge=1, le=100),
+    before_id: str = Query(None, description="ID de la última notificación recibida, para paginación"),
+    before_created_at: Optional[datetime] = Query(
+        None, description="created_at de esa misma notificación; con él no se busca la notificación de referencia"
+    ),
+    current_user_id: str = Depends(auth_required_depends)
+):
+    query = {"to_user": ObjectId(current_user_id)}
+
+    # Cursor por (created_at, _id): las agrupadas cambian de created_at al recibir actores
+    if before_id:
+        try:
+            anchor_id = ObjectId(before_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="before_id inválido")
+
+        anchor_created_at = before_created_at
+        if anchor_created_at is None:
+            anchor = await notification_collection.find_one(
+                {"_id": anchor_id, "to_user": ObjectId(current_user_id)},
+                {"created_at": 1}
+            )
+            # Sin la referencia no hay forma de seguir: volver a la primera
+            # página repetiría notificaciones
+            if anchor is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail="La notificación de referencia ya no existe; envía también before_created_at"
+                )
+            anchor_created_at = anchor["created_at"]
+        elif anchor_created_at.tzinfo is not None:
+            # Mongo guarda UTC sin zona
+            anchor_created_at = anchor_created_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+        query["$or"] = [
+            {"created_at": {"$lt": anchor_created_at}},
+            {"created_at": anchor_created_at, "_id": {"$lt": anchor_id}}
+        ]
+    elif before_created_at is not None:
+        raise HTTPException(status_code=400, detail="before_created_at requiere before_id")
+
     notifications_cursor = notification_collection.find(
-        {"to_user": ObjectId(current_user_id)},
-        sort=[("created_at", -1)]
-    )
+        query,
+        sort=[("created_at", -1), ("_id", -1)]
+    ).limit(limit)
 
-    notifications = await notifications_cursor.to_list(length=50)
-    enriched_notifications = []
-
-    for notif in notifications:
-        from_user = await user_collection.find_one(
-            {"_id": notif["from_user"]},
-            {"username": 1, "first_name": 1, "last_name": 1, "profile_image": 1}
-        )
-
-        # Evita error si el usuario ya no existe
-        if not from_user:
-            continue
-
-        enriched_notifications.append({
-            "id": str(notif["_id"]),
-            "type": notif["type"],
-            "message": notif["message"],
-            "created_at": notif["created_at"].isoformat() if notif.get("created_at") else None,
-            "read": notif.get("read", False),
-            "from_user": {
-                "id": str(from_user["_id"]),
-                "username": from_user["username"],
-                "first_name": from_user.get("first_name", ""),
-                "last_name": from_user.get("last_name", ""),
-                "profile_image": from_user.get("profile_image", "")
-            }
-        })
-
-    return enriched_notifications
+    notifications = await notifications_cursor.to_list(length=limit)
+
+    return await render_notifications(notifications)
+
+# ========= CONTADOR DE NO LEÍDAS (BADGE) =========
+@router.get("/unread-count")
+async def get_unread_count(current_user_id: str = Depends(auth_required_depends)):
+    return {"unread_count": await unread_count(ObjectId(current_user_id))}
 
 # ========= MARCAR NOTIFICACIÓN COMO LEÍDA =========
 @router.patch("/{notification_id}/read")
@@ -56,14 +77,18 @@ async def mark_notification_as_read(notification_id: str, current_user_id: str =
     result = await notification_collection.update_one(
         {
             "_id": ObjectId(notification_id),
-            "to_user": ObjectId(current_user_id)
+            "to_user": ObjectId(current_user_id),
+            "read": False
         },
-        {"$set": {"read": True}}
+        {"$set": {"read": True, "read_at": datetime.utcnow()}}
     )
 
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Notificación no encontrada o ya leída")
 
+    await adjust_unread(ObjectId(current_user_id), -1)
+    await publish_badge(ObjectId(current_user_id))
+
     return {"message": "Notificación marcada como leída"}
 
 
@@ -74,8 +99,11 @@ async def mark_all_as_read(current_user_id: str = Depends(auth_required_depends)
             "to_user": ObjectId(current_user_id),
             "read": False
         },
-        {"$set": {"read": True}}
+        {"$set": {"read": True, "read_at": datetime.utcnow()}}
     )
+    await adjust_unread(ObjectId(current_user_id), -result.modified_count)
+    if result.modified_count:
+        await publish_badge(ObjectId(current_user_id))
 
     return {"message": f"{result.modified_count} notificaciones marcadas como leídas"}
 
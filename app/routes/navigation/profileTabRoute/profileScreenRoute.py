@@ -1,10 +1,15 @@
 #app/routes/navigation/profileTabRoute/profileScreenRoute.py
-from fastapi import APIRouter, Depends, HTTPException, Path
-from app.database import user_collection, notification_collection
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response
+from app.database import user_collection
 from app.schemas.navigation.profileTabSchema.profileScreenSchema import PublicUserProfile, FollowActionResponse
 from app.utils.auth_guardUtils import auth_required_depends
-from app.utils.push_notifications import send_push_notification 
+from app.utils.outbox import outbox
+from app.utils.notifications import notification_actor
+from app.utils.follow_graph import follow_graph
+from app.utils.user_context import invalidate_user_context
+from app.utils.http_cache import make_etag, etag_matches, not_modified, set_cache_headers, CACHE_PRIVATE_REVALIDATE
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime
 from typing import Optional
 
@@ -15,28 +20,34 @@ router = APIRouter(
 
 @router.get("/{username}", response_model=PublicUserProfile)
 async def get_public_profile(
+    request: Request,
+    response: Response,
     username: str = Path(..., min_length=3, max_length=30),
     current_user_id: Optional[str] = Depends(auth_required_depends)
 ):
     filtro = {"username": {"$regex": f"^{username}$", "$options": "i"}}
-    user = await user_collection.find_one(filtro)
+
+    # Proyección ligera: conteos e is_following se calculan en Mongo
+    # sin traer los arrays de seguidores ni el documento del usuario actual
+    user = await user_collection.find_one(filtro, {
+        "username": 1,
+        "first_name": 1,
+        "last_name": 1,
+        "about_me": 1,
+        "profile_image": 1,
+        "followers_count": {"$size": {"$ifNull": ["$followers", []]}},
+        "following_count": {"$size": {"$ifNull": ["$following", []]}},
+        "is_followed_by_current": {"$in": [ObjectId(current_user_id), {"$ifNull": ["$followers", []]}]}
+    })
 
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
     user_id = str(user["_id"])
     is_own_profile = current_user_id == user_id
+    is_following = not is_own_profile and user.get("is_followed_by_current", False)
 
-    is_following = False
-    if not is_own_profile and current_user_id:
-        current_user = await user_collection.find_one({"_id": ObjectId(current_user_id)})
-        if current_user and "following" in current_user:
-            is_following = ObjectId(user["_id"]) in current_user.get("following", [])
-
-    followers_count = len(user.get("followers", []))
-    following_count = len(user.get("following", []))
-
-    return {
+    profile = {
         "id": user_id,
         "username": user["username"],
         "first_name": user["first_name"],
@@ -45,10 +56,17 @@ async def get_public_profile(
         "profile_image": user.get("profile_image"),
         "is_own_profile": is_own_profile,
         "is_following": is_following,
-        "followers_count": followers_count,
-        "following_count": following_count
+        "followers_count": user.get("followers_count", 0),
+        "following_count": user.get("following_count", 0)
     }
 
+    etag = make_etag(profile)
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_PRIVATE_REVALIDATE)
+
+    set_cache_headers(response, etag, CACHE_PRIVATE_REVALIDATE)
+    return profile
+
 @router.post("/{username}/follow", response_model=FollowActionResponse)
 async def follow_user(username: str, current_user_id: str = Depends(auth_required_depends)):
     target = await user_collection.find_one({
@@ -64,37 +82,41 @@ async def follow_user(username: str, current_user_id: str = Depends(auth_require
     if current_user and target["_id"] in current_user.get("following", []):
         raise HTTPException(status_code=400, detail="Ya sigues a este usuario")
 
-    await user_collection.update_one(
+    # follow_version identifica cada follow/unfollow para la llave de idempotencia del outbox
+    follower = await user_collection.find_one_and_update(
         {"_id": ObjectId(current_user_id)},
-        {"$addToSet": {"following": target["_id"]}}
+        {"$addToSet": {"following": target["_id"]}, "$inc": {"follow_version": 1}},
+        projection={"follow_version": 1},
+        return_document=ReturnDocument.AFTER
     )
     await user_collection.update_one(
         {"_id": target["_id"]},
         {"$addToSet": {"followers": ObjectId(current_user_id)}}
     )
+    follow_graph.follow(current_user_id, target["_id"])
+    invalidate_user_context(current_user_id)
+    invalidate_user_context(str(target["_id"]))
 
     now = datetime.utcnow()
-    # Crear notificación en base de datos
-    await notification_collection.insert_one({
-        "to_user": target["_id"],
-        "from_user": ObjectId(current_user_id),
-        "type": "follow",
-        "message": f"{current_user['username']} empezó a seguirte",
-        "created_at": now,
-        "read": False
-    })
-
-    # Enviar notificación push si tiene token
-    if "expo_push_token" in target and target["expo_push_token"]:
-        await send_push_notification(
-            token=target["expo_push_token"],
-            title="¡Nuevo seguidor!",
-            body=f"{current_user['username']} empezó a seguirte",
-            data={
+    # Notificación y push fuera del request
+    await outbox.enqueue("notify", {
+        "notification": {
+            "to_user": target["_id"],
+            "from_user": ObjectId(current_user_id),
+            "type": "follow",
+            "message": f"{current_user['username']} empezó a seguirte",
+            "created_at": now
+        },
+        "actor": notification_actor(current_user),
+        "push": {
+            "title": "¡Nuevo seguidor!",
+            "body": f"{current_user['username']} empezó a seguirte",
+            "data": {
                 "type": "follow",
                 "from_user": str(current_user["_id"])
             }
-        )
+        }
+    }, key=f"follow:{current_user_id}:{target['_id']}:{follower['follow_version']}")
 
     return {"message": f"Ahora sigues a {target['username']}"}
 
@@ -109,21 +131,28 @@ async def unfollow_user(username: str, current_user_id: str = Depends(auth_requi
     if str(target["_id"]) == current_user_id:
         raise HTTPException(status_code=400, detail="No puedes dejar de seguirte a ti mismo")
 
-    await user_collection.update_one(
+    follower = await user_collection.find_one_and_update(
         {"_id": ObjectId(current_user_id)},
-        {"$pull": {"following": target["_id"]}}
+        {"$pull": {"following": target["_id"]}, "$inc": {"follow_version": 1}},
+        projection={"follow_version": 1},
+        return_document=ReturnDocument.AFTER
     )
+    if follower is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
     await user_collection.update_one(
         {"_id": target["_id"]},
         {"$pull": {"followers": ObjectId(current_user_id)}}
     )
+    follow_graph.unfollow(current_user_id, target["_id"])
+    invalidate_user_context(current_user_id)
+    invalidate_user_context(str(target["_id"]))
 
-    # 🗑️ Eliminar notificación de seguimiento (si existe)
-    await notification_collection.delete_many({
+    # 🗑️ Quitar de la notificación de seguidores (fuera del request)
+    await outbox.enqueue("unnotify", {
         "to_user": target["_id"],
         "from_user": ObjectId(current_user_id),
         "type": "follow"
-    })
+    }, key=f"unfollow:{current_user_id}:{target['_id']}:{follower['follow_version']}")
 
     return {"message": f"Has dejado de seguir a {target['username']}"}
 
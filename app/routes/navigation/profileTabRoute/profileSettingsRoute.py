@@ -1,7 +1,11 @@
 # routes/navigation/profileTab/profileSettingsRoute.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from app.utils.auth_guardUtils import auth_required_depends
-from app.utils.securityUtils import hash_password, verify_password
+from app.utils.user_context import invalidate_user_context
+from app.utils.presence import presence
+from app.utils.skill_matcher import skill_matcher
+from app.utils.http_cache import make_etag, etag_matches, not_modified, set_cache_headers, CACHE_PUBLIC_DAY
+from app.utils.securityUtils import hash_password_async, verify_password_async
 from app.database import user_collection
 from app.schemas.navigation.profileTabSchema.profileSettingsSchema import *
 from app.schemas.authSchema import PREDEFINED_SKILLS
@@ -10,9 +14,16 @@ from bson import ObjectId
 
 router = APIRouter(prefix="/navigation/profileTab/profileSettings", tags=["Navigation - Profile"])
 
+# La lista es constante: su ETag se calcula una sola vez
+PREDEFINED_SKILLS_ETAG = make_etag(PREDEFINED_SKILLS)
+
 @router.get("/predefined-skills", response_model=PredefinedSkillsResponse)
-async def get_predefined_skills():
+async def get_predefined_skills(request: Request, response: Response):
     """Obtener lista de habilidades predefinidas para el frontend"""
+    if etag_matches(request, PREDEFINED_SKILLS_ETAG):
+        return not_modified(PREDEFINED_SKILLS_ETAG, CACHE_PUBLIC_DAY)
+
+    set_cache_headers(response, PREDEFINED_SKILLS_ETAG, CACHE_PUBLIC_DAY)
     return {
         "skills": PREDEFINED_SKILLS,
         "message": "Lista de habilidades disponibles"
@@ -88,6 +99,12 @@ async def update_profile(payload: UpdateUserProfile, user_id: str = Depends(auth
     if result.modified_count == 0:
         raise HTTPException(status_code=400, detail="No se pudo actualizar el perfil")
 
+    invalidate_user_context(user_id)
+    if "username" in update_data:
+        presence.forget_user(user_id)
+    if payload.interests_offered is not None or payload.interests_wanted is not None:
+        skill_matcher.update(user_id, payload.interests_offered, payload.interests_wanted)
+
     return {"message": "Perfil actualizado correctamente"}
 
 @router.patch("/password")
@@ -99,10 +116,10 @@ async def change_password(
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    if not verify_password(payload.current_password, user["password"]):
+    if not await verify_password_async(payload.current_password, user["password"]):
         raise HTTPException(status_code=403, detail="La contraseña actual no es correcta")
 
-    new_hashed = hash_password(payload.new_password)
+    new_hashed = await hash_password_async(payload.new_password)
 
     await user_collection.update_one(
         {"_id": ObjectId(user_id)},
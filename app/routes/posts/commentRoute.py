@@ -2,8 +2,13 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from app.schemas.posts.postSchema import CommentCreate, CommentResponse, CommentsListResponse, PostUser
 from app.utils.auth_guardUtils import auth_required_depends
-from app.database import comment_collection, post_collection, user_collection, notification_collection
-from app.utils.push_notifications import send_push_notification
+from app.utils.user_context import current_user_context
+from app.database import comment_collection, post_collection, user_collection
+from app.utils.outbox import outbox
+from app.utils.notifications import notification_actor
+from app.utils.fast_json import fast_response
+from app.utils.post_subscriptions import post_subscriptions
+from app.utils.sharded_counters import sharded_counters
 from bson import ObjectId
 from datetime import datetime
 from typing import List
@@ -17,19 +22,17 @@ router = APIRouter(prefix="/posts/{post_id}/comments", tags=["Comments"])
 async def create_comment(
     post_id: str,
     comment_data: CommentCreate,
-    current_user_id: str = Depends(auth_required_depends)
+    current_user_id: str = Depends(auth_required_depends),
+    current_user: dict = Depends(current_user_context)
 ):
     """Crear un comentario en un post"""
     try:
         # Verificar que el post existe
-        post = await post_collection.find_one({"_id": ObjectId(post_id)})
+        post = await post_collection.find_one({"_id": ObjectId(post_id)}, {"user_id": 1})
         
         if not post:
             raise HTTPException(status_code=404, detail="Post no encontrado")
         
-        # Obtener info del usuario actual
-        current_user = await user_collection.find_one({"_id": ObjectId(current_user_id)})
-        
         # Crear comentario
         comment_dict = {
             "post_id": ObjectId(post_id),
@@ -40,40 +43,41 @@ async def create_comment(
         
         result = await comment_collection.insert_one(comment_dict)
         
-        # Incrementar contador de comentarios en el post
-        await post_collection.update_one(
-            {"_id": ObjectId(post_id)},
-            {"$inc": {"comments_count": 1}}
-        )
+        # Incrementar contador de comentarios en el post (por shards si está caliente)
+        if sharded_counters.is_hot(post_id):
+            await sharded_counters.add(ObjectId(post_id), "comments_count", 1)
+        else:
+            await post_collection.update_one(
+                {"_id": ObjectId(post_id)},
+                {"$inc": {"comments_count": 1}}
+            )
+        post_subscriptions.touch(post_id)
         
-        # Crear notificación solo si no es tu propio post
+        # Notificación y push solo si no es tu propio post (fuera del request)
         if str(post["user_id"]) != current_user_id:
-            await notification_collection.insert_one({
-                "to_user": post["user_id"],
-                "from_user": ObjectId(current_user_id),
-                "type": "comment",
-                "post_id": ObjectId(post_id),
-                "comment_id": result.inserted_id,
-                "message": f"{current_user['username']} comentó tu publicación",
-                "created_at": datetime.utcnow(),
-                "read": False
-            })
-            
-            # Enviar push notification
-            post_owner = await user_collection.find_one({"_id": post["user_id"]})
-            if post_owner.get("expo_push_token"):
-                await send_push_notification(
-                    token=post_owner["expo_push_token"],
-                    title="Nuevo comentario",
-                    body=f"{current_user['username']}: {comment_data.content[:50]}...",
-                    data={
+            await outbox.enqueue("notify", {
+                "notification": {
+                    "to_user": post["user_id"],
+                    "from_user": ObjectId(current_user_id),
+                    "type": "comment",
+                    "post_id": ObjectId(post_id),
+                    "comment_id": result.inserted_id,
+                    "message": f"{current_user['username']} comentó tu publicación",
+                    "created_at": comment_dict["created_at"]
+                },
+                "actor": notification_actor(current_user),
+                "push": {
+                    "title": "Nuevo comentario",
+                    "body": f"{current_user['username']}: {comment_data.content[:50]}...",
+                    "data": {
                         "type": "comment",
                         "post_id": post_id,
                         "from_user": current_user_id
                     }
-                )
+                }
+            }, key=f"comment:{result.inserted_id}")
         
-        logger.info(f"💬 Comentario creado en post {post_id}")
+        logger.info("💬 Comentario creado en post %s", post_id, extra={"post_id": post_id})
         
         return {
             "id": str(result.inserted_id),
@@ -91,7 +95,7 @@ async def create_comment(
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.error(f"❌ Error creando comentario: {str(e)}")
+        logger.error("❌ Error creando comentario: %s", e, extra={"post_id": post_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error: {str(e)}"
@@ -165,18 +169,18 @@ async def get_comments(
         # Invertir para orden cronológico
         formatted_comments.reverse()
         
-        logger.info(f"💬 Comentarios cargados: {len(formatted_comments)} del post {post_id}")
+        logger.info("💬 Comentarios cargados: %d del post %s", len(formatted_comments), post_id)
         
-        return {
+        return fast_response({
             "comments": formatted_comments,
             "count": len(formatted_comments),
             "has_more": has_more
-        }
+        }, CommentsListResponse)
         
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.error(f"❌ Error cargando comentarios: {str(e)}")
+        logger.error("❌ Error cargando comentarios: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error: {str(e)}"
@@ -206,16 +210,28 @@ async def delete_comment(
         # Eliminar comentario
         await comment_collection.delete_one({"_id": ObjectId(comment_id)})
         
-        # Decrementar contador de comentarios
-        await post_collection.update_one(
-            {"_id": ObjectId(post_id)},
-            {"$inc": {"comments_count": -1}}
-        )
+        # Decrementar contador de comentarios (por shards si está caliente)
+        if sharded_counters.is_hot(post_id):
+            post = await post_collection.find_one({"_id": ObjectId(post_id)}, {"user_id": 1})
+            if post:
+                await sharded_counters.add(ObjectId(post_id), "comments_count", -1)
+        else:
+            post = await post_collection.find_one_and_update(
+                {"_id": ObjectId(post_id)},
+                {"$inc": {"comments_count": -1}},
+                projection={"user_id": 1}
+            )
+        if post:
+            post_subscriptions.touch(post_id)
         
-        # Eliminar notificación asociada
-        await notification_collection.delete_many({
-            "comment_id": ObjectId(comment_id)
-        })
+        # Quitar al autor de la notificación agrupada (fuera del request)
+        if post and post["user_id"] != comment["user_id"]:
+            await outbox.enqueue("unnotify", {
+                "to_user": post["user_id"],
+                "from_user": comment["user_id"],
+                "type": "comment",
+                "post_id": ObjectId(post_id)
+            }, key=f"uncomment:{comment_id}")
         
         logger.info(f"🗑️ Comentario eliminado: {comment_id}")
         
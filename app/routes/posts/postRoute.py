@@ -1,10 +1,18 @@
 # app/routes/posts/postRoute.py
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from app.schemas.posts.postSchema import PostCreate, PostUpdate, PostResponse, LikeResponse, PostUser
 from app.utils.auth_guardUtils import auth_required_depends
-from app.database import post_collection, user_collection, notification_collection
-from app.utils.push_notifications import send_push_notification
+from app.utils.user_context import current_user_context
+from app.database import post_collection, user_collection
+from app.utils.outbox import outbox
+from app.utils.notifications import delete_notifications, notification_actor
+from app.utils.fast_json import fast_response
+from app.utils.post_subscriptions import post_subscriptions
+from app.utils.http_cache import make_etag, etag_matches, not_modified, set_cache_headers, CACHE_PRIVATE_REVALIDATE
+from app.utils.swr_cache import SWRCache
+from app.config import EXPLORE_CACHE_FRESH_SECONDS, EXPLORE_CACHE_STALE_SECONDS
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime
 from typing import List
 import logging
@@ -13,15 +21,31 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
+# {(limit, before_id): página de explore} compartida entre todos los usuarios
+explore_posts_cache = SWRCache("explore_posts", EXPLORE_CACHE_FRESH_SECONDS, EXPLORE_CACHE_STALE_SECONDS)
+
+# Campos del autor que se muestran en un post
+POST_USER_PROJECTION = {"username": 1, "first_name": 1, "last_name": 1, "profile_image": 1}
+
+def format_skills(skills: dict):
+    """
+    Skills con los defaults de PostSkills: fast_response no pasa por
+    response_model, así que los posts viejos sin offering/seeking se completan aquí
+    """
+    if skills is None:
+        return None
+    return {"offering": skills.get("offering") or [], "seeking": skills.get("seeking") or []}
+
 # Helper para formatear posts
-async def format_post(post: dict, current_user_id: str) -> dict:
-    """Formatea un post con información del usuario"""
-    user = await user_collection.find_one({"_id": post["user_id"]})
+async def format_post(post: dict, current_user_id: str, user: dict = None) -> dict:
+    """Formatea un post con información del usuario (se puede pasar el autor ya cargado)"""
+    if user is None:
+        user = await user_collection.find_one({"_id": post["user_id"]}, POST_USER_PROJECTION)
     
     if not user:
         return None
     
-    is_liked = ObjectId(current_user_id) in post.get("likes", [])
+    is_liked = current_user_id is not None and ObjectId(current_user_id) in post.get("likes", [])
     
     return {
         "id": str(post["_id"]),
@@ -35,7 +59,7 @@ async def format_post(post: dict, current_user_id: str) -> dict:
         "content": post["content"],
         "images": post.get("images", []),
         "type": post["type"],
-        "skills": post.get("skills"),
+        "skills": format_skills(post.get("skills")),
         "likes_count": post.get("likes_count", 0),
         "comments_count": post.get("comments_count", 0),
         "is_liked": is_liked,
@@ -97,7 +121,10 @@ async def get_feed(
     """Obtener feed de posts de usuarios que sigues"""
     try:
         # Obtener usuario actual
-        current_user = await user_collection.find_one({"_id": ObjectId(current_user_id)})
+        current_user = await user_collection.find_one(
+            {"_id": ObjectId(current_user_id)},
+            {"following": 1}
+        )
         following_ids = current_user.get("following", [])
         
         # Incluir posts propios
@@ -125,17 +152,58 @@ async def get_feed(
             if formatted:
                 formatted_posts.append(formatted)
         
-        logger.info(f"📰 Feed cargado: {len(formatted_posts)} posts para usuario {current_user_id}")
+        logger.info("📰 Feed cargado: %d posts", len(formatted_posts), extra={"posts": len(formatted_posts)})
         
-        return formatted_posts
+        return fast_response(formatted_posts, List[PostResponse])
         
     except Exception as e:
-        logger.error(f"❌ Error cargando feed: {str(e)}")
+        logger.error("❌ Error cargando feed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error: {str(e)}"
         )
 
+async def compute_explore_page(limit: int, before_id: str) -> list:
+    """
+    Página de explore sin datos del usuario actual (se comparte vía cache).
+    Cada post guarda en `_likers` los ids que le dieron like.
+    """
+    # Query con paginación
+    query = {}
+    
+    if before_id:
+        try:
+            query["_id"] = {"$lt": ObjectId(before_id)}
+        except:
+            pass
+    
+    # Obtener posts ordenados por engagement y fecha
+    posts = await post_collection.find(query)\
+        .sort([("likes_count", -1), ("created_at", -1)])\
+        .limit(limit)\
+        .to_list(length=limit)
+    
+    # Cargar todos los autores de una vez
+    author_ids = list({post["user_id"] for post in posts})
+    authors = await user_collection.find(
+        {"_id": {"$in": author_ids}}, POST_USER_PROJECTION
+    ).to_list(length=len(author_ids))
+    author_map = {author["_id"]: author for author in authors}
+    
+    page = []
+    for post in posts:
+        author = author_map.get(post["user_id"])
+        if not author:
+            continue
+        formatted = await format_post(post, None, author)
+        formatted.pop("is_liked")
+        formatted["_likers"] = frozenset(post.get("likes", []))
+        page.append(formatted)
+    
+    logger.info("🔍 Explore recalculado: %d posts", len(page))
+    
+    return page
+
 @router.get("/explore", response_model=List[PostResponse])
 async def get_explore(
     current_user_id: str = Depends(auth_required_depends),
@@ -144,34 +212,24 @@ async def get_explore(
 ):
     """Obtener posts de exploración (todos los posts públicos)"""
     try:
-        # Query con paginación
-        query = {}
-        
-        if before_id:
-            try:
-                query["_id"] = {"$lt": ObjectId(before_id)}
-            except:
-                pass
-        
-        # Obtener posts ordenados por engagement y fecha
-        posts = await post_collection.find(query)\
-            .sort([("likes_count", -1), ("created_at", -1)])\
-            .limit(limit)\
-            .to_list(length=limit)
-        
-        # Formatear posts
-        formatted_posts = []
-        for post in posts:
-            formatted = await format_post(post, current_user_id)
-            if formatted:
-                formatted_posts.append(formatted)
+        page = await explore_posts_cache.get(
+            (limit, before_id), lambda: compute_explore_page(limit, before_id)
+        )
         
-        logger.info(f"🔍 Explore cargado: {len(formatted_posts)} posts")
+        # Aplicar is_liked del usuario actual sobre la página compartida
+        current_user_obj_id = ObjectId(current_user_id)
+        formatted_posts = [
+            {
+                **{key: value for key, value in post.items() if key != "_likers"},
+                "is_liked": current_user_obj_id in post["_likers"]
+            }
+            for post in page
+        ]
         
-        return formatted_posts
+        return fast_response(formatted_posts, List[PostResponse])
         
     except Exception as e:
-        logger.error(f"❌ Error cargando explore: {str(e)}")
+        logger.error("❌ Error cargando explore: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error: {str(e)}"
@@ -218,7 +276,7 @@ async def get_user_posts(
         
         logger.info(f"👤 Posts de {username}: {len(formatted_posts)} posts")
         
-        return formatted_posts
+        return fast_response(formatted_posts, List[PostResponse])
         
     except HTTPException as e:
         raise e
@@ -232,95 +290,93 @@ async def get_user_posts(
 @router.post("/{post_id}/like", response_model=LikeResponse)
 async def toggle_like(
     post_id: str,
-    current_user_id: str = Depends(auth_required_depends)
+    current_user_id: str = Depends(auth_required_depends),
+    current_user: dict = Depends(current_user_context)
 ):
     """Dar o quitar like a un post"""
     try:
-        # Buscar post
-        post = await post_collection.find_one({"_id": ObjectId(post_id)})
+        post_obj_id = ObjectId(post_id)
+        user_obj_id = ObjectId(current_user_id)
+        
+        # Toggle atómico: dos requests simultáneos no pueden dar el mismo like dos veces,
+        # y no se lee el array de likes del post. likes_count no va por shards: el
+        # array de likes ya obliga a escribir el post en cada like. likes_version
+        # identifica cada like/unlike para la llave de idempotencia del outbox
+        post = await post_collection.find_one_and_update(
+            {"_id": post_obj_id, "likes": {"$ne": user_obj_id}},
+            {"$push": {"likes": user_obj_id}, "$inc": {"likes_count": 1, "likes_version": 1}},
+            projection={"user_id": 1, "likes_count": 1, "likes_version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        is_liked = post is not None
+        
+        if not is_liked:
+            # Ya tenía like: quitarlo
+            post = await post_collection.find_one_and_update(
+                {"_id": post_obj_id, "likes": user_obj_id},
+                {"$pull": {"likes": user_obj_id}, "$inc": {"likes_count": -1, "likes_version": 1}},
+                projection={"user_id": 1, "likes_count": 1, "likes_version": 1},
+                return_document=ReturnDocument.AFTER
+            )
         
         if not post:
             raise HTTPException(status_code=404, detail="Post no encontrado")
         
-        user_obj_id = ObjectId(current_user_id)
-        likes = post.get("likes", [])
-        
-        # Toggle like
-        if user_obj_id in likes:
-            # Quitar like
-            await post_collection.update_one(
-                {"_id": ObjectId(post_id)},
-                {
-                    "$pull": {"likes": user_obj_id},
-                    "$inc": {"likes_count": -1}
-                }
-            )
-            
-            # Eliminar notificación
-            await notification_collection.delete_many({
+        # Contador en vivo para quien tenga el post en pantalla
+        post_subscriptions.touch(post_obj_id)
+        
+        if not is_liked:
+            # Eliminar notificación (fuera del request)
+            await outbox.enqueue("unnotify", {
                 "to_user": post["user_id"],
                 "from_user": user_obj_id,
                 "type": "like",
-                "post_id": ObjectId(post_id)
-            })
+                "post_id": post_obj_id
+            }, key=f"unlike:{post_id}:{current_user_id}:{post['likes_version']}")
             
-            logger.info(f"💔 Like removido del post {post_id}")
+            logger.info("💔 Like removido del post %s", post_id, extra={"post_id": post_id})
             
             return {
                 "message": "Like removido",
                 "is_liked": False,
-                "likes_count": post.get("likes_count", 1) - 1
+                "likes_count": max(0, post.get("likes_count", 0))
             }
-        else:
-            # Dar like
-            await post_collection.update_one(
-                {"_id": ObjectId(post_id)},
-                {
-                    "$push": {"likes": user_obj_id},
-                    "$inc": {"likes_count": 1}
-                }
-            )
-            
-            # Crear notificación solo si no es tu propio post
-            if str(post["user_id"]) != current_user_id:
-                current_user = await user_collection.find_one({"_id": user_obj_id})
-                
-                await notification_collection.insert_one({
+        
+        # Notificación y push solo si no es tu propio post (fuera del request)
+        if str(post["user_id"]) != current_user_id:
+            await outbox.enqueue("notify", {
+                "notification": {
                     "to_user": post["user_id"],
                     "from_user": user_obj_id,
                     "type": "like",
-                    "post_id": ObjectId(post_id),
+                    "post_id": post_obj_id,
                     "message": f"{current_user['username']} le dio like a tu publicación",
-                    "created_at": datetime.utcnow(),
-                    "read": False
-                })
-                
-                # Enviar push notification
-                post_owner = await user_collection.find_one({"_id": post["user_id"]})
-                if post_owner.get("expo_push_token"):
-                    await send_push_notification(
-                        token=post_owner["expo_push_token"],
-                        title="¡Nuevo like!",
-                        body=f"{current_user['username']} le dio like a tu publicación",
-                        data={
-                            "type": "like",
-                            "post_id": post_id,
-                            "from_user": current_user_id
-                        }
-                    )
-            
-            logger.info(f"❤️ Like agregado al post {post_id}")
-            
-            return {
-                "message": "Like agregado",
-                "is_liked": True,
-                "likes_count": post.get("likes_count", 0) + 1
-            }
+                    "created_at": datetime.utcnow()
+                },
+                "actor": notification_actor(current_user),
+                "push": {
+                    "title": "¡Nuevo like!",
+                    "body": f"{current_user['username']} le dio like a tu publicación",
+                    "data": {
+                        "type": "like",
+                        "post_id": post_id,
+                        "from_user": current_user_id
+                    }
+                }
+            }, key=f"like:{post_id}:{current_user_id}:{post['likes_version']}")
+        
+        logger.info("❤️ Like agregado al post %s", post_id, extra={"post_id": post_id})
+        
+        return {
+            "message": "Like agregado",
+            "is_liked": True,
+            "likes_count": post.get("likes_count", 1)
+        }
         
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.error(f"❌ Error toggle like: {str(e)}")
+        logger.error("❌ Error toggle like: %s", e, extra={"post_id": post_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error: {str(e)}"
@@ -349,8 +405,8 @@ async def delete_post(
         # Eliminar post
         await post_collection.delete_one({"_id": ObjectId(post_id)})
         
-        # Eliminar notificaciones asociadas
-        await notification_collection.delete_many({"post_id": ObjectId(post_id)})
+        # Eliminar notificaciones asociadas (todas son del dueño del post)
+        await delete_notifications(post["user_id"], {"post_id": ObjectId(post_id)})
         
         # Eliminar comentarios asociados (cuando implementemos comentarios)
         from app.database import comment_collection
@@ -424,24 +480,42 @@ async def update_post(
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post_by_id(
     post_id: str,
+    request: Request,
+    response: Response,
     current_user_id: str = Depends(auth_required_depends)
 ):
     """Obtener un post específico por ID"""
     try:
-        # Buscar post
-        post = await post_collection.find_one({"_id": ObjectId(post_id)})
+        # Buscar post (sin el array de likes, solo si el usuario actual está en él)
+        post = await post_collection.find_one(
+            {"_id": ObjectId(post_id)},
+            {"likes": {"$elemMatch": {"$eq": ObjectId(current_user_id)}}, "user_id": 1, "content": 1,
+             "images": 1, "type": 1, "skills": 1, "likes_count": 1, "comments_count": 1,
+             "created_at": 1, "updated_at": 1}
+        )
         
         if not post:
             raise HTTPException(status_code=404, detail="Post no encontrado")
         
-        # Formatear y retornar
-        formatted_post = await format_post(post, current_user_id)
+        user = await user_collection.find_one({"_id": post["user_id"]}, POST_USER_PROJECTION)
         
-        if not formatted_post:
+        if not user:
             raise HTTPException(status_code=404, detail="Error al formatear post")
         
+        # ETag: updated_at cubre ediciones; contadores, like y autor cambian aparte
+        etag = make_etag(
+            post["_id"], post["updated_at"], post.get("likes_count", 0),
+            post.get("comments_count", 0), bool(post.get("likes")), user
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag, CACHE_PRIVATE_REVALIDATE)
+        
+        # Formatear y retornar
+        formatted_post = await format_post(post, current_user_id, user)
+        
         logger.info(f"📄 Post obtenido: {post_id}")
         
+        set_cache_headers(response, etag, CACHE_PRIVATE_REVALIDATE)
         return formatted_post
         
     except HTTPException as e:
@@ -0,0 +1,105 @@
+# app/routes/recommendationRoute.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.schemas.recommendations.recommendationSchema import SkillMatchesResponse, PeopleSuggestionsResponse
+from app.utils.user_context import current_user_context
+from app.utils.skill_matcher import skill_matcher
+from app.utils.follow_graph import follow_graph
+from app.utils.fast_json import fast_response
+from app.database import user_collection
+from bson import ObjectId
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
+
+# Campos públicos del usuario recomendado
+MATCH_USER_PROJECTION = {"username": 1, "first_name": 1, "last_name": 1, "profile_image": 1}
+
+@router.get("/skills", response_model=SkillMatchesResponse)
+async def get_skill_matches(
+    limit: int = Query(20, ge=1, le=50),
+    current_user: dict = Depends(current_user_context)
+):
+    """
+    Usuarios con habilidades complementarias: ofrecen lo que busco y buscan
+    lo que ofrezco. Los intercambios en ambos sentidos van primero.
+    """
+    if not skill_matcher.ready:
+        raise HTTPException(status_code=503, detail="Las recomendaciones se están preparando, intenta en unos segundos")
+
+    # Se piden de más por si alguno ya no existe
+    matches = skill_matcher.top_matches(
+        str(current_user["_id"]),
+        current_user.get("interests_offered", []),
+        current_user.get("interests_wanted", []),
+        limit=limit + 5
+    )
+
+    users = {}
+    if matches:
+        async for user in user_collection.find(
+            {"_id": {"$in": [ObjectId(match["user_id"]) for match in matches]}}, MATCH_USER_PROJECTION
+        ):
+            users[str(user["_id"])] = user
+
+    recommendations = []
+    for match in matches:
+        user = users.get(match["user_id"])
+        if not user:
+            continue
+        recommendations.append({
+            "id": match["user_id"],
+            "username": user["username"],
+            "first_name": user.get("first_name", ""),
+            "last_name": user.get("last_name", ""),
+            "profile_image": user.get("profile_image", ""),
+            "score": match["score"],
+            "they_offer": match["they_offer"],
+            "they_want": match["they_want"],
+            "reciprocal": bool(match["they_offer"] and match["they_want"])
+        })
+        if len(recommendations) == limit:
+            break
+
+    return fast_response({"recommendations": recommendations, "count": len(recommendations)}, SkillMatchesResponse)
+
+@router.get("/people", response_model=PeopleSuggestionsResponse)
+async def get_people_you_may_know(
+    limit: int = Query(20, ge=1, le=50),
+    current_user: dict = Depends(current_user_context)
+):
+    """
+    Personas que quizás conozcas: usuarios seguidos por quienes sigo y a los
+    que aún no sigo, ordenados por cantidad de amigos en común.
+    """
+    if not follow_graph.ready:
+        raise HTTPException(status_code=503, detail="Las sugerencias se están preparando, intenta en unos segundos")
+
+    # Se piden de más por si alguno ya no existe
+    candidates = follow_graph.suggestions(str(current_user["_id"]), limit + 5)
+
+    users = {}
+    if candidates:
+        async for user in user_collection.find(
+            {"_id": {"$in": [ObjectId(user_id) for user_id, _ in candidates]}}, MATCH_USER_PROJECTION
+        ):
+            users[str(user["_id"])] = user
+
+    suggestions = []
+    for user_id, mutual_count in candidates:
+        user = users.get(user_id)
+        if not user:
+            continue
+        suggestions.append({
+            "id": user_id,
+            "username": user["username"],
+            "first_name": user.get("first_name", ""),
+            "last_name": user.get("last_name", ""),
+            "profile_image": user.get("profile_image", ""),
+            "mutual_count": mutual_count
+        })
+        if len(suggestions) == limit:
+            break
+
+    return fast_response({"suggestions": suggestions, "count": len(suggestions)}, PeopleSuggestionsResponse)
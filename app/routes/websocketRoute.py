@@ -1,16 +1,75 @@
 # app/routes/websocketRoute.py
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, HTTPException
+from pydantic import ValidationError
+from app.utils.presence import presence
+from app.utils.post_subscriptions import post_subscriptions
 from app.utils.websocket_manager import manager
+from app.utils.ws_codec import negotiate, receive_frame, FrameTooLarge, CLOSE_TOO_BIG
 from app.utils.authUtils import verify_access_token
-from app.database import user_collection
-from bson import ObjectId
-import json
+from app.utils.user_context import get_user_context
+from app.utils.ws_replay import parse_since, replay_missed
+from app.utils.messaging import send_direct_message
+from app.schemas.messages.messageSchema import SendMessageRequest
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+
+async def handle_send_message(websocket: WebSocket, user: dict, message: dict):
+    """
+    Frame `send_message`: {"type": "send_message", "client_id", "recipient_username", "content"}.
+    Responde `message_ack` con el id asignado, o `message_error`; ambos llevan
+    el client_id para que el cliente empareje la respuesta con su mensaje.
+    """
+    client_id = message.get("client_id")
+    try:
+        data = SendMessageRequest(
+            recipient_username=message.get("recipient_username"),
+            content=message.get("content"),
+            client_id=client_id
+        )
+        sent = await send_direct_message(user, data.recipient_username, data.content, data.client_id)
+    except ValidationError:
+        await manager.send(websocket, {
+            "type": "message_error",
+            "data": {"client_id": client_id, "status": 422, "detail": "Datos inválidos"}
+        })
+        return
+    except HTTPException as e:
+        await manager.send(websocket, {
+            "type": "message_error",
+            "data": {"client_id": client_id, "status": e.status_code, "detail": e.detail}
+        })
+        return
+    except Exception as e:
+        logger.exception("❌ Error enviando mensaje por WebSocket: %s", e)
+        await manager.send(websocket, {
+            "type": "message_error",
+            "data": {"client_id": client_id, "status": 500, "detail": "Error interno"}
+        })
+        return
+
+    await manager.send(websocket, {
+        "type": "message_ack",
+        "data": {
+            "client_id": client_id,
+            "id": str(sent["message"]["_id"]),
+            "conversation_id": str(sent["conversation_id"]),
+            "created_at": sent["message"]["created_at"].isoformat(),
+            "is_new_conversation": sent["is_new_conversation"],
+            "duplicate": sent["duplicate"]
+        }
+    })
+
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
-    """WebSocket endpoint para mensajes en tiempo real"""
+async def websocket_endpoint(websocket: WebSocket, token: str = Query(...), since: str = Query(None)):
+    """
+    WebSocket endpoint para mensajes en tiempo real.
+    Con `since` (epoch ms o ISO 8601) al reconectar se reenvía lo que llegó
+    mientras el socket estuvo caído.
+    """
     
     # Verificar token de autenticación
     payload = verify_access_token(token)
@@ -24,46 +83,67 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
         return
     
     # Verificar que el usuario existe
-    user = await user_collection.find_one({"_id": ObjectId(user_id)})
+    user = await get_user_context(user_id)
     if not user:
         await websocket.close(code=4001, reason="Usuario no encontrado")
         return
     
-    # Conectar usuario
-    await manager.connect(websocket, user_id)
+    # Conectar usuario (el socket queda sujeto al timeout de heartbeat)
+    await presence.connect(websocket, user_id, negotiate(websocket))
     
     try:
+        # Replay de lo perdido durante la desconexión
+        if since:
+            since_dt = parse_since(since)
+            if since_dt is None:
+                await manager.send(websocket, {"type": "error", "data": {"detail": "since inválido"}})
+            else:
+                try:
+                    await replay_missed(websocket, user_id, since_dt)
+                except WebSocketDisconnect:
+                    raise
+                except Exception as e:
+                    logger.warning("⚠️ Error en replay de %s: %s", user_id, e)
+                    await manager.send(websocket, {"type": "replay_failed"})
+        
         while True:
-            # Escuchar mensajes del cliente
-            data = await websocket.receive_text()
-            
+            # Escuchar mensajes del cliente (texto JSON o binario MessagePack)
             try:
-                message = json.loads(data)
-                message_type = message.get("type")
-                
-                if message_type == "ping":
-                    # Responder a ping para mantener conexión viva
-                    await websocket.send_text(json.dumps({"type": "pong"}))
-                
-                elif message_type == "typing":
-                    # Notificar que el usuario está escribiendo
-                    recipient_username = message.get("recipient_username")
-                    if recipient_username:
-                        recipient = await user_collection.find_one({"username": recipient_username})
-                        if recipient:
-                            typing_message = {
-                                "type": "user_typing",
-                                "data": {
-                                    "sender_username": user["username"],
-                                    "is_typing": message.get("is_typing", True)
-                                }
-                            }
-                            await manager.send_personal_message(typing_message, str(recipient["_id"]))
-                
-            except json.JSONDecodeError:
-                # Ignorar mensajes que no sean JSON válidos
-                pass
+                message = await receive_frame(websocket)
+            except ValueError:
+                # Ignorar frames que no se puedan decodificar
+                continue
+            except FrameTooLarge:
+                await websocket.close(code=CLOSE_TOO_BIG, reason="Frame demasiado grande")
+                break
+            presence.beat(websocket)
+            message_type = message.get("type")
+            
+            if message_type == "ping":
+                # Compatibilidad: el keepalive ahora es el ping del protocolo (uvicorn --ws-ping-interval)
+                await manager.send(websocket, {"type": "pong"})
+            
+            elif message_type == "send_message":
+                # Mensaje por el socket ya autenticado, con el contexto cacheado del usuario
+                await handle_send_message(websocket, user, message)
+            
+            elif message_type == "typing":
+                # Notificar que el usuario está escribiendo (limitado por destinatario)
+                recipient_username = message.get("recipient_username")
+                if recipient_username:
+                    await presence.typing(
+                        user_id, user["username"], recipient_username, bool(message.get("is_typing", True))
+                    )
+            
+            elif message_type == "subscribe_posts":
+                # Posts visibles en pantalla: reemplaza la suscripción anterior
+                post_ids = message.get("post_ids")
+                accepted = post_subscriptions.subscribe(websocket, post_ids if isinstance(post_ids, list) else [])
+                await manager.send(websocket, {"type": "posts_subscribed", "data": {"post_ids": accepted}})
                 
     except WebSocketDisconnect:
-        # Desconectar usuario
-        manager.disconnect(websocket, user_id)
\ No newline at end of file
+        pass
+    finally:
+        # Desconectar usuario (también si el socket se cerró por ping sin respuesta)
+        post_subscriptions.drop(websocket)
+        presence.disconnect(websocket, user_id)
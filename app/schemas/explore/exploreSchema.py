@@ -3,6 +3,11 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
+class RelatedSkill(BaseModel):
+    """Habilidad que suele aparecer junto a otra"""
+    skill_name: str
+    score: float  # Similitud coseno de co-ocurrencia (0 a 1)
+
 class SkillCategory(BaseModel):
     """Categoría de habilidad con estadísticas"""
     skill_name: str
@@ -10,6 +15,7 @@ class SkillCategory(BaseModel):
     posts_seeking: int
     total_posts: int
     preview_posts: List[dict] = []  # 3-4 posts de preview
+    related_skills: List[RelatedSkill] = []
 
 class ExploreResponse(BaseModel):
     """Respuesta del endpoint explore"""
@@ -23,6 +29,7 @@ class SkillDetailResponse(BaseModel):
     seeking_posts: List[dict]
     total_posts: int
     has_more: bool = False
+    related_skills: List[RelatedSkill] = []
 
 class SearchSkillRequest(BaseModel):
     """Request para búsqueda de habilidades"""
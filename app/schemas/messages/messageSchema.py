@@ -6,6 +6,8 @@ from datetime import datetime
 class SendMessageRequest(BaseModel):
     recipient_username: str = Field(..., min_length=3, max_length=30)
     content: str = Field(..., min_length=1, max_length=1000)
+    # Id generado por el cliente: reintentar con el mismo id no duplica el mensaje
+    client_id: Optional[str] = Field(None, min_length=1, max_length=64)
 
 class MessageUser(BaseModel):
     id: str
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class NotificationUser(BaseModel):
@@ -16,6 +16,10 @@ class NotificationResponse(BaseModel):
     created_at: datetime
     read: bool
     from_user: NotificationUser
+    # Notificaciones agrupadas: total de actores y los más recientes
+    actors_count: int = 1
+    actors: List[NotificationUser] = []
+    post_id: Optional[str] = None
     
 class PushTokenRequest(BaseModel):
     token: str
\ No newline at end of file
@@ -0,0 +1,34 @@
+# app/schemas/recommendations/recommendationSchema.py
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SkillMatch(BaseModel):
+    """Usuario recomendado para intercambiar habilidades"""
+    id: str
+    username: str
+    first_name: Optional[str] = ""
+    last_name: Optional[str] = ""
+    profile_image: Optional[str] = ""
+    score: int
+    they_offer: List[str]  # Habilidades que busco y el otro ofrece
+    they_want: List[str]   # Habilidades que ofrezco y el otro busca
+    reciprocal: bool       # Hay intercambio en ambos sentidos
+
+class SkillMatchesResponse(BaseModel):
+    """Respuesta de recomendaciones por habilidades"""
+    recommendations: List[SkillMatch]
+    count: int
+
+class PersonSuggestion(BaseModel):
+    """Usuario sugerido por amigos en común"""
+    id: str
+    username: str
+    first_name: Optional[str] = ""
+    last_name: Optional[str] = ""
+    profile_image: Optional[str] = ""
+    mutual_count: int  # Cuántos de mis seguidos lo siguen
+
+class PeopleSuggestionsResponse(BaseModel):
+    """Respuesta de personas que quizás conozcas"""
+    suggestions: List[PersonSuggestion]
+    count: int
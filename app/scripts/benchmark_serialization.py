@@ -0,0 +1,83 @@
+# benchmark_serialization.py
+# Compara el camino estándar de FastAPI (validar con response_model + json stdlib)
+# contra el camino rápido (datos pre-formateados + orjson) para una página del feed.
+#
+# Uso: python -m app.scripts.benchmark_serialization [--posts 50] [--runs 2000]
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+from bson import ObjectId
+from pydantic import TypeAdapter
+from app.schemas.posts.postSchema import PostResponse
+from app.schemas.authSchema import PREDEFINED_SKILLS
+from app.utils.fast_json import dumps
+
+def build_page(count: int) -> list:
+    """Página de posts con la misma forma que retorna format_post"""
+    now = datetime.utcnow()
+    posts = []
+    for i in range(count):
+        posts.append({
+            "id": str(ObjectId()),
+            "user": {
+                "id": str(ObjectId()),
+                "username": f"usuario_{i}",
+                "first_name": "Nombre",
+                "last_name": "Apellido",
+                "profile_image": "https://firebasestorage.googleapis.com/v0/b/skillswap/o/avatars%2Fdefault.png"
+            },
+            "content": "Ofrezco clases a cambio de aprender algo nuevo. " * 4,
+            "images": [f"https://firebasestorage.googleapis.com/v0/b/skillswap/o/posts%2F{i}.jpg"],
+            "type": "skill_offer",
+            "skills": {
+                "offering": PREDEFINED_SKILLS[i % 50:i % 50 + 3],
+                "seeking": PREDEFINED_SKILLS[(i + 7) % 50:(i + 7) % 50 + 2]
+            },
+            "likes_count": i * 3,
+            "comments_count": i,
+            "is_liked": i % 2 == 0,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i)
+        })
+    return posts
+
+def standard_path(adapter: TypeAdapter, page: list) -> bytes:
+    """Lo que hace FastAPI con response_model: validar, serializar y json.dumps"""
+    validated = adapter.validate_python(page)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def fast_path(page: list) -> bytes:
+    return dumps(page)
+
+def measure(func, runs: int) -> float:
+    started = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - started) / runs * 1_000_000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialización de respuestas")
+    parser.add_argument("--posts", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    page = build_page(args.posts)
+    adapter = TypeAdapter(List[PostResponse])
+
+    # Ambos caminos deben producir el mismo JSON
+    assert json.loads(standard_path(adapter, page)) == json.loads(fast_path(page))
+
+    standard_us = measure(lambda: standard_path(adapter, page), args.runs)
+    fast_us = measure(lambda: fast_path(page), args.runs)
+
+    print(f"📊 Página de {args.posts} posts, {args.runs} corridas")
+    print(f"   - response_model + json: {standard_us:8.1f} µs/respuesta")
+    print(f"   - pre-formateado + orjson: {fast_us:8.1f} µs/respuesta")
+    print(f"   - Aceleración: {standard_us / fast_us:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmark_skill_matcher.py
+# Mide el índice de recomendaciones por habilidades con usuarios sintéticos,
+# sin Mongo: carga, consultas top-K (p50/p95/p99), cambios de perfil y compactación.
+#
+# Uso: python -m app.scripts.benchmark_skill_matcher [--users 1000000] [--queries 2000] [--top 20]
+
+import argparse
+import os
+import time
+import numpy as np
+from bson import ObjectId
+
+# La app lee la configuración al importar
+os.environ.setdefault("DB_NAME", "skillswap_bench")
+
+from app.utils.skill_matcher import SkillMatcher, _SkillIndex, NUM_SKILLS, mask_to_skills
+
+
+def random_masks(rng: np.random.Generator, count: int, max_skills: int) -> np.ndarray:
+    """Bitsets con popularidad sesgada: unas pocas habilidades concentran a la mayoría"""
+    popularity = 1.0 / np.arange(1, NUM_SKILLS + 1) ** 0.8
+    popularity /= popularity.sum()
+    masks = np.zeros(count, dtype=np.uint64)
+    sizes = rng.integers(1, max_skills + 1, size=count)
+    for picks in range(1, max_skills + 1):
+        rows = np.flatnonzero(sizes >= picks)
+        skills = rng.choice(NUM_SKILLS, size=len(rows), p=popularity)
+        masks[rows] |= np.left_shift(np.uint64(1), skills.astype(np.uint64))
+    return masks
+
+
+def percentile(samples: list, pct: float) -> float:
+    return float(np.percentile(samples, pct)) if samples else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice de habilidades")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    started = time.perf_counter()
+    offered = random_masks(rng, args.users, 5)
+    wanted = random_masks(rng, args.users, 3)
+    keys = [ObjectId().binary for _ in range(args.users)]
+    print(f"🧪 {args.users:,} usuarios sintéticos en {time.perf_counter() - started:.1f}s")
+
+    matcher = SkillMatcher()
+    started = time.perf_counter()
+    index = _SkillIndex(capacity=args.users)
+    index.bulk_load(keys, offered.tolist(), wanted.tolist())
+    matcher.index = index
+    matcher.ready = True
+    print(f"📦 Carga + índice invertido: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # Consultas desde usuarios al azar
+    latencies, full_scans = [], 0
+    for row in rng.integers(0, args.users, size=args.queries):
+        my_offered, my_wanted = mask_to_skills(int(offered[row])), mask_to_skills(int(wanted[row]))
+        user_id = str(ObjectId(keys[row]))
+        if index.candidates(int(offered[row]), int(wanted[row])) is None:
+            full_scans += 1
+        started = time.perf_counter()
+        matcher.top_matches(user_id, my_offered, my_wanted, limit=args.top)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    print(f"🔎 top-{args.top} ({args.queries} consultas, {full_scans} recorriendo todo el arreglo):")
+    print(f"   p50={percentile(latencies, 50):.2f} ms  p95={percentile(latencies, 95):.2f} ms  p99={percentile(latencies, 99):.2f} ms")
+
+    # Cambios de perfil incrementales
+    changes = [
+        (str(ObjectId(keys[row])), mask_to_skills(int(mask)))
+        for row, mask in zip(rng.integers(0, args.users, size=args.updates), random_masks(rng, args.updates, 5))
+    ]
+    started = time.perf_counter()
+    for user_id, skills in changes:
+        matcher.update(user_id, skills, None)
+    elapsed = time.perf_counter() - started
+    print(f"✏️  {args.updates:,} cambios de perfil: {elapsed / args.updates * 1e6:.1f} µs c/u")
+
+    started = time.perf_counter()
+    index.compact()
+    print(f"🧹 Compactación del índice invertido: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
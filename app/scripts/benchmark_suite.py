@@ -0,0 +1,468 @@
+# benchmark_suite.py
+# Benchmark offline del backend completo contra un mongod local.
+#
+# 1. Siembra una base de datos sintética (usuarios con seguidores en ley de
+#    potencia, posts con skills de PREDEFINED_SKILLS, likes, comentarios,
+#    conversaciones y notificaciones).
+# 2. Ejecuta la app ASGI real en el mismo proceso (httpx + ASGITransport)
+#    contra los endpoints principales.
+# 3. Reporta latencia p50/p95/p99, throughput y round trips a Mongo por
+#    endpoint, y guarda el resultado en JSON para comparar corridas.
+#
+# Uso:
+#   python -m app.scripts.benchmark_suite --seed-data --users 2000
+#   python -m app.scripts.benchmark_suite --requests 500 --concurrency 20
+#   python -m app.scripts.benchmark_suite --compare benchmark_results/anterior.json
+#
+# ⚠️ La siembra BORRA las colecciones de la base indicada; por seguridad el
+# nombre de la base debe contener "bench".
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark offline de la API con datos sintéticos")
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=os.getenv("BENCH_DB_NAME", "skillswap_bench"))
+    parser.add_argument("--seed-data", action="store_true", help="Borrar y volver a sembrar la base")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla para datos y tráfico reproducibles")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--posts-per-user", type=float, default=5.0)
+    parser.add_argument("--min-followers", type=int, default=3)
+    parser.add_argument("--power-law-alpha", type=float, default=1.5)
+    parser.add_argument("--conversations", type=int, default=3000)
+    parser.add_argument("--messages-per-conversation", type=int, default=15)
+    parser.add_argument("--requests", type=int, default=300, help="Requests medidos por endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="Requests de calentamiento por endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", nargs="*", help="Ejecutar solo estos escenarios")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto benchmark_results/<fecha>.json)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para mostrar diferencias")
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+
+# La app lee la configuración al importarse: apuntarla a la base de benchmark
+os.environ["MONGO_URI"] = ARGS.mongo_uri
+os.environ["DB_NAME"] = ARGS.db_name
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOOP_MONITOR_ENABLED", "false")
+
+from pymongo import MongoClient, monitoring
+
+
+# True mientras se atiende un request medido. Motor copia el contexto al
+# ejecutar cada operación, así que el listener ve el valor de quien la lanzó;
+# los pollers en segundo plano (outbox, contadores, presencia, recargas de
+# grafos y matrices, revocaciones) se crearon fuera de un request y no cuentan.
+in_request = contextvars.ContextVar("in_request", default=False)
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Cuenta los comandos enviados a Mongo (round trips) por los requests, por colección"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0
+        self.by_collection = Counter()
+
+    def started(self, event):
+        if not in_request.get():
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = "-"
+        with self.lock:
+            self.total += 1
+            self.by_collection[f"{event.command_name}:{collection}"] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        with self.lock:
+            self.total = 0
+            self.by_collection = Counter()
+
+
+# Debe registrarse antes de que app.database cree el cliente de Motor
+command_counter = CommandCounter()
+monitoring.register(command_counter)
+
+import httpx
+from bson import ObjectId
+from app.main import app
+from app.schemas.authSchema import PREDEFINED_SKILLS
+from app.utils.authUtils import create_access_token
+from app.utils.securityUtils import hash_password
+
+POST_TYPES = ["skill_offer", "skill_request", "general"]
+WORDS = ("aprender enseñar clases intercambio guitarra código diseño idiomas cocina "
+         "fotografía práctica proyecto tiempo ayuda comunidad").split()
+
+
+# ============================================
+# SIEMBRA DE DATOS
+# ============================================
+
+def power_law(rng: random.Random, minimum: int, alpha: float, cap: int) -> int:
+    return min(cap, int(minimum * rng.paretovariate(alpha)))
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def seed_database(args):
+    if "bench" not in args.db_name:
+        sys.exit(f"❌ La base '{args.db_name}' no parece de benchmark (debe contener 'bench')")
+
+    rng = random.Random(args.seed)
+    db = MongoClient(args.mongo_uri)[args.db_name]
+    for name in ("users", "posts", "comments", "conversations", "messages", "notifications", "search_history"):
+        db[name].drop()
+
+    now = datetime.utcnow()
+    n = args.users
+    user_ids = [ObjectId() for _ in range(n)]
+    password = hash_password("benchmark123")
+
+    # Seguidores en ley de potencia: pocos usuarios concentran la mayoría
+    followers = [set() for _ in range(n)]
+    following = [set() for _ in range(n)]
+    for target in range(n):
+        for follower in rng.sample(range(n), power_law(rng, args.min_followers, args.power_law_alpha, n - 1)):
+            if follower != target:
+                followers[target].add(user_ids[follower])
+                following[follower].add(user_ids[target])
+
+    users = []
+    for i, user_id in enumerate(user_ids):
+        users.append({
+            "_id": user_id,
+            "username": f"bench_user_{i}",
+            "email": f"bench_user_{i}@example.com",
+            "password": password,
+            "first_name": f"Nombre{i}",
+            "last_name": f"Apellido{i}",
+            "birth_date": datetime(1995, 1, 1),
+            "gender": rng.choice(["masculino", "femenino", "otro"]),
+            "about_me": sentence(rng, 12),
+            "interests_offered": rng.sample(PREDEFINED_SKILLS, rng.randint(1, 5)),
+            "interests_wanted": rng.sample(PREDEFINED_SKILLS, rng.randint(1, 5)),
+            "profile_image": "https://example.com/avatar.png",
+            "followers": list(followers[i]),
+            "following": list(following[i]),
+            "created_at": now - timedelta(days=rng.randint(1, 365)),
+            "last_login": now - timedelta(hours=rng.randint(0, 72))
+        })
+    db.users.insert_many(users)
+
+    # Los usuarios con más seguidores también son más activos
+    weights = [1 + len(followers[i]) for i in range(n)]
+    posts, comments, notifications = [], [], []
+    for _ in range(int(n * args.posts_per_user)):
+        author = rng.choices(range(n), weights)[0]
+        post_type = rng.choice(POST_TYPES)
+        likers = {user_ids[i] for i in rng.choices(range(n), weights, k=power_law(rng, 1, 1.2, n // 4))}
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        post = {
+            "_id": ObjectId(),
+            "user_id": user_ids[author],
+            "content": sentence(rng, rng.randint(5, 40)),
+            "images": [],
+            "type": post_type,
+            "skills": {
+                "offering": rng.sample(PREDEFINED_SKILLS, rng.randint(1, 3)),
+                "seeking": rng.sample(PREDEFINED_SKILLS, rng.randint(0, 2))
+            } if post_type != "general" else None,
+            "likes": list(likers),
+            "likes_count": len(likers),
+            "comments_count": 0,
+            "created_at": created_at,
+            "updated_at": created_at
+        }
+
+        for _ in range(rng.randint(0, 4)):
+            commenter = user_ids[rng.randrange(n)]
+            comments.append({
+                "_id": ObjectId(),
+                "post_id": post["_id"],
+                "user_id": commenter,
+                "content": sentence(rng, rng.randint(3, 15)),
+                "created_at": created_at + timedelta(minutes=rng.randint(1, 600))
+            })
+            post["comments_count"] += 1
+            notifications.append({
+                "to_user": post["user_id"], "from_user": commenter, "type": "comment",
+                "post_id": post["_id"], "comment_id": comments[-1]["_id"],
+                "message": "Comentó tu publicación", "created_at": comments[-1]["created_at"],
+                "read": rng.random() < 0.7
+            })
+
+        for liker in list(likers)[:10]:
+            notifications.append({
+                "to_user": post["user_id"], "from_user": liker, "type": "like",
+                "post_id": post["_id"], "message": "Le dio like a tu publicación",
+                "created_at": created_at + timedelta(minutes=rng.randint(1, 600)),
+                "read": rng.random() < 0.7
+            })
+        posts.append(post)
+
+    db.posts.insert_many(posts)
+    if comments:
+        db.comments.insert_many(comments)
+
+    conversations, messages = [], []
+    pairs = set()
+    while len(pairs) < min(args.conversations, n * (n - 1) // 2):
+        a, b = rng.sample(range(n), 2)
+        pairs.add((min(a, b), max(a, b)))
+    for a, b in pairs:
+        conversation_id = ObjectId()
+        started = now - timedelta(days=rng.randint(0, 60))
+        last = started
+        for j in range(rng.randint(1, args.messages_per_conversation * 2)):
+            last = started + timedelta(minutes=j * rng.randint(1, 30))
+            messages.append({
+                "conversation_id": conversation_id,
+                "sender_id": user_ids[rng.choice((a, b))],
+                "content": sentence(rng, rng.randint(2, 20)),
+                "created_at": last,
+                "is_read": rng.random() < 0.8
+            })
+        conversations.append({
+            "_id": conversation_id,
+            "participants": [user_ids[a], user_ids[b]],
+            "created_at": started,
+            "updated_at": last
+        })
+
+    if conversations:
+        db.conversations.insert_many(conversations)
+        db.messages.insert_many(messages)
+    if notifications:
+        db.notifications.insert_many(notifications)
+
+    # Contador de no leídas como lo tendría cada usuario en producción
+    unread = Counter(notif["to_user"] for notif in notifications if not notif["read"])
+    db.users.update_many({}, {"$set": {"unread_notifications": 0}})
+    for user_id, count in unread.items():
+        db.users.update_one({"_id": user_id}, {"$set": {"unread_notifications": count}})
+
+    print(f"🌱 Base '{args.db_name}' sembrada: {len(users)} usuarios, {len(posts)} posts, "
+          f"{len(comments)} comentarios, {len(conversations)} conversaciones, "
+          f"{len(messages)} mensajes, {len(notifications)} notificaciones")
+
+
+# ============================================
+# ESCENARIOS
+# ============================================
+
+class Dataset:
+    """Identificadores reales de la base para armar requests válidos"""
+
+    def __init__(self, args):
+        db = MongoClient(args.mongo_uri)[args.db_name]
+        users = list(db.users.find({}, {"username": 1}))
+        if not users:
+            sys.exit("❌ La base está vacía; ejecuta con --seed-data primero")
+
+        self.rng = random.Random(args.seed)
+        self.users = [(str(user["_id"]), user["username"]) for user in users]
+        self.post_ids = [str(post["_id"]) for post in db.posts.find({}, {"_id": 1})]
+        self.tokens = {}
+
+    def random_user(self):
+        return self.rng.choice(self.users)
+
+    def headers(self, user_id: str) -> dict:
+        token = self.tokens.get(user_id)
+        if token is None:
+            token = self.tokens[user_id] = create_access_token({"sub": user_id})
+        return {"Authorization": f"Bearer {token}"}
+
+
+def build_scenarios(data: Dataset) -> dict:
+    """Cada escenario retorna (método, ruta, kwargs de httpx) para un request"""
+
+    def authed(method, path, **kwargs):
+        user_id, _ = data.random_user()
+        return method, path, {"headers": data.headers(user_id), **kwargs}
+
+    def send_message():
+        user_id, username = data.random_user()
+        _, recipient = data.random_user()
+        while recipient == username:
+            _, recipient = data.random_user()
+        return "POST", "/messages/send", {
+            "headers": data.headers(user_id),
+            "json": {"recipient_username": recipient, "content": "Hola, ¿intercambiamos clases?"}
+        }
+
+    return {
+        "feed": lambda: authed("GET", "/posts/feed"),
+        "explore_categories": lambda: authed("GET", "/explore/categories"),
+        "inbox": lambda: authed("GET", "/messages/conversations"),
+        "search": lambda: authed("GET", "/search/users", params={"query": f"user_{data.rng.randint(1, 99)}"}),
+        "followers": lambda: authed(
+            "GET", f"/navigation/profileTab/profileScreen/{data.random_user()[1]}/followers"
+        ),
+        "like_toggle": lambda: authed("POST", f"/posts/{data.rng.choice(data.post_ids)}/like"),
+        "send_message": send_message,
+    }
+
+
+# ============================================
+# EJECUCIÓN Y REPORTE
+# ============================================
+
+def counted(asgi_app):
+    """Middleware ASGI que marca el contexto del request para CommandCounter"""
+
+    async def wrapper(scope, receive, send):
+        if scope["type"] != "http":
+            return await asgi_app(scope, receive, send)
+        token = in_request.set(True)
+        try:
+            await asgi_app(scope, receive, send)
+        finally:
+            in_request.reset(token)
+
+    return wrapper
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+async def run_scenario(client: httpx.AsyncClient, make_request, total: int, concurrency: int):
+    latencies, statuses = [], Counter()
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            method, path, kwargs = make_request()
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+async def run_benchmark(args, data: Dataset) -> dict:
+    scenarios = build_scenarios(data)
+    if args.only:
+        scenarios = {name: scenarios[name] for name in args.only}
+
+    results = {}
+    transport = httpx.ASGITransport(app=counted(app))
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for name, make_request in scenarios.items():
+                await run_scenario(client, make_request, args.warmup, args.concurrency)
+
+                command_counter.reset()
+                latencies, statuses, elapsed = await run_scenario(
+                    client, make_request, args.requests, args.concurrency
+                )
+                latencies.sort()
+
+                results[name] = {
+                    "requests": len(latencies),
+                    "errors": sum(count for code, count in statuses.items() if code >= 400),
+                    "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+                    "p50_ms": round(percentile(latencies, 50), 2),
+                    "p95_ms": round(percentile(latencies, 95), 2),
+                    "p99_ms": round(percentile(latencies, 99), 2),
+                    "mean_ms": round(statistics.fmean(latencies), 2),
+                    "throughput_rps": round(len(latencies) / elapsed, 1),
+                    "mongo_ops_per_request": round(command_counter.total / len(latencies), 2),
+                    "mongo_ops": dict(command_counter.by_collection.most_common())
+                }
+                print_row(name, results[name])
+
+    return results
+
+def print_header():
+    print(f"{'Escenario':<20} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'mongo/req':>10} {'errores':>8}")
+    print("-" * 76)
+
+def print_row(name: str, row: dict):
+    print(f"{name:<20} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+          f"{row['throughput_rps']:>8.1f} {row['mongo_ops_per_request']:>10.2f} {row['errors']:>8}")
+
+def print_comparison(current: dict, previous_path: str):
+    with open(previous_path, encoding="utf-8") as file:
+        previous = json.load(file)["results"]
+
+    def delta(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\n📈 Comparación contra {previous_path}")
+    print(f"{'Escenario':<20} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>9} {'mongo/req':>10}")
+    print("-" * 70)
+    for name, row in current.items():
+        old = previous.get(name)
+        if not old:
+            continue
+        print(f"{name:<20} {delta(row['p50_ms'], old['p50_ms']):>9} {delta(row['p95_ms'], old['p95_ms']):>9} "
+              f"{delta(row['p99_ms'], old['p99_ms']):>9} {delta(row['throughput_rps'], old['throughput_rps']):>9} "
+              f"{row['mongo_ops_per_request'] - old['mongo_ops_per_request']:>+10.2f}")
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    if ARGS.seed_data:
+        seed_database(ARGS)
+
+    data = Dataset(ARGS)
+    print(f"\n🚀 {ARGS.requests} requests por escenario, concurrencia {ARGS.concurrency}\n")
+    print_header()
+    results = asyncio.run(run_benchmark(ARGS, data))
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "params": {key: value for key, value in vars(ARGS).items() if key not in ("output", "compare")},
+        "dataset": {"users": len(data.users), "posts": len(data.post_ids)},
+        "results": results
+    }
+
+    output = ARGS.output or os.path.join(
+        "benchmark_results", f"benchmark_{datetime.utcnow():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en {output}")
+
+    if ARGS.compare:
+        print_comparison(results, ARGS.compare)
+
+if __name__ == "__main__":
+    main()
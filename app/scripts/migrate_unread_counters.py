@@ -0,0 +1,54 @@
+# migrate_unread_counters.py
+# Inicializa `unread_notifications` en los usuarios creados antes del contador.
+#
+# Los usuarios nuevos nacen con el contador en 0; a los anteriores se les
+# cuenta una vez aquí, con una sola agregación sobre las no leídas. Solo se
+# escriben usuarios que aún no lo tienen, así que se puede correr de nuevo.
+#
+# ⚠️ Una notificación que llegue a un usuario entre la agregación y su
+# escritura no se cuenta: correrlo con poco tráfico (o con la app detenida).
+#
+# Uso:
+#   python -m app.scripts.migrate_unread_counters
+
+import asyncio
+from pymongo import UpdateOne
+from app.database import client, notification_collection, user_collection
+
+BATCH_SIZE = 1000
+
+
+async def migrate_unread_counters():
+    missing = {"unread_notifications": {"$exists": False}}
+    pending = await user_collection.count_documents(missing)
+    print(f"📋 {pending} usuarios sin contador de no leídas")
+    if not pending:
+        print("✅ No hay usuarios que migrar")
+        return
+
+    counted, batch = 0, []
+    cursor = notification_collection.aggregate([
+        {"$match": {"read": False}},
+        {"$group": {"_id": "$to_user", "unread": {"$sum": 1}}}
+    ])
+    async for row in cursor:
+        batch.append(UpdateOne({"_id": row["_id"], **missing}, {"$set": {"unread_notifications": row["unread"]}}))
+        if len(batch) >= BATCH_SIZE:
+            counted += (await user_collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        counted += (await user_collection.bulk_write(batch, ordered=False)).modified_count
+
+    # El resto no tiene notificaciones sin leer
+    zeroed = await user_collection.update_many(missing, {"$set": {"unread_notifications": 0}})
+
+    print("✅ Migración completada:")
+    print(f"   - {counted} usuarios con notificaciones sin leer")
+    print(f"   - {zeroed.modified_count} usuarios en 0")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(migrate_unread_counters())
+    finally:
+        client.close()
@@ -0,0 +1,343 @@
+# websocket_load_test.py
+# Prueba de carga del fan-out de WebSocket (websocketRoute + ConnectionManager).
+#
+# - Levanta el servidor real con uvicorn en un subproceso apuntando a la base
+#   de benchmark (sembrada con benchmark_suite.py --seed-data).
+# - Abre miles de clientes WebSocket autenticados; una fracción son lentos
+#   (leen con retraso y con un buffer mínimo, así el servidor siente la presión).
+# - Envía mensajes por POST /messages/send y eventos "typing" por el socket.
+# - Mide latencia de entrega extremo a extremo, memoria por conexión (RSS del
+#   servidor) y cómo afectan los consumidores lentos al resto:
+#     fase "baseline": ningún mensaje va a clientes lentos
+#     fase "with_slow": los clientes lentos también reciben
+#
+# Uso:
+#   python -m app.scripts.websocket_load_test --connections 2000 --slow-fraction 0.05
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+import httpx
+import websockets
+from pymongo import MongoClient
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Prueba de carga de WebSockets")
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=os.getenv("BENCH_DB_NAME", "skillswap_bench"))
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--slow-delay-ms", type=float, default=200, help="Retraso por mensaje de los clientes lentos")
+    parser.add_argument("--messages", type=int, default=2000, help="Mensajes por fase")
+    parser.add_argument("--typing-events", type=int, default=2000, help="Eventos typing por fase")
+    parser.add_argument("--rate", type=float, default=200, help="Envíos por segundo")
+    parser.add_argument("--handshake-concurrency", type=int, default=100)
+    parser.add_argument("--drain-seconds", type=float, default=5, help="Espera final para entregas pendientes")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Archivo JSON de resultados")
+    return parser.parse_args()
+
+
+# ============================================
+# SERVIDOR
+# ============================================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def rss_bytes(pid: int) -> int:
+    """RSS del proceso (Linux); None si no está disponible"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+def start_server(args, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MONGO_URI": args.mongo_uri,
+        "DB_NAME": args.db_name,
+        "LOG_LEVEL": "WARNING",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+
+async def wait_until_ready(port: int, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"http://127.0.0.1:{port}/monitoring/loop-lag")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+# ============================================
+# CLIENTES
+# ============================================
+
+class LatencyTracker:
+    """Tiempos de envío pendientes y latencias de entrega por fase y tipo de cliente"""
+
+    def __init__(self):
+        self.phase = None
+        self.sent_at = {}
+        self.typing_sent = defaultdict(deque)
+        self.latencies = defaultdict(list)
+        self.expected = defaultdict(int)
+
+    def record(self, kind: str, slow: bool, sent_at: float):
+        group = "slow" if slow else "fast"
+        self.latencies[(self.phase, kind, group)].append((time.perf_counter() - sent_at) * 1000)
+
+
+class LoadClient:
+    def __init__(self, user_id: str, username: str, token: str, slow: bool):
+        self.user_id = user_id
+        self.username = username
+        self.token = token
+        self.slow = slow
+        self.websocket = None
+        self.task = None
+
+    async def connect(self, port: int, tracker: LatencyTracker, delay_ms: float):
+        # Un buffer mínimo en el cliente lento deja de leer el socket y genera backpressure real
+        self.websocket = await websockets.connect(
+            f"ws://127.0.0.1:{port}/ws?token={self.token}",
+            max_queue=1 if self.slow else 64,
+            ping_interval=None
+        )
+        self.task = asyncio.create_task(self.receive_loop(tracker, delay_ms))
+
+    async def receive_loop(self, tracker: LatencyTracker, delay_ms: float):
+        try:
+            async for raw in self.websocket:
+                if self.slow:
+                    await asyncio.sleep(delay_ms / 1000)
+
+                frame = json.loads(raw)
+                if frame.get("type") == "new_message":
+                    sent_at = tracker.sent_at.pop(frame["data"].get("content"), None)
+                    if sent_at is not None:
+                        tracker.record("message", self.slow, sent_at)
+                elif frame.get("type") == "user_typing":
+                    pending = tracker.typing_sent.get((frame["data"]["sender_username"], self.username))
+                    if pending:
+                        tracker.record("typing", self.slow, pending.popleft())
+        except websockets.ConnectionClosed:
+            pass
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+        if self.task is not None:
+            await self.task
+
+
+def load_users(args, count: int) -> list:
+    from app.utils.authUtils import create_access_token
+
+    db = MongoClient(args.mongo_uri)[args.db_name]
+    users = list(db.users.find({}, {"username": 1}).limit(count))
+    if not users:
+        sys.exit("❌ La base está vacía; siembra con: python -m app.scripts.benchmark_suite --seed-data")
+
+    return [(str(user["_id"]), user["username"], create_access_token({"sub": str(user["_id"])}))
+            for user in users]
+
+
+async def open_clients(args, port: int, tracker: LatencyTracker, users: list, rng: random.Random) -> list:
+    clients = []
+    for i in range(args.connections):
+        # Si hay menos usuarios que conexiones se reutilizan (varios sockets por usuario)
+        user_id, username, token = users[i % len(users)]
+        clients.append(LoadClient(user_id, username, token, slow=rng.random() < args.slow_fraction))
+
+    semaphore = asyncio.Semaphore(args.handshake_concurrency)
+
+    async def connect(client):
+        async with semaphore:
+            await client.connect(port, tracker, args.slow_delay_ms)
+
+    await asyncio.gather(*(connect(client) for client in clients))
+    return clients
+
+
+async def run_phase(name: str, args, port: int, tracker: LatencyTracker,
+                    clients: list, include_slow: bool, rng: random.Random) -> dict:
+    tracker.phase = name
+    # Un usuario con varios sockets recibe en todos; solo se apunta a usuarios
+    # cuyos sockets son del mismo tipo para no mezclar grupos
+    kinds = defaultdict(set)
+    for client in clients:
+        kinds[client.username].add(client.slow)
+    recipients = [client for client in clients
+                  if len(kinds[client.username]) == 1 and (include_slow or not client.slow)]
+    senders = [client for client in clients if not client.slow]
+
+    interval = 1 / args.rate
+    http_latencies = []
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as http:
+        async def send_message(sender, recipient, tag):
+            started = time.perf_counter()
+            tracker.sent_at[tag] = started
+            await http.post(
+                "/messages/send",
+                json={"recipient_username": recipient.username, "content": tag},
+                headers={"Authorization": f"Bearer {sender.token}"}
+            )
+            http_latencies.append((time.perf_counter() - started) * 1000)
+
+        pending = []
+        for i in range(max(args.messages, args.typing_events)):
+            if i < args.messages:
+                sender, recipient = rng.choice(senders), rng.choice(recipients)
+                if sender.username != recipient.username:
+                    pending.append(asyncio.create_task(send_message(sender, recipient, f"load:{name}:{i}")))
+
+            if i < args.typing_events:
+                sender, recipient = rng.choice(senders), rng.choice(recipients)
+                if sender.username != recipient.username:
+                    tracker.typing_sent[(sender.username, recipient.username)].append(time.perf_counter())
+                    await sender.websocket.send(json.dumps({
+                        "type": "typing", "recipient_username": recipient.username, "is_typing": True
+                    }))
+
+            await asyncio.sleep(interval)
+
+        await asyncio.gather(*pending)
+
+    await asyncio.sleep(args.drain_seconds)
+    return summarize(tracker, name, http_latencies)
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[index], 2)
+
+def describe(values: list) -> dict:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": round(values[-1], 2) if values else None,
+        "mean_ms": round(statistics.fmean(values), 2) if values else None
+    }
+
+def summarize(tracker: LatencyTracker, phase: str, http_latencies: list) -> dict:
+    result = {"http_send": describe(http_latencies)}
+    for kind in ("message", "typing"):
+        for group in ("fast", "slow"):
+            values = tracker.latencies.get((phase, kind, group))
+            if values:
+                result[f"{kind}_{group}"] = describe(values)
+    return result
+
+
+def print_phase(name: str, result: dict):
+    print(f"\n📊 Fase {name}")
+    print(f"{'Métrica':<16} {'n':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for metric, row in result.items():
+        print(f"{metric:<16} {row['count']:>7} {row['p50_ms'] or 0:>9.2f} {row['p95_ms'] or 0:>9.2f} "
+              f"{row['p99_ms'] or 0:>9.2f} {row['max_ms'] or 0:>9.2f}")
+
+
+async def main_async(args) -> dict:
+    rng = random.Random(args.seed)
+    port = args.port or free_port()
+    server = start_server(args, port)
+    clients = []
+
+    try:
+        await wait_until_ready(port)
+        users = load_users(args, args.connections)
+        tracker = LatencyTracker()
+
+        rss_before = rss_bytes(server.pid)
+        started = time.perf_counter()
+        clients = await open_clients(args, port, tracker, users, rng)
+        connect_seconds = time.perf_counter() - started
+        await asyncio.sleep(1)
+        rss_after = rss_bytes(server.pid)
+
+        slow_count = sum(client.slow for client in clients)
+        memory_per_connection = (
+            round((rss_after - rss_before) / len(clients)) if rss_before and rss_after else None
+        )
+        print(f"🔌 {len(clients)} conexiones ({slow_count} lentas) en {connect_seconds:.1f}s")
+        if memory_per_connection is not None:
+            print(f"🧠 Memoria del servidor: {memory_per_connection / 1024:.1f} KiB por conexión")
+
+        phases = {}
+        for name, include_slow in (("baseline", False), ("with_slow", True)):
+            phases[name] = await run_phase(name, args, port, tracker, clients, include_slow, rng)
+            print_phase(name, phases[name])
+
+        return {
+            "connections": len(clients),
+            "slow_connections": slow_count,
+            "connect_seconds": round(connect_seconds, 2),
+            "server_rss_before": rss_before,
+            "server_rss_after": rss_after,
+            "memory_per_connection_bytes": memory_per_connection,
+            "undelivered_messages": len(tracker.sent_at),
+            "phases": phases
+        }
+    finally:
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    args = parse_args()
+
+    # Miles de sockets necesitan más descriptores de archivo que el límite por defecto
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    results = asyncio.run(main_async(args))
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "params": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results
+    }
+
+    output = args.output or os.path.join(
+        "benchmark_results", f"websocket_{datetime.utcnow():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en {output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
 import os
+import time
+import uuid
+from cachetools import LRUCache
 from dotenv import load_dotenv
 from fastapi import HTTPException
+from app.config import ACCESS_TOKEN_CACHE_SIZE
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "super-secret")
 ALGORITHM = "HS256"
 
+# {token: payload} de access tokens ya verificados
+_access_token_cache = LRUCache(maxsize=ACCESS_TOKEN_CACHE_SIZE)
+
 def create_access_token(data: dict):
     """Crea un access token que expira en 2 horas"""
     to_encode = data.copy()
@@ -24,12 +31,23 @@ def create_refresh_token(data: dict):
     expire = datetime.utcnow() + timedelta(days=30)  # 30 días
     to_encode.update({
         "exp": expire,
-        "type": "refresh"
+        "type": "refresh",
+        "jti": uuid.uuid4().hex  # Identificador para poder revocarlo
     })
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_access_token(token: str):
-    """Verifica y decodifica un access token"""
+    """
+    Verifica y decodifica un access token (memoizado en un LRU acotado).
+    Retorna una copia: el payload cacheado lo comparten todos los requests.
+    """
+    cached = _access_token_cache.get(token)
+    if cached is not None:
+        if cached.get("exp", 0) > time.time():
+            return dict(cached)
+        _access_token_cache.pop(token, None)
+        return None
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         
@@ -37,7 +55,8 @@ def verify_access_token(token: str):
         if payload.get("type") != "access":
             return None
             
-        return payload
+        _access_token_cache[token] = payload
+        return dict(payload)
     except jwt.ExpiredSignatureError:
         return None
     except JWTError:
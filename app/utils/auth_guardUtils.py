@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from functools import wraps
 from app.utils.authUtils import verify_access_token
+from app.utils.logging_setup import user_id_var
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "super-secret")
@@ -30,6 +31,8 @@ async def auth_required_depends(credentials: HTTPAuthorizationCredentials = Depe
             detail="Token inválido - sin user_id"
         )
     
+    # Disponible para los logs estructurados del request
+    user_id_var.set(user_id)
     return user_id
 
 def auth_required(func):
@@ -0,0 +1,185 @@
+# app/utils/compression.py
+import gzip
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from app.config import COMPRESSION_MIN_SIZE, COMPRESSION_LEVEL
+
+# Tipos que ya vienen comprimidos o que se transmiten en streaming
+EXCLUDED_CONTENT_TYPES = ("image/", "video/", "audio/", "text/event-stream", "application/zip", "application/gzip")
+
+
+def no_compression(endpoint):
+    """Decorador para excluir una ruta de la compresión (respuestas pequeñas o sensibles a latencia)"""
+    endpoint.skip_compression = True
+    return endpoint
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Negociación de Accept-Encoding respetando q=0. Se leen todas las
+    entradas: una entrada explícita de gzip manda sobre `*` (RFC 9110 §12.5.3),
+    así "*, gzip;q=0" rechaza gzip.
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if coding == "x-gzip":
+            coding = "gzip"
+        if coding not in ("gzip", "*"):
+            continue
+
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        # Si se repite, gana la mayor
+        qualities[coding] = max(q, qualities.get(coding, 0.0))
+
+    q = qualities.get("gzip", qualities.get("*", 0.0))
+    return q > 0
+
+
+class CompressionStats:
+    """Bytes antes y después de comprimir por ruta, para medir si vale la pena"""
+
+    def __init__(self):
+        self.routes = {}
+
+    def record(self, route: str, original: int, compressed: int):
+        stats = self.routes.setdefault(route, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+        stats["responses"] += 1
+        stats["bytes_in"] += original
+        stats["bytes_out"] += compressed
+
+    def snapshot(self) -> dict:
+        total_in = sum(stats["bytes_in"] for stats in self.routes.values())
+        total_out = sum(stats["bytes_out"] for stats in self.routes.values())
+
+        return {
+            "ratio": round(total_out / total_in, 3) if total_in else None,
+            "bytes_saved": total_in - total_out,
+            "routes": {
+                route: {
+                    **stats,
+                    "ratio": round(stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else None
+                }
+                for route, stats in self.routes.items()
+            }
+        }
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compresión gzip.
+
+    - Solo comprime si el cliente acepta gzip y el cuerpo supera minimum_size.
+    - Respeta Content-Encoding ya definido, tipos excluidos, exclude_paths
+      y rutas marcadas con @no_compression.
+    - Los WebSockets pasan sin tocar.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 compresslevel: int = COMPRESSION_LEVEL, exclude_paths: tuple = ()):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            return await self.app(scope, receive, send)
+
+        if not accepts_gzip(Headers(scope=scope).get("accept-encoding", "")):
+            return await self.app(scope, receive, send)
+
+        responder = _GzipResponder(scope, send, self.minimum_size, self.compresslevel)
+        await self.app(scope, receive, responder.send)
+
+
+class _GzipResponder:
+    def __init__(self, scope, send, minimum_size: int, compresslevel: int):
+        self.scope = scope
+        self._send = send
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+        self.start_message = None
+        self.passthrough = False
+        self.started = False
+        self.compressor = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _route_name(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope["path"]
+
+    def _should_skip(self, headers: Headers) -> bool:
+        # El router ya resolvió el endpoint cuando llega http.response.start
+        endpoint = self.scope.get("endpoint")
+        if getattr(endpoint, "skip_compression", False):
+            return True
+        if "content-encoding" in headers:
+            return True
+        return headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES)
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Retener los headers hasta ver el primer fragmento del cuerpo
+            self.start_message = message
+            self.passthrough = self._should_skip(Headers(raw=message["headers"]))
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            if self.start_message and not self.started:
+                self.started = True
+                await self._send(self.start_message)
+            return await self._send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                # Respuesta completa: comprimir solo si supera el umbral
+                if len(body) < self.minimum_size:
+                    await self._send(self.start_message)
+                    return await self._send(message)
+
+                compressed = gzip.compress(body, compresslevel=self.compresslevel)
+                compression_stats.record(self._route_name(), len(body), len(compressed))
+
+                headers["Content-Encoding"] = "gzip"
+                headers["Content-Length"] = str(len(compressed))
+                await self._send(self.start_message)
+                return await self._send({**message, "body": compressed})
+
+            # Respuesta en streaming: comprimir por fragmentos
+            self.compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            headers["Content-Encoding"] = "gzip"
+            del headers["Content-Length"]
+            await self._send(self.start_message)
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.flush()
+
+        self.bytes_in += len(body)
+        self.bytes_out += len(chunk)
+        if not more_body:
+            compression_stats.record(self._route_name(), self.bytes_in, self.bytes_out)
+
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+# Instancia global
+compression_stats = CompressionStats()
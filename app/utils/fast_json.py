@@ -0,0 +1,41 @@
+# app/utils/fast_json.py
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from app.config import VALIDATE_RESPONSES
+
+# {modelo: TypeAdapter} para no reconstruir validadores en cada request
+_adapters = {}
+
+def _default(obj):
+    """Tipos que orjson no conoce (datetime y UUID los maneja nativamente)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse codificada con orjson"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def validate_response(content, model):
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    adapter.validate_python(content)
+
+def fast_response(content, model=None, status_code: int = 200, headers: dict = None) -> FastJSONResponse:
+    """
+    Retorna datos ya formateados sin pasar por la validación de response_model.
+    El schema solo se valida en tests o modo debug (VALIDATE_RESPONSES=true).
+    Mantener response_model en el decorador para la documentación OpenAPI.
+    """
+    if model is not None and VALIDATE_RESPONSES:
+        validate_response(content, model)
+
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
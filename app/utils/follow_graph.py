@@ -0,0 +1,303 @@
+# app/utils/follow_graph.py
+import asyncio
+import logging
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from bson import ObjectId
+from cachetools import TTLCache
+from app.database import user_collection
+from app.config import (
+    FOLLOW_GRAPH_REBUILD_SECONDS,
+    FOLLOW_GRAPH_MAX_DELTA,
+    FOLLOW_GRAPH_CHECK_SECONDS,
+    PEOPLE_CACHE_SIZE,
+    PEOPLE_CACHE_TTL_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Usuarios por multiplicación dispersa al recalcular sugerencias en lote
+BATCH_SIZE = 256
+
+
+class _Graph:
+    """
+    Grafo de seguidos: fila u, columna v = 1 si u sigue a v.
+
+    - `base` es una matriz CSR (datos int8, índices int32) construida desde Mongo.
+    - Los follow/unfollow posteriores van a `delta` ({(u, v): ±1}) sin tocar
+      `base`; la matriz efectiva es base + delta hasta la próxima reconstrucción.
+    - Las filas nuevas (usuarios que no estaban al construir) caben en la
+      capacidad de sobra; si se acaba, `base` crece con resize.
+    """
+
+    def __init__(self, base: Optional[sparse.csr_matrix] = None, keys: Optional[List[bytes]] = None):
+        self.keys: List[bytes] = keys or []
+        self.rows: Dict[bytes, int] = {key: row for row, key in enumerate(self.keys)}
+        self.base = base if base is not None else sparse.csr_matrix((1024, 1024), dtype=np.int8)
+        # Seguidores por usuario en `base`, para desempatar
+        self.in_degree = np.bincount(self.base.indices, minlength=self.base.shape[0])
+        self.delta: Dict[Tuple[int, int], int] = {}
+        self._delta_matrix: Optional[sparse.csr_matrix] = None
+
+    def row(self, key: bytes, create: bool = False) -> Optional[int]:
+        row = self.rows.get(key)
+        if row is None and create:
+            row = self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            if row >= self.base.shape[0]:
+                capacity = self.base.shape[0] * 2
+                self.base.resize((capacity, capacity))
+                self.in_degree = np.pad(self.in_degree, (0, capacity - len(self.in_degree)))
+                self._delta_matrix = None
+        return row
+
+    def _in_base(self, u: int, v: int) -> bool:
+        if u + 1 >= len(self.base.indptr):
+            return False
+        start, end = self.base.indptr[u], self.base.indptr[u + 1]
+        position = np.searchsorted(self.base.indices[start:end], v)
+        return position < end - start and self.base.indices[start + position] == v
+
+    def set_edge(self, follower: bytes, followed: bytes, present: bool):
+        u, v = self.row(follower, create=True), self.row(followed, create=True)
+        change = int(present) - int(self._in_base(u, v))
+        if change:
+            self.delta[(u, v)] = change
+        else:
+            self.delta.pop((u, v), None)
+        self._delta_matrix = None
+
+    def delta_matrix(self) -> sparse.csr_matrix:
+        if self._delta_matrix is None:
+            shape = self.base.shape
+            if self.delta:
+                (us, vs), values = zip(*self.delta.keys()), list(self.delta.values())
+                self._delta_matrix = sparse.csr_matrix(
+                    (np.array(values, dtype=np.int8), (np.array(us), np.array(vs))), shape=shape
+                )
+            else:
+                self._delta_matrix = sparse.csr_matrix(shape, dtype=np.int8)
+        return self._delta_matrix
+
+    def two_hop(self, rows: List[int]) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+        """
+        Para las filas dadas: (F, M) con F = a quién sigue cada uno y
+        M[i, c] = cuántos de los seguidos de i siguen a c (amigos en común).
+        """
+        following = self.effective_rows(rows)
+
+        # Solo las filas de los seguidos entran al producto: multiplicar contra
+        # `base` completa convertiría todas sus aristas de int8 a int32
+        followed = np.unique(following.indices)
+        second_hop = self.effective_rows(followed)
+        compact = sparse.csr_matrix(
+            (following.data, np.searchsorted(followed, following.indices), following.indptr),
+            shape=(len(rows), len(followed))
+        )
+
+        mutual = (compact @ second_hop).tocsr()
+        mutual.eliminate_zeros()
+        return following, mutual
+
+    def effective_rows(self, rows) -> sparse.csr_matrix:
+        """Filas de base + delta (int32, sin ceros explícitos)"""
+        following = (self.base[rows].astype(np.int32) + self.delta_matrix()[rows]).tocsr()
+        following.eliminate_zeros()
+        return following
+
+
+class _Suggestions(list):
+    """Lista de sugerencias que recuerda con qué límite se calculó"""
+
+    def __init__(self, items, limit: int):
+        super().__init__(items)
+        self.limit = limit
+
+
+class FollowGraph:
+    """
+    "Personas que quizás conozcas": amigos de amigos ordenados por cuántos
+    de mis seguidos los siguen.
+
+    - El grafo completo se arma en memoria al arrancar (en segundo plano) y se
+      reconstruye cada FOLLOW_GRAPH_REBUILD_SECONDS, o antes si el delta pasa
+      de FOLLOW_GRAPH_MAX_DELTA aristas.
+    - `follow` / `unfollow` de este proceso se aplican al delta al instante y
+      descartan las sugerencias cacheadas de quien sigue.
+    - Las sugerencias se calculan en lote (una multiplicación dispersa por
+      BATCH_SIZE usuarios) y se cachean por usuario PEOPLE_CACHE_TTL_SECONDS;
+      tras cada reconstrucción se recalculan las de los usuarios en cache,
+      en un hilo junto con la matriz.
+    """
+
+    def __init__(self):
+        self.graph = _Graph()
+        self.ready = False
+        # {user_id: [(user_id, mutual_count), ...]}
+        self._cache = TTLCache(maxsize=PEOPLE_CACHE_SIZE, ttl=PEOPLE_CACHE_TTL_SECONDS)
+        # Cambios recibidos mientras se reconstruye, para aplicarlos al grafo nuevo
+        self._during_build: Optional[List[Tuple[bytes, bytes, bool]]] = None
+        self._tasks = []
+
+    # ---------------- Eventos ----------------
+
+    def _set_edge(self, follower_id: str, followed_id: str, present: bool):
+        follower, followed = ObjectId(follower_id).binary, ObjectId(followed_id).binary
+        self.graph.set_edge(follower, followed, present)
+        if self._during_build is not None:
+            self._during_build.append((follower, followed, present))
+        self._cache.pop(str(follower_id), None)
+
+    def follow(self, follower_id: str, followed_id: str):
+        self._set_edge(follower_id, followed_id, True)
+
+    def unfollow(self, follower_id: str, followed_id: str):
+        self._set_edge(follower_id, followed_id, False)
+
+    # ---------------- Consultas ----------------
+
+    def compute(self, user_ids: List[str], limit: int,
+                graph: Optional[_Graph] = None) -> Dict[str, List[Tuple[str, int]]]:
+        """Sugerencias de varios usuarios con multiplicaciones dispersas en lote"""
+        graph = graph or self.graph
+        results = {user_id: [] for user_id in user_ids}
+        known = [(user_id, graph.rows[ObjectId(user_id).binary]) for user_id in user_ids
+                 if ObjectId(user_id).binary in graph.rows]
+
+        for start in range(0, len(known), BATCH_SIZE):
+            batch = known[start:start + BATCH_SIZE]
+            following, mutual = graph.two_hop([row for _, row in batch])
+
+            for i, (user_id, row) in enumerate(batch):
+                lo, hi = mutual.indptr[i], mutual.indptr[i + 1]
+                candidates, counts = mutual.indices[lo:hi], mutual.data[lo:hi]
+
+                # Fuera: yo mismo y a quienes ya sigo
+                followed = following.indices[following.indptr[i]:following.indptr[i + 1]]
+                keep = (candidates != row) & ~np.isin(candidates, followed)
+                candidates, counts = candidates[keep], counts[keep]
+                if not len(candidates):
+                    continue
+
+                # Más amigos en común primero; a igualdad, más seguidores
+                order = np.lexsort((-graph.in_degree[candidates], -counts))[:limit]
+                results[user_id] = [
+                    (str(ObjectId(graph.keys[candidates[j]])), int(counts[j])) for j in order
+                ]
+        return results
+
+    def suggestions(self, user_id: str, limit: int) -> List[Tuple[str, int]]:
+        """[(user_id, amigos en común)] de mayor a menor, desde el cache si está fresco"""
+        cached = self._cache.get(user_id)
+        if cached is None or cached.limit < limit:
+            cached = _Suggestions(self.compute([user_id], limit)[user_id], limit)
+            self._cache[user_id] = cached
+        return cached[:limit]
+
+    # ---------------- Reconstrucción ----------------
+
+    def _prepare(self, keys: List[bytes], followers: array, followed: array,
+                 cached: List[Tuple[str, _Suggestions]]) -> Tuple[_Graph, Dict[str, _Suggestions]]:
+        """
+        Arma la matriz y recalcula las sugerencias cacheadas sobre el grafo
+        nuevo. Corre en un hilo: el grafo aún no está publicado, así que
+        nadie más lo toca mientras tanto.
+        """
+        # Capacidad de sobra para usuarios nuevos sin redimensionar
+        capacity = max(1024, int(len(keys) * 1.1) + 1024)
+        base = sparse.csr_matrix(
+            (np.ones(len(followers), dtype=np.int8),
+             (np.frombuffer(followers, dtype=np.int32), np.frombuffer(followed, dtype=np.int32))),
+            shape=(capacity, capacity)
+        )
+        # Aristas repetidas en el arreglo cuentan una vez
+        base.sum_duplicates()
+        base.data[:] = 1
+        base.sort_indices()
+        graph = _Graph(base, keys)
+
+        refreshed = {}
+        if cached:
+            limit = max(suggestions.limit for _, suggestions in cached)
+            for user_id, suggestions in self.compute([user_id for user_id, _ in cached], limit, graph).items():
+                refreshed[user_id] = _Suggestions(suggestions, limit)
+        return graph, refreshed
+
+    async def build(self):
+        """
+        Carga completa desde Mongo; el grafo anterior sigue sirviendo mientras
+        tanto. La matriz y las sugerencias de los usuarios en cache se calculan
+        en un hilo y se publican juntas, sin bloquear el event loop.
+        """
+        started = time.perf_counter()
+        self._during_build = []
+        try:
+            keys: List[bytes] = []
+            rows: Dict[bytes, int] = {}
+            followers, followed = array("i"), array("i")
+
+            def row_of(key: bytes) -> int:
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = len(keys)
+                    keys.append(key)
+                return row
+
+            cursor = user_collection.find({}, {"following": 1}).batch_size(5000)
+            async for user in cursor:
+                u = row_of(user["_id"].binary)
+                for target in user.get("following") or ():
+                    followers.append(u)
+                    followed.append(row_of(target.binary))
+
+            graph, refreshed = await asyncio.to_thread(
+                self._prepare, keys, followers, followed, list(self._cache.items())
+            )
+
+            # Cambios llegados durante el cálculo: se aplican y sus sugerencias
+            # recalculadas (sobre el grafo sin el cambio) se descartan
+            changed = set()
+            for follower, target, present in self._during_build:
+                graph.set_edge(follower, target, present)
+                changed.add(str(ObjectId(follower)))
+            self.graph = graph
+            for user_id, suggestions in refreshed.items():
+                if user_id not in changed:
+                    self._cache[user_id] = suggestions
+        finally:
+            self._during_build = None
+
+        self.ready = True
+        logger.info(
+            "🕸️ Grafo de seguidos cargado: %s usuarios, %s aristas, %s sugerencias recalculadas en %.0f ms",
+            len(self.graph.keys), self.graph.base.nnz, len(refreshed), (time.perf_counter() - started) * 1000
+        )
+
+    async def _run(self):
+        last_build = 0.0
+        while True:
+            try:
+                if (time.monotonic() - last_build >= FOLLOW_GRAPH_REBUILD_SECONDS
+                        or len(self.graph.delta) >= FOLLOW_GRAPH_MAX_DELTA):
+                    await self.build()
+                    last_build = time.monotonic()
+            except Exception as e:
+                logger.warning("⚠️ Error reconstruyendo el grafo de seguidos: %s", e)
+            await asyncio.sleep(FOLLOW_GRAPH_CHECK_SECONDS)
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._run())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# Instancia global
+follow_graph = FollowGraph()
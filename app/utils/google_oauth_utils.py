@@ -1,39 +1,159 @@
-from google.oauth2 import id_token
-from google.auth.transport import requests
+import asyncio
+import logging
+import re
+import time
+from typing import Optional
+import httpx
+from jose import jwt, JWTError
 from fastapi import HTTPException, status
 import os
 from dotenv import load_dotenv
+from app.config import GOOGLE_CERTS_URL
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Tu CLIENT_ID de Google Cloud Console
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "")
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleCertsCache:
+    """
+    Cache en memoria del JWKS de Google.
+
+    - Respeta Cache-Control (max-age menos Age) del endpoint de certificados.
+    - Una tarea en segundo plano lo refresca antes de que expire.
+    - En el camino caliente solo se lee el diccionario: sin I/O de red,
+      salvo que llegue un `kid` desconocido (rotación de llaves).
+    """
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL, default_ttl: int = 3600,
+                 min_ttl: int = 60, unknown_kid_cooldown: int = 30,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.url = url
+        # Transporte de httpx a usar (los tests pasan un MockTransport)
+        self.transport = transport
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.unknown_kid_cooldown = unknown_kid_cooldown
+
+        self._keys = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def _ttl_from_headers(self, headers) -> int:
+        match = _MAX_AGE_RE.search(headers.get("cache-control", ""))
+        if not match:
+            return self.default_ttl
+
+        ttl = int(match.group(1)) - int(headers.get("age", "0") or 0)
+        return max(ttl, self.min_ttl)
+
+    async def refresh(self):
+        """Descarga el JWKS y reemplaza las llaves en memoria"""
+        async with httpx.AsyncClient(timeout=5, transport=self.transport) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+
+        keys = {key["kid"]: key for key in response.json().get("keys", []) if "kid" in key}
+        ttl = self._ttl_from_headers(response.headers)
+
+        self._keys = keys
+        self._last_fetch = time.monotonic()
+        self._expires_at = self._last_fetch + ttl
+        logger.info("🔑 Certificados de Google actualizados: %s llaves, ttl %ss", len(keys), ttl)
+
+    async def _refresh_once(self, force: bool = False):
+        """Refresco con singleflight: las peticiones concurrentes esperan al mismo"""
+        fetched_before = self._last_fetch
+        async with self._lock:
+            if self._last_fetch != fetched_before:
+                return
+            if not force and self._keys and time.monotonic() < self._expires_at:
+                return
+            await self.refresh()
+
+    async def get_key(self, kid: str):
+        key = self._keys.get(kid)
+        if key:
+            return key
+
+        # Cache vacío o kid desconocido (posible rotación): refrescar con límite
+        if not self._keys or time.monotonic() - self._last_fetch > self.unknown_kid_cooldown:
+            await self._refresh_once(force=True)
+
+        return self._keys.get(kid)
+
+    async def _refresh_loop(self):
+        while True:
+            # Refrescar al 90% del ttl
+            remaining = self._expires_at - time.monotonic()
+            await asyncio.sleep(max(remaining * 0.9, 1))
+            try:
+                await self._refresh_once(force=True)
+            except Exception as e:
+                logger.warning("⚠️ No se pudieron refrescar los certificados de Google: %s", e)
+                self._expires_at = time.monotonic() + self.unknown_kid_cooldown
+
+    async def start(self):
+        try:
+            await self._refresh_once(force=True)
+        except Exception as e:
+            logger.warning("⚠️ Certificados de Google no disponibles al arrancar: %s", e)
+            self._expires_at = time.monotonic() + self.unknown_kid_cooldown
+
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Instancia global
+google_certs = GoogleCertsCache()
+
 
 async def verify_google_token(token: str) -> dict:
     """
     Verifica un ID token de Google y retorna la información del usuario
-    
+
     Args:
         token: ID token de Google
-        
+
     Returns:
         dict con: email, name, given_name, family_name, picture, sub (google_id)
-        
+
     Raises:
         HTTPException: Si el token es inválido
     """
     try:
-        # Verificar el token con Google
-        idinfo = id_token.verify_oauth2_token(
-            token, 
-            requests.Request(), 
-            GOOGLE_CLIENT_ID
+        header = jwt.get_unverified_header(token)
+        key = await google_certs.get_key(header.get("kid"))
+
+        if not key:
+            raise ValueError('Llave de firma desconocida')
+
+        # Verificación local de firma, audiencia, emisor y expiración
+        idinfo = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=GOOGLE_CLIENT_ID,
+            issuer=GOOGLE_ISSUERS,
+            options={"verify_at_hash": False}
         )
-        
-        # Verificar que el token es de Google
-        if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
-            raise ValueError('Token no es de Google')
-        
+
         return {
             'email': idinfo.get('email'),
             'email_verified': idinfo.get('email_verified', False),
@@ -43,8 +163,8 @@ async def verify_google_token(token: str) -> dict:
             'picture': idinfo.get('picture', ''),
             'google_id': idinfo.get('sub'),  # ID único de Google
         }
-        
-    except ValueError as e:
+
+    except (ValueError, JWTError) as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Token de Google inválido: {str(e)}"
@@ -53,4 +173,4 @@ async def verify_google_token(token: str) -> dict:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Error al verificar token de Google: {str(e)}"
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,35 @@
+# app/utils/http_cache.py
+import hashlib
+from fastapi import Request, Response
+from app.utils.fast_json import dumps
+
+# Políticas de Cache-Control usadas por las rutas
+CACHE_PUBLIC_DAY = "public, max-age=86400"
+CACHE_PRIVATE_REVALIDATE = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    """
+    ETag débil a partir del hash del contenido (acepta ObjectId y datetime).
+    Débil porque CompressionMiddleware puede enviar el mismo recurso en
+    identity o gzip: bytes distintos no pueden compartir un ETag fuerte.
+    """
+    digest = hashlib.blake2b(dumps(parts), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Compara If-None-Match con el ETag (comparación débil, como indica el RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def set_cache_headers(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
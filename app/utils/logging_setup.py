@@ -0,0 +1,177 @@
+# app/utils/logging_setup.py
+import contextvars
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+import orjson
+from app.config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLING
+
+# Contexto del request actual, leído al crear cada registro
+scope_var = contextvars.ContextVar("scope", default=None)
+user_id_var = contextvars.ContextVar("user_id", default=None)
+
+# Atributos propios de LogRecord; lo demás se considera campo estructurado (extra=...)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+access_logger = logging.getLogger("app.access")
+
+
+def route_name(scope):
+    """Plantilla de la ruta (/posts/{post_id}) si el router ya la resolvió"""
+    if scope is None:
+        return None
+    return getattr(scope.get("route"), "path", None) or scope["path"]
+
+
+class ContextFilter(logging.Filter):
+    """Agrega route y user_id del request en curso (corre en el hilo que loguea)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "route"):
+            record.route = route_name(scope_var.get())
+        if not hasattr(record, "user_id"):
+            record.user_id = user_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar solo una fracción de los registros INFO/DEBUG por logger.
+    WARNING o superior siempre pasa. Se usa la regla con el prefijo más largo.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self._cache = {}
+
+    @classmethod
+    def from_string(cls, value: str) -> "SamplingFilter":
+        rates = {}
+        for item in value.split(","):
+            name, _, rate = item.strip().partition("=")
+            if name and rate:
+                rates[name] = float(rate)
+        return cls(rates)
+
+    def _rate_for(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = 1.0
+            for prefix, prefix_rate in self.rates:
+                if name == prefix or name.startswith(prefix + "."):
+                    rate = prefix_rate
+                    break
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON por registro con los campos estructurados"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+
+        return orjson.dumps(data, default=str).decode("utf-8")
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo que loguea.
+    El mensaje (%-format) se arma en el hilo del listener; los args deben
+    ser valores que no se modifiquen después (strings, números, ids).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener = None
+
+def setup_logging():
+    """Envía los logs de `app.*` a una cola atendida por un hilo en segundo plano"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+
+    queue = SimpleQueue()
+    queue_handler = LazyQueueHandler(queue)
+    queue_handler.addFilter(SamplingFilter.from_string(LOG_SAMPLING))
+    queue_handler.addFilter(ContextFilter())
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.handlers = [queue_handler]
+    app_logger.propagate = False
+
+    _listener = QueueListener(queue, output, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging():
+    """Vacía la cola y detiene el hilo del listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestLogMiddleware:
+    """Middleware ASGI que registra ruta, usuario, status y latencia de cada request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        scope_token = scope_var.set(scope)
+        user_token = user_id_var.set(None)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            access_logger.info(
+                "%s %s %s",
+                scope["method"], scope["path"], status_code,
+                extra={
+                    "method": scope["method"],
+                    "status": status_code,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 2)
+                }
+            )
+            scope_var.reset(scope_token)
+            user_id_var.reset(user_token)
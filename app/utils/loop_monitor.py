@@ -0,0 +1,185 @@
+# app/utils/loop_monitor.py
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Optional
+
+from app.config import LOOP_MONITOR_INTERVAL_MS, LOOP_SLOW_CALLBACK_MS
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (ms) de los buckets del histograma de lag
+LAG_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class LagHistogram:
+    """Histograma acumulativo de lag del event loop"""
+
+    def __init__(self, buckets=LAG_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+            cumulative += count
+            buckets.append({"le": bound, "count": cumulative})
+
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "avg_ms": round(self.sum_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3)
+        }
+
+
+class LoopMonitor:
+    """
+    Mide el lag del event loop y detecta callbacks que lo bloquean.
+
+    - Una tarea del loop duerme `interval` y registra cuánto tarde despertó.
+    - Un hilo watchdog revisa el último latido de esa tarea; si el loop lleva
+      más de `slow_callback_ms` sin latir, captura el stack del hilo del loop
+      y la ruta que se estaba ejecutando.
+    """
+
+    def __init__(self, interval_ms: float = LOOP_MONITOR_INTERVAL_MS, slow_callback_ms: float = LOOP_SLOW_CALLBACK_MS):
+        self.interval = interval_ms / 1000
+        self.slow_callback = slow_callback_ms / 1000
+        self.histogram = LagHistogram()
+        self.slow_events = deque(maxlen=50)
+
+        # {frame del middleware: "METHOD /path"} para atribuir bloqueos a rutas
+        self._active_routes: Dict[object, str] = {}
+
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = 0.0
+        self._reported_tick = 0.0
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._sample_lag())
+
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            "⏱️ Monitor del event loop activo (intervalo %.0fms, umbral %.0fms)",
+            self.interval * 1000, self.slow_callback * 1000
+        )
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sample_lag(self):
+        loop = asyncio.get_running_loop()
+        while self._running:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0.0)
+            self.histogram.observe(lag * 1000)
+            self._last_tick = time.monotonic()
+
+    def _watch(self):
+        check_every = min(self.interval, self.slow_callback) / 2
+        while self._running:
+            time.sleep(check_every)
+
+            last_tick = self._last_tick
+            blocked = time.monotonic() - last_tick - self.interval
+            if blocked < self.slow_callback or last_tick == self._reported_tick:
+                continue
+
+            # Reportar una sola vez por bloqueo
+            self._reported_tick = last_tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+
+            route = self._route_for(frame) or "sin ruta (tarea de fondo)"
+            stack = "".join(traceback.format_stack(frame))
+            self.slow_events.append({
+                "route": route,
+                "blocked_ms": round(blocked * 1000, 1),
+                "detected_at": time.time(),
+                "stack": stack
+            })
+            logger.warning(
+                "🐢 Event loop bloqueado %.0fms en %s\n%s",
+                blocked * 1000, route, stack
+            )
+
+    def _route_for(self, frame) -> Optional[str]:
+        while frame is not None:
+            route = self._active_routes.get(frame)
+            if route:
+                return route
+            frame = frame.f_back
+        return None
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self._running,
+            "interval_ms": self.interval * 1000,
+            "slow_callback_ms": self.slow_callback * 1000,
+            "lag_histogram": self.histogram.snapshot(),
+            "slow_callbacks": [
+                {key: value for key, value in event.items() if key != "stack"}
+                for event in self.slow_events
+            ]
+        }
+
+
+class LoopMonitorMiddleware:
+    """Middleware ASGI que registra qué ruta se ejecuta para atribuirle los bloqueos"""
+
+    def __init__(self, app, monitor: LoopMonitor = None):
+        self.app = app
+        self.monitor = monitor or loop_monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        method = scope.get("method", "WS")
+        frame = sys._getframe()
+        self.monitor._active_routes[frame] = f"{method} {scope.get('path', '')}"
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor._active_routes.pop(frame, None)
+
+
+# Instancia global
+loop_monitor = LoopMonitor()
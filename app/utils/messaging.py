@@ -0,0 +1,134 @@
+# app/utils/messaging.py
+# Envío de mensajes directos, compartido por POST /messages/send y el
+# frame `send_message` del WebSocket.
+import logging
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from app.database import user_collection
+from app.models.messageModel import conversation_collection, message_collection
+from app.utils.outbox import outbox
+
+logger = logging.getLogger(__name__)
+
+
+async def ensure_message_indexes():
+    try:
+        # Un client_id por remitente: reenviar el mismo frame no duplica el mensaje
+        await message_collection.create_index(
+            [("sender_id", ASCENDING), ("client_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"client_id": {"$exists": True}}
+        )
+    except Exception as e:
+        logger.warning("⚠️ No se pudo crear el índice de client_id: %s", e)
+
+
+async def send_direct_message(sender: dict, recipient_username: str, content: str, client_id: Optional[str] = None) -> dict:
+    """
+    Guarda el mensaje y encola su entrega (WebSocket o push).
+
+    `sender` es el contexto ya resuelto del remitente (ver user_context), así
+    que no se vuelve a leer de Mongo. Con `client_id`, un reintento del mismo
+    mensaje devuelve el original con `duplicate=True` en lugar de insertarlo otra vez.
+
+    Retorna {"message", "conversation_id", "is_new_conversation", "duplicate"}.
+    """
+    sender_id = sender["_id"]
+
+    if client_id:
+        existing = await message_collection.find_one({"sender_id": sender_id, "client_id": client_id})
+        if existing:
+            return {
+                "message": existing,
+                "conversation_id": existing["conversation_id"],
+                "is_new_conversation": False,
+                "duplicate": True
+            }
+
+    # Buscar destinatario
+    recipient = await user_collection.find_one({"username": recipient_username}, {"_id": 1})
+    if not recipient:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    recipient_id = str(recipient["_id"])
+
+    # Buscar o crear conversación
+    conversation = await conversation_collection.find_one(
+        {"participants": {"$all": [sender_id, recipient["_id"]]}}, {"_id": 1}
+    )
+    is_new_conversation = conversation is None
+    now = datetime.utcnow()
+
+    if is_new_conversation:
+        conv_result = await conversation_collection.insert_one({
+            "participants": [sender_id, recipient["_id"]],
+            "created_at": now,
+            "updated_at": now
+        })
+        conversation = {"_id": conv_result.inserted_id}
+
+    message_doc = {
+        "conversation_id": conversation["_id"],
+        "sender_id": sender_id,
+        "content": content,
+        "created_at": now,
+        "is_read": False
+    }
+    if client_id:
+        message_doc["client_id"] = client_id
+
+    try:
+        await message_collection.insert_one(message_doc)
+    except DuplicateKeyError:
+        # El mismo client_id llegó dos veces a la vez (p. ej. por REST y por WebSocket)
+        existing = await message_collection.find_one({"sender_id": sender_id, "client_id": client_id})
+        return {
+            "message": existing,
+            "conversation_id": existing["conversation_id"],
+            "is_new_conversation": False,
+            "duplicate": True
+        }
+
+    await conversation_collection.update_one(
+        {"_id": conversation["_id"]},
+        {"$set": {"updated_at": now}}
+    )
+
+    # Entrega por WebSocket o push fuera del request
+    await outbox.enqueue("deliver_message", {
+        "recipient_id": recipient_id,
+        "websocket_message": {
+            "type": "new_message",
+            "data": {
+                "id": str(message_doc["_id"]),
+                "conversation_id": str(conversation["_id"]),
+                "sender_username": sender["username"],
+                "content": content,
+                "created_at": now.isoformat(),
+                "is_new_conversation": is_new_conversation
+            }
+        },
+        "push": {
+            "title": f"Nuevo mensaje de {sender['username']}",
+            "body": content,
+            "data": {
+                "type": "message",
+                "sender_username": sender["username"],
+                "conversation_id": str(conversation["_id"])
+            }
+        }
+    }, key=f"message:{message_doc['_id']}")
+
+    logger.info(
+        "✅ Mensaje enviado a %s", recipient_id,
+        extra={"conversation_id": str(conversation["_id"])}
+    )
+
+    return {
+        "message": message_doc,
+        "conversation_id": conversation["_id"],
+        "is_new_conversation": is_new_conversation,
+        "duplicate": False
+    }
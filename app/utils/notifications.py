@@ -0,0 +1,327 @@
+# app/utils/notifications.py
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from bson import ObjectId
+from pymongo import ReturnDocument, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+from app.database import notification_collection, notification_actor_collection, user_collection
+from app.config import NOTIFICATION_COALESCE_WINDOW_SECONDS, NOTIFICATION_RECENT_ACTORS, NOTIFICATION_READ_TTL_DAYS
+from app.utils.websocket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+# (singular, plural) de cada tipo agrupable
+NOTIFICATION_TEXT = {
+    "like": ("le dio like a tu publicación", "le dieron like a tu publicación"),
+    "comment": ("comentó tu publicación", "comentaron tu publicación"),
+    "follow": ("empezó a seguirte", "empezaron a seguirte"),
+}
+
+
+def render_message(kind: str, username: str, actors_count: int, fallback: str = None) -> str:
+    """'ana le dio like...' o 'ana y 12 personas más le dieron like...'"""
+    texts = NOTIFICATION_TEXT.get(kind)
+    if texts is None:
+        return fallback
+    if actors_count <= 1:
+        return f"{username} {texts[0]}"
+
+    others = actors_count - 1
+    return f"{username} y {others} {'persona más' if others == 1 else 'personas más'} {texts[1]}"
+
+
+def notification_actor(user: dict) -> dict:
+    """Datos públicos del actor que viajan en el evento en vivo"""
+    return {
+        "id": str(user["_id"]),
+        "username": user["username"],
+        "first_name": user.get("first_name", ""),
+        "last_name": user.get("last_name", ""),
+        "profile_image": user.get("profile_image", "")
+    }
+
+
+async def render_notifications(notifications: list) -> list:
+    """Forma de respuesta de las notificaciones, con todos los actores en una sola consulta"""
+    actor_ids = {
+        actor
+        for notif in notifications
+        for actor in notif.get("recent_actors") or [notif["from_user"]]
+    }
+    actors = {
+        user["_id"]: notification_actor(user)
+        async for user in user_collection.find(
+            {"_id": {"$in": list(actor_ids)}},
+            {"username": 1, "first_name": 1, "last_name": 1, "profile_image": 1}
+        )
+    }
+
+    rendered = []
+    for notif in notifications:
+        notif_actors = [actors[a] for a in notif.get("recent_actors") or [notif["from_user"]] if a in actors]
+
+        # Evita error si los usuarios ya no existen
+        if not notif_actors:
+            continue
+
+        actors_count = notif.get("actors_count", 1)
+        rendered.append({
+            "id": str(notif["_id"]),
+            "type": notif["type"],
+            "message": render_message(notif["type"], notif_actors[0]["username"], actors_count, notif["message"]),
+            "created_at": notif["created_at"].isoformat() if notif.get("created_at") else None,
+            "read": notif.get("read", False),
+            "from_user": notif_actors[0],
+            "actors_count": actors_count,
+            "actors": notif_actors,
+            "post_id": str(notif["post_id"]) if notif.get("post_id") else None
+        })
+
+    return rendered
+
+
+# Llaves de trabajos del outbox que se recuerdan por grupo (contados / entregados)
+JOB_KEYS_KEPT = 50
+
+
+def group_key(to_user, kind: str, post_id=None) -> str:
+    return f"{to_user}:{kind}:{post_id or '-'}"
+
+def window_of(when: datetime) -> int:
+    """Ventana fija de agrupación a la que pertenece un instante"""
+    return int(when.replace(tzinfo=timezone.utc).timestamp()) // NOTIFICATION_COALESCE_WINDOW_SECONDS
+
+
+async def ensure_notification_indexes():
+    try:
+        # Un solo documento por grupo y ventana, aunque dos workers escriban a la vez
+        await notification_collection.create_index(
+            [("group_key", ASCENDING), ("window", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"group_key": {"$exists": True}}
+        )
+        # Paginación por cursor de la bandeja
+        await notification_collection.create_index(
+            [("to_user", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]
+        )
+        # Las leídas expiran; read_at solo existe mientras la notificación está leída
+        await notification_collection.create_index(
+            "read_at", expireAfterSeconds=NOTIFICATION_READ_TTL_DAYS * 86400
+        )
+        # Membresías de actores: por grupo y actor para quitarlos; expiran
+        # junto con el plazo de las notificaciones leídas
+        await notification_actor_collection.create_index([("group_key", ASCENDING), ("actor", ASCENDING)])
+        await notification_actor_collection.create_index(
+            "created_at", expireAfterSeconds=NOTIFICATION_READ_TTL_DAYS * 86400
+        )
+    except Exception as e:
+        logger.warning("⚠️ No se pudieron crear los índices de notificaciones: %s", e)
+
+
+async def adjust_unread(user_id: ObjectId, delta: int):
+    """
+    Contador de no leídas en el usuario (badge sin contar documentos).
+    Nace en 0 al crear el usuario; los usuarios anteriores lo reciben con
+    `python -m app.scripts.migrate_unread_counters`. Si aún no lo tienen no
+    se toca (ver unread_count).
+    """
+    if delta:
+        await user_collection.update_one(
+            {"_id": user_id, "unread_notifications": {"$exists": True}},
+            {"$inc": {"unread_notifications": delta}}
+        )
+
+
+async def unread_count(user_id: ObjectId) -> int:
+    user = await user_collection.find_one({"_id": user_id}, {"unread_notifications": 1})
+    if user is None:
+        return 0
+    if "unread_notifications" in user:
+        return max(0, user["unread_notifications"])
+
+    # Usuario sin migrar: contar sin escribir. Inicializarlo aquí competiría
+    # con los $inc concurrentes (un conteo viejo pisaría incrementos nuevos)
+    return await notification_collection.count_documents({"to_user": user_id, "read": False})
+
+
+async def add_actor(notification: dict, job_key: Optional[str] = None) -> Optional[dict]:
+    """
+    Suma el actor al grupo (destinatario, tipo, post) de la ventana actual.
+    Si el grupo es nuevo o estaba leído, vuelve a contar como no leído.
+
+    Retorna {"id", "actors_count"} del grupo, o None si el actor ya estaba en el grupo
+    (like/unlike repetido o reintento del outbox): en ese caso no se cuenta
+    de nuevo. La membresía exacta vive en `notification_actors` (un
+    documento por grupo, ventana y actor); `recent_actors` solo guarda los
+    últimos para mostrarlos. `job_key` queda en la membresía y en
+    `counted_keys` para que un reintento sepa que su paso de conteo ya se hizo
+    (ver `counted_group`).
+    """
+    actor = notification["from_user"]
+    now = notification["created_at"]
+    key = group_key(notification["to_user"], notification["type"], notification.get("post_id"))
+    window = window_of(now)
+
+    membership_id = f"{key}:{window}:{actor}"
+    try:
+        await notification_actor_collection.insert_one({
+            "_id": membership_id, "group_key": key, "window": window, "actor": actor,
+            "job_key": job_key, "created_at": now
+        })
+    except DuplicateKeyError:
+        membership = await notification_actor_collection.find_one({"_id": membership_id}, {"job_key": 1})
+        # Otro trabajo ya lo contó; si es este mismo (reintento), el conteo
+        # del grupo pudo quedar a medias y se intenta de nuevo abajo
+        if job_key is None or membership is None or membership.get("job_key") != job_key:
+            return None
+
+    new_id = ObjectId()
+    on_insert = {"_id": new_id, "to_user": notification["to_user"], "type": notification["type"], "first_at": now}
+    if notification.get("post_id"):
+        on_insert["post_id"] = notification["post_id"]
+
+    update = {"from_user": actor, "message": notification["message"], "created_at": now, "read": False}
+    if notification.get("comment_id"):
+        update["comment_id"] = notification["comment_id"]
+
+    try:
+        group_filter = {"group_key": key, "window": window, "recent_actors": {"$ne": actor}}
+        if job_key:
+            group_filter["counted_keys"] = {"$ne": job_key}
+        before = await notification_collection.find_one_and_update(
+            group_filter,
+            {
+                "$setOnInsert": on_insert,
+                "$set": update,
+                "$unset": {"read_at": ""},
+                "$inc": {"actors_count": 1},
+                "$push": {
+                    "recent_actors": {"$each": [actor], "$position": 0, "$slice": NOTIFICATION_RECENT_ACTORS},
+                    **({"counted_keys": {"$each": [job_key], "$position": 0, "$slice": JOB_KEYS_KEPT}} if job_key else {})
+                }
+            },
+            upsert=True,
+            projection={"read": 1, "actors_count": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        # El grupo existe y el actor (o este mismo trabajo) ya está contado
+        return None
+
+    if before is None or before.get("read", False):
+        await adjust_unread(notification["to_user"], 1)
+
+    if before is None:
+        return {"id": new_id, "actors_count": 1}
+    return {"id": before["_id"], "actors_count": before.get("actors_count", 0) + 1}
+
+
+async def counted_group(notification: dict, job_key: str) -> Optional[dict]:
+    """
+    Grupo en el que el trabajo `job_key` ya contó a su actor, con
+    {"id", "actors_count", "delivered"}; None si ese trabajo no lo contó
+    (el actor llegó por otra acción repetida).
+    """
+    group = await notification_collection.find_one(
+        {
+            "group_key": group_key(notification["to_user"], notification["type"], notification.get("post_id")),
+            "window": window_of(notification["created_at"]),
+            "counted_keys": job_key
+        },
+        {"actors_count": 1, "delivered_keys": 1}
+    )
+    if group is None:
+        return None
+    return {
+        "id": group["_id"],
+        "actors_count": group.get("actors_count", 1),
+        "delivered": job_key in (group.get("delivered_keys") or [])
+    }
+
+
+async def mark_delivered(group_id: ObjectId, job_key: str):
+    """El evento en vivo y el push del trabajo ya salieron: un reintento no los repite"""
+    await notification_collection.update_one(
+        {"_id": group_id},
+        {"$push": {"delivered_keys": {"$each": [job_key], "$position": 0, "$slice": JOB_KEYS_KEPT}}}
+    )
+
+
+async def remove_actor(to_user, kind: str, actor, post_id=None):
+    """Quita al actor de sus grupos (unlike, unfollow, comentario borrado) y borra los que quedan vacíos"""
+    key = group_key(to_user, kind, post_id)
+    memberships = await notification_actor_collection.find(
+        {"group_key": key, "actor": actor}, {"window": 1}
+    ).to_list(length=None)
+    for membership in memberships:
+        # Solo quien borra la membresía descuenta: un reintento no descuenta dos veces
+        deleted = await notification_actor_collection.delete_one({"_id": membership["_id"]})
+        if deleted.deleted_count:
+            await notification_collection.update_one(
+                {"group_key": key, "window": membership["window"]},
+                {"$pull": {"recent_actors": actor}, "$inc": {"actors_count": -1}}
+            )
+    if not memberships:
+        # Grupos anteriores a las membresías: solo se sabe por recent_actors
+        await notification_collection.update_many(
+            {"group_key": key, "recent_actors": actor},
+            {"$pull": {"recent_actors": actor}, "$inc": {"actors_count": -1}}
+        )
+    empty = {"group_key": key, "actors_count": {"$lte": 0}}
+
+    # Notificaciones individuales anteriores a la agrupación
+    legacy = {"to_user": to_user, "from_user": actor, "type": kind, "group_key": {"$exists": False}}
+    if post_id:
+        legacy["post_id"] = post_id
+
+    await delete_notifications(to_user, {"$or": [empty, legacy]})
+
+
+async def delete_notifications(to_user: ObjectId, query: dict):
+    """Borra notificaciones de un usuario descontando las no leídas del contador"""
+    unread = await notification_collection.delete_many({**query, "to_user": to_user, "read": False})
+    await notification_collection.delete_many({**query, "to_user": to_user})
+    await adjust_unread(to_user, -unread.deleted_count)
+    if unread.deleted_count:
+        await publish_badge(to_user)
+
+
+# ============================================
+# EVENTOS EN VIVO POR WEBSOCKET
+# ============================================
+
+async def publish_notification(notification: dict, group: dict, actor: dict):
+    """
+    Envía la notificación (ya agrupada) y el badge actualizado a los sockets
+    del destinatario, para que el cliente no tenga que consultar /notifications.
+    """
+    to_user = str(notification["to_user"])
+    if not manager.is_user_online(to_user):
+        return
+
+    await manager.send_personal_message({
+        "type": "notification",
+        "data": {
+            "id": str(group["id"]),
+            "type": notification["type"],
+            "message": render_message(
+                notification["type"], actor["username"], group["actors_count"], notification["message"]
+            ),
+            "actors_count": group["actors_count"],
+            "from_user": actor,
+            "post_id": str(notification["post_id"]) if notification.get("post_id") else None,
+            "created_at": notification["created_at"].isoformat(),
+            "read": False
+        },
+        "unread_count": await unread_count(notification["to_user"])
+    }, to_user)
+
+
+async def publish_badge(user_id: ObjectId):
+    """Badge actualizado (lecturas o notificaciones eliminadas), también para otros dispositivos"""
+    if manager.is_user_online(str(user_id)):
+        await manager.send_personal_message(
+            {"type": "unread_count", "data": {"unread_count": await unread_count(user_id)}},
+            str(user_id)
+        )
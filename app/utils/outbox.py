@@ -0,0 +1,212 @@
+# app/utils/outbox.py
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from app.database import outbox_collection
+from app.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_CONCURRENCY,
+    OUTBOX_POLL_SECONDS,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETENTION_HOURS
+)
+
+logger = logging.getLogger(__name__)
+
+# Estados de un trabajo
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff exponencial: 2s, 4s, 8s... con tope de 10 minutos"""
+    return min(2 ** attempts, 600)
+
+
+class Outbox:
+    """
+    Outbox de efectos secundarios.
+
+    - La ruta hace su escritura principal y enseguida `enqueue` del efecto
+      (notificación, push, WebSocket); la latencia del request no incluye
+      llamadas externas.
+    - `key` es la llave de idempotencia: encolar dos veces el mismo evento no
+      duplica el trabajo, y los handlers la usan para que reintentar no
+      duplique sus escrituras.
+    - Un pool de consumidores reclama lotes con un lease; si el worker muere
+      el lease vence y otro lo retoma. Los fallos se reintentan con backoff.
+    - `enqueue` despierta al consumidor local de inmediato; el sondeo solo
+      cubre trabajos de otros workers y reintentos.
+    - Un trabajo con `target` solo lo reclama ese worker (p. ej. el que tiene
+      el socket del destinatario); si no lo toma en OUTBOX_LEASE_SECONDS
+      (worker caído), cualquiera puede hacerlo.
+    """
+
+    def __init__(self, batch_size: int = OUTBOX_BATCH_SIZE, concurrency: int = OUTBOX_CONCURRENCY):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.handlers: Dict[str, Callable[[dict, str], Awaitable[None]]] = {}
+        self.owner = uuid.uuid4().hex
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def handler(self, kind: str):
+        """Registra la función que procesa los trabajos de un tipo"""
+        def register(func):
+            self.handlers[kind] = func
+            return func
+        return register
+
+    async def enqueue(self, kind: str, payload: dict, key: str, delay: float = 0, target: Optional[str] = None):
+        """Encola un trabajo; con `delay` queda disponible hasta pasados esos segundos"""
+        now = datetime.utcnow()
+        job = {
+            "key": key,
+            "kind": kind,
+            "payload": payload,
+            "status": PENDING,
+            "attempts": 0,
+            "available_at": now + timedelta(seconds=delay),
+            "created_at": now
+        }
+        if target is not None:
+            job["target"] = target
+            job["target_until"] = job["available_at"] + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        try:
+            await outbox_collection.insert_one(job)
+        except DuplicateKeyError:
+            logger.debug("🔁 Trabajo duplicado ignorado: %s", key)
+            return
+        if not delay and target in (None, self.owner):
+            self._wake.set()
+
+    async def _ensure_indexes(self):
+        await outbox_collection.create_index("key", unique=True)
+        await outbox_collection.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+        # Solo los trabajos terminados tienen processed_at y expiran
+        await outbox_collection.create_index(
+            "processed_at", expireAfterSeconds=OUTBOX_RETENTION_HOURS * 3600
+        )
+
+    async def claim_batch(self) -> list:
+        """Reclama hasta batch_size trabajos disponibles (pendientes o con lease vencido)"""
+        now = datetime.utcnow()
+        claimable = {
+            "$and": [
+                {"$or": [
+                    {"status": PENDING, "available_at": {"$lte": now}},
+                    {"status": PROCESSING, "lease_until": {"$lt": now}}
+                ]},
+                {"$or": [
+                    {"target": None},
+                    {"target": self.owner},
+                    {"target_until": {"$lt": now}}
+                ]}
+            ]
+        }
+        candidates = await outbox_collection.find(claimable, {"_id": 1})\
+            .sort("available_at", 1)\
+            .limit(self.batch_size)\
+            .to_list(length=self.batch_size)
+        if not candidates:
+            return []
+
+        claim = uuid.uuid4().hex
+        await outbox_collection.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in candidates]}, **claimable},
+            {
+                "$set": {
+                    "status": PROCESSING,
+                    "claim": claim,
+                    "owner": self.owner,
+                    "lease_until": now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+                },
+                "$inc": {"attempts": 1}
+            }
+        )
+        # Otro worker pudo ganar parte del lote: quedarse solo con lo reclamado
+        return await outbox_collection.find({"claim": claim}).to_list(length=self.batch_size)
+
+    async def _process(self, job: dict):
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise RuntimeError(f"Sin handler para '{job['kind']}'")
+            await handler(job["payload"], job["key"])
+        except Exception as e:
+            attempts = job.get("attempts", 1)
+            failed = attempts >= OUTBOX_MAX_ATTEMPTS
+            logger.warning(
+                "⚠️ Trabajo %s falló (intento %s): %s", job["key"], attempts, e,
+                extra={"outbox_kind": job["kind"]}
+            )
+            update = {
+                "status": FAILED if failed else PENDING,
+                "last_error": str(e)[:500],
+                "available_at": datetime.utcnow() + timedelta(seconds=retry_delay(attempts))
+            }
+            if failed:
+                update["processed_at"] = datetime.utcnow()
+            await outbox_collection.update_one(
+                {"_id": job["_id"], "claim": job["claim"]},
+                {"$set": update, "$unset": {"lease_until": ""}}
+            )
+            return
+
+        await outbox_collection.update_one(
+            {"_id": job["_id"], "claim": job["claim"]},
+            {"$set": {"status": DONE, "processed_at": datetime.utcnow()}, "$unset": {"lease_until": ""}}
+        )
+
+    async def run_once(self) -> int:
+        jobs = await self.claim_batch()
+        if jobs:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def bounded(job):
+                async with semaphore:
+                    await self._process(job)
+
+            await asyncio.gather(*(bounded(job) for job in jobs))
+        return len(jobs)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.warning("⚠️ Error leyendo el outbox: %s", e)
+                processed = 0
+
+            # Lote lleno: probablemente hay más trabajo, seguir sin esperar
+            if processed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        try:
+            await self._ensure_indexes()
+        except Exception as e:
+            logger.warning("⚠️ No se pudieron crear los índices del outbox: %s", e)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Instancia global
+outbox = Outbox()
@@ -0,0 +1,171 @@
+# app/utils/outbox_handlers.py
+# Efectos secundarios que las rutas encolan en el outbox en lugar de
+# ejecutarlos dentro del request.
+import logging
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.database import user_collection, notification_collection, post_collection, comment_collection
+from app.utils.outbox import outbox
+from app.utils.notifications import add_actor, counted_group, mark_delivered, remove_actor, render_message, publish_notification
+from app.config import PUSH_DEBOUNCE_SECONDS
+from app.utils.push_notifications import send_push_notification
+from app.utils.websocket_manager import manager
+from app.utils.presence import presence
+
+logger = logging.getLogger(__name__)
+
+
+async def _push_to_user(user_id: ObjectId, push: dict):
+    recipient = await user_collection.find_one({"_id": user_id}, {"expo_push_token": 1})
+    if recipient and recipient.get("expo_push_token"):
+        await send_push_notification(token=recipient["expo_push_token"], **push)
+
+
+async def _still_valid(notification: dict) -> bool:
+    """
+    Los trabajos se procesan en paralelo: si el like, follow o comentario se
+    deshizo antes de procesar la notificación, ya no se crea
+    """
+    kind = notification["type"]
+    if kind == "like":
+        query = {"_id": notification["post_id"], "likes": notification["from_user"]}
+        return await post_collection.find_one(query, {"_id": 1}) is not None
+    if kind == "follow":
+        query = {"_id": notification["from_user"], "following": notification["to_user"]}
+        return await user_collection.find_one(query, {"_id": 1}) is not None
+    if kind == "comment":
+        return await comment_collection.find_one({"_id": notification["comment_id"]}, {"_id": 1}) is not None
+    return True
+
+
+async def _push_debounced(to_user: ObjectId, push: dict):
+    """
+    Máximo un push por destinatario cada PUSH_DEBOUNCE_SECONDS; lo que llegue
+    en medio se resume en un solo push al final del intervalo
+    """
+    now = datetime.utcnow()
+    before = await user_collection.find_one_and_update(
+        {
+            "_id": to_user,
+            "$or": [
+                {"last_push_at": {"$lt": now - timedelta(seconds=PUSH_DEBOUNCE_SECONDS)}},
+                {"last_push_at": {"$exists": False}}
+            ]
+        },
+        {"$set": {"last_push_at": now}},
+        projection={"last_push_at": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is not None:
+        try:
+            await _push_to_user(to_user, push)
+        except Exception:
+            # El push no salió: devolver el intervalo para que el reintento pueda enviarlo
+            restore = {"$set": {"last_push_at": before["last_push_at"]}} if "last_push_at" in before \
+                else {"$unset": {"last_push_at": ""}}
+            await user_collection.update_one({"_id": to_user, "last_push_at": now}, restore)
+            raise
+        return
+
+    interval = int(now.timestamp()) // PUSH_DEBOUNCE_SECONDS
+    await outbox.enqueue(
+        "push_digest", {"to_user": to_user},
+        key=f"digest:{to_user}:{interval}", delay=PUSH_DEBOUNCE_SECONDS
+    )
+
+
+@outbox.handler("notify")
+async def handle_notify(payload: dict, key: str):
+    """Agrega el actor a la notificación agrupada y envía el push (con debounce)"""
+    notification = payload["notification"]
+    if not await _still_valid(notification):
+        return
+
+    group = await add_actor(notification, key)
+    if group is None:
+        # Actor ya en el grupo. Si lo contó este mismo trabajo es un reintento:
+        # la entrega (evento en vivo y push) se repite hasta que salga una vez.
+        # Si llegó por otra acción (like/unlike/like), no se notifica de nuevo
+        group = await counted_group(notification, key)
+        if group is None or group["delivered"]:
+            return
+
+    actor = payload["actor"]
+    await publish_notification(notification, group, actor)
+
+    push = payload.get("push")
+    if push:
+        if group["actors_count"] > 1:
+            push = {**push, "body": render_message(
+                notification["type"], actor["username"], group["actors_count"], push["body"]
+            )}
+        await _push_debounced(notification["to_user"], push)
+
+    await mark_delivered(group["id"], key)
+
+
+@outbox.handler("push_digest")
+async def handle_push_digest(payload: dict, key: str):
+    """Push de resumen con lo acumulado desde el último push"""
+    to_user = payload["to_user"]
+    user = await user_collection.find_one({"_id": to_user}, {"last_push_at": 1, "expo_push_token": 1})
+    if not user:
+        return
+
+    pending = await notification_collection.count_documents({
+        "to_user": to_user,
+        "read": False,
+        "created_at": {"$gt": user.get("last_push_at", datetime.min)}
+    })
+    if pending and user.get("expo_push_token"):
+        await send_push_notification(
+            token=user["expo_push_token"],
+            title="SkillSwap",
+            body=f"Tienes {pending} notificaciones nuevas" if pending > 1 else "Tienes una notificación nueva",
+            data={"type": "digest"}
+        )
+    # Después del envío: si falla, el reintento vuelve a contar desde el último push real
+    await user_collection.update_one({"_id": to_user}, {"$set": {"last_push_at": datetime.utcnow()}})
+
+
+@outbox.handler("unnotify")
+async def handle_unnotify(payload: dict, key: str):
+    """Quita al actor de la notificación agrupada de una acción que se deshizo"""
+    if payload["type"] == "comment":
+        # Solo si ya no le quedan comentarios en el post
+        remaining = await comment_collection.find_one(
+            {"post_id": payload["post_id"], "user_id": payload["from_user"]}, {"_id": 1}
+        )
+        if remaining:
+            return
+
+    await remove_actor(payload["to_user"], payload["type"], payload["from_user"], payload.get("post_id"))
+
+
+@outbox.handler("deliver_message")
+async def handle_deliver_message(payload: dict, key: str):
+    """
+    Entrega en tiempo real a todos los sockets del destinatario: los de este
+    worker directamente y, por cada otro worker con sockets suyos, un trabajo
+    dirigido a ese worker. El push queda para cuando no está conectado en ninguno.
+    """
+    recipient_id = payload["recipient_id"]
+    delivered = manager.is_user_online(recipient_id)
+    if delivered:
+        await manager.send_personal_message(payload["websocket_message"], recipient_id)
+
+    if payload.get("routed"):
+        # Ya se repartió desde el worker de origen: aquí solo falta el push si
+        # el usuario se desconectó de todos lados mientras tanto
+        if delivered or await presence.online_workers(recipient_id):
+            return
+    else:
+        workers = [worker for worker in await presence.online_workers(recipient_id) if worker != outbox.owner]
+        for worker in workers:
+            await outbox.enqueue("deliver_message", {**payload, "routed": True}, key=f"{key}:{worker}", target=worker)
+        if delivered or workers:
+            return
+
+    if payload.get("push"):
+        await _push_to_user(ObjectId(recipient_id), payload["push"])
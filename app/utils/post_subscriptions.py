@@ -0,0 +1,118 @@
+# app/utils/post_subscriptions.py
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Set
+from bson import ObjectId
+from fastapi import WebSocket
+from app.database import post_collection
+from app.utils.websocket_manager import manager
+from app.utils.sharded_counters import sharded_counters
+from app.config import POST_COUNTS_INTERVAL_SECONDS, POST_SUBSCRIPTIONS_MAX
+
+logger = logging.getLogger(__name__)
+
+
+class PostSubscriptions:
+    """
+    Contadores en vivo de los posts que cada cliente tiene en pantalla.
+
+    - El cliente envía `subscribe_posts` con los ids visibles; cada frame
+      reemplaza la suscripción anterior del socket.
+    - Las rutas de likes y comentarios solo marcan el post como cambiado
+      (`touch`). Cada POST_COUNTS_INTERVAL_SECONDS se leen los contadores de
+      todos los posts cambiados en una consulta y se envía un `post_counts`
+      por post: un post viral con cientos de likes por segundo genera un
+      envío por intervalo, no uno por like.
+    - Las suscripciones viven en este proceso, igual que las conexiones del manager.
+    """
+
+    def __init__(self):
+        # {post_id: sockets suscritos}
+        self._subscribers: Dict[str, Set[WebSocket]] = {}
+        # {websocket: post_ids suscritos}
+        self._by_socket: Dict[WebSocket, Set[str]] = {}
+        # Posts con cambios desde el último envío
+        self._dirty: Set[str] = set()
+        self._task = None
+
+    def subscribe(self, websocket: WebSocket, post_ids: Iterable) -> List[str]:
+        """Reemplaza los posts suscritos del socket; retorna los ids aceptados"""
+        accepted = []
+        for post_id in post_ids:
+            if len(accepted) >= POST_SUBSCRIPTIONS_MAX:
+                break
+            if isinstance(post_id, str) and ObjectId.is_valid(post_id) and post_id not in accepted:
+                accepted.append(post_id)
+
+        self.drop(websocket)
+        if accepted:
+            self._by_socket[websocket] = set(accepted)
+            for post_id in accepted:
+                self._subscribers.setdefault(post_id, set()).add(websocket)
+        return accepted
+
+    def drop(self, websocket: WebSocket):
+        for post_id in self._by_socket.pop(websocket, ()):
+            sockets = self._subscribers.get(post_id)
+            if sockets is not None:
+                sockets.discard(websocket)
+                if not sockets:
+                    del self._subscribers[post_id]
+
+    def touch(self, post_id):
+        """Marca que cambiaron los contadores del post (sin costo si nadie lo mira)"""
+        post_id = str(post_id)
+        if post_id in self._subscribers:
+            self._dirty.add(post_id)
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+
+        ids = [ObjectId(post_id) for post_id in dirty if post_id in self._subscribers]
+        if not ids:
+            return
+
+        posts = await post_collection.find(
+            {"_id": {"$in": ids}}, {"likes_count": 1, "comments_count": 1, "counter_folds": 1}
+        ).to_list(length=len(ids))
+        await sharded_counters.apply_pending(posts)
+
+        # Todos los posts a la vez: send_many ya reparte por socket con timeout
+        sends = []
+        for post in posts:
+            post_id = str(post["_id"])
+            sockets = self._subscribers.get(post_id)
+            if not sockets:
+                continue
+            sends.append(manager.send_many(list(sockets), {
+                "type": "post_counts",
+                "data": {
+                    "post_id": post_id,
+                    "likes_count": max(0, post.get("likes_count", 0)),
+                    "comments_count": max(0, post.get("comments_count", 0))
+                }
+            }))
+        await asyncio.gather(*sends)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(POST_COUNTS_INTERVAL_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("⚠️ Error enviando contadores de posts: %s", e)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Instancia global
+post_subscriptions = PostSubscriptions()
@@ -0,0 +1,268 @@
+# app/utils/presence.py
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from cachetools import TTLCache
+from fastapi import WebSocket
+from pymongo import UpdateOne
+from app.database import user_collection, online_collection
+from app.utils.websocket_manager import manager
+from app.utils.outbox import outbox
+from app.config import (
+    PRESENCE_TIMEOUT_SECONDS,
+    PRESENCE_SWEEP_SECONDS,
+    PRESENCE_FLUSH_SECONDS,
+    USERNAME_CACHE_SIZE,
+    USERNAME_CACHE_TTL_SECONDS,
+    TYPING_INTERVAL_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Código de cierre para sockets sin heartbeat
+CLOSE_HEARTBEAT_TIMEOUT = 4008
+
+# Un worker que deja de refrescar sus usuarios en línea (caído) deja de contar tras esto
+ONLINE_TTL_SECONDS = PRESENCE_FLUSH_SECONDS * 3
+
+
+class Presence:
+    """
+    Presencia de los usuarios conectados por WebSocket.
+
+    - Las conexiones zombis las cierra el ping del protocolo (uvicorn
+      --ws-ping-interval/--ws-ping-timeout) sin frames de la app; el cierre
+      llega a la ruta como desconexión. Con PRESENCE_TIMEOUT_SECONDS > 0 además
+      se cierran los sockets que no envían ningún frame en ese tiempo, para
+      servidores sin ping de protocolo.
+    - `last_seen` se acumula en memoria y se escribe en lote cada
+      PRESENCE_FLUSH_SECONDS con un solo bulk_write, no una escritura por frame.
+    - Los eventos de escritura (`typing`) resuelven username → id por un cache
+      con TTL (un cambio de username en este proceso lo descarta con
+      `forget_user`) y se limitan a uno por par remitente/destinatario
+      cada TYPING_INTERVAL_SECONDS; el último estado del intervalo se envía al final.
+    - `online_users` guarda qué workers tienen socket de cada usuario (un
+      documento por usuario y worker, escrito al primer socket y borrado al
+      último). Cada flush renueva con un solo update_many los de los usuarios
+      conectados aquí; los de un worker caído o de un borrado fallido expiran
+      por TTL. El outbox lo usa para entregar en cada worker que tiene
+      sockets del usuario (`online_workers`).
+    """
+
+    def __init__(self):
+        # {websocket: (user_id, último heartbeat en time.monotonic())}
+        self._sockets: Dict[WebSocket, Tuple[str, float]] = {}
+        # {user_id: datetime} pendientes de escribir
+        self._last_seen: Dict[str, datetime] = {}
+        # {username: user_id}
+        self._usernames = TTLCache(maxsize=USERNAME_CACHE_SIZE, ttl=USERNAME_CACHE_TTL_SECONDS)
+        # {(sender_id, recipient_id): {"sent": bool, "pending": Optional[bool], "username": str}}
+        self._typing: Dict[Tuple[str, str], dict] = {}
+        # {user_id: token del documento en online_users de este worker}
+        self._online_tokens: Dict[str, str] = {}
+        self._tasks = []
+
+    # ---------------- Conexiones ----------------
+
+    async def connect(self, websocket: WebSocket, user_id: str, codec):
+        await manager.connect(websocket, user_id, codec)
+        self._sockets[websocket] = (user_id, time.monotonic())
+        self._last_seen[user_id] = datetime.utcnow()
+
+        if user_id not in self._online_tokens:
+            token = self._online_tokens[user_id] = uuid.uuid4().hex
+            try:
+                await online_collection.update_one(
+                    {"_id": f"{user_id}:{outbox.owner}"},
+                    {"$set": {
+                        "user_id": user_id,
+                        "worker": outbox.owner,
+                        "token": token,
+                        "expires_at": datetime.utcnow() + timedelta(seconds=ONLINE_TTL_SECONDS)
+                    }},
+                    upsert=True
+                )
+            except Exception as e:
+                logger.warning("⚠️ No se pudo registrar a %s en línea: %s", user_id, e)
+
+    def disconnect(self, websocket: WebSocket, user_id: str):
+        """Idempotente: el barrido de zombis y el cierre de la ruta pueden llegar los dos"""
+        if self._sockets.pop(websocket, None) is None:
+            return
+        manager.disconnect(websocket, user_id)
+        self._last_seen[user_id] = datetime.utcnow()
+
+        if not any(owner == user_id for owner, _ in self._sockets.values()):
+            token = self._online_tokens.pop(user_id, None)
+            if token is not None:
+                asyncio.create_task(self._forget_online(user_id, token))
+
+    async def _forget_online(self, user_id: str, token: str):
+        # Con el token: si el usuario ya reconectó aquí, el documento nuevo no se borra
+        try:
+            await online_collection.delete_one({"_id": f"{user_id}:{outbox.owner}", "token": token})
+        except Exception as e:
+            logger.warning("⚠️ No se pudo quitar a %s de en línea: %s", user_id, e)
+
+    async def online_workers(self, user_id: str) -> List[str]:
+        """Workers con algún socket del usuario (incluido este, si lo tiene)"""
+        docs = await online_collection.find(
+            {"user_id": user_id, "expires_at": {"$gt": datetime.utcnow()}}, {"worker": 1}
+        ).to_list(length=None)
+        return [doc["worker"] for doc in docs]
+
+    def beat(self, websocket: WebSocket):
+        entry = self._sockets.get(websocket)
+        if entry is not None:
+            self._sockets[websocket] = (entry[0], time.monotonic())
+            self._last_seen[entry[0]] = datetime.utcnow()
+
+    async def sweep(self):
+        """Cierra los sockets sin heartbeat reciente"""
+        deadline = time.monotonic() - PRESENCE_TIMEOUT_SECONDS
+        expired = [(ws, user_id) for ws, (user_id, seen) in self._sockets.items() if seen < deadline]
+
+        for websocket, user_id in expired:
+            self.disconnect(websocket, user_id)
+            try:
+                # El otro extremo puede no responder nunca: no esperar el cierre indefinidamente
+                await asyncio.wait_for(
+                    websocket.close(code=CLOSE_HEARTBEAT_TIMEOUT, reason="Sin heartbeat"), timeout=5
+                )
+            except Exception:
+                pass
+
+        if expired:
+            logger.info("🧟 %s sockets cerrados por falta de heartbeat", len(expired))
+
+    async def flush(self):
+        """Renueva los usuarios en línea de este worker y escribe en lote los last_seen acumulados"""
+        if self._online_tokens:
+            # Solo los documentos vigentes: uno que quedó de una desconexión
+            # (borrado fallido) deja de renovarse y expira por TTL
+            await online_collection.update_many(
+                {
+                    "worker": outbox.owner,
+                    "user_id": {"$in": list(self._online_tokens)},
+                    "token": {"$in": list(self._online_tokens.values())}
+                },
+                {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=ONLINE_TTL_SECONDS)}}
+            )
+        if not self._last_seen:
+            return
+        pending, self._last_seen = self._last_seen, {}
+
+        # $max: un worker con datos más viejos no retrocede el last_seen
+        await user_collection.bulk_write(
+            [UpdateOne({"_id": ObjectId(user_id)}, {"$max": {"last_seen": seen}}) for user_id, seen in pending.items()],
+            ordered=False
+        )
+
+    # ---------------- Typing ----------------
+
+    async def resolve_username(self, username: str) -> Optional[str]:
+        user_id = self._usernames.get(username)
+        if user_id is not None:
+            return user_id
+
+        user = await user_collection.find_one({"username": username}, {"_id": 1})
+        if user is None:
+            return None
+        user_id = str(user["_id"])
+        self._usernames[username] = user_id
+        return user_id
+
+    def forget_user(self, user_id: str):
+        """
+        Descarta el username cacheado de un usuario que lo cambió (es raro: basta
+        recorrer). Solo en este proceso: los demás workers siguen resolviendo el
+        nombre viejo hasta que expira su entrada, así que USERNAME_CACHE_TTL_SECONDS
+        acota cuánto dura un username viejo entre workers.
+        """
+        for username, cached_id in list(self._usernames.items()):
+            if cached_id == user_id:
+                self._usernames.pop(username, None)
+
+    async def typing(self, sender_id: str, sender_username: str, recipient_username: str, is_typing: bool):
+        recipient_id = await self.resolve_username(recipient_username)
+        if recipient_id is None or not manager.is_user_online(recipient_id):
+            return
+
+        key = (sender_id, recipient_id)
+        state = self._typing.get(key)
+        if state is not None:
+            # Dentro del intervalo: solo se guarda el último estado
+            state["pending"] = is_typing
+            return
+
+        self._typing[key] = {"sent": is_typing, "pending": None, "username": sender_username}
+        await self._send_typing(recipient_id, sender_username, is_typing)
+        asyncio.get_running_loop().call_later(TYPING_INTERVAL_SECONDS, self._typing_window_closed, key)
+
+    def _typing_window_closed(self, key: Tuple[str, str]):
+        state = self._typing.get(key)
+        if state is None:
+            return
+
+        pending = state["pending"]
+        if pending is None or pending == state["sent"]:
+            del self._typing[key]
+            return
+
+        # Cambió el estado durante el intervalo: enviarlo y abrir otro intervalo
+        state["sent"], state["pending"] = pending, None
+        asyncio.create_task(self._send_typing(key[1], state["username"], pending))
+        asyncio.get_running_loop().call_later(TYPING_INTERVAL_SECONDS, self._typing_window_closed, key)
+
+    async def _send_typing(self, recipient_id: str, sender_username: str, is_typing: bool):
+        await manager.send_personal_message({
+            "type": "user_typing",
+            "data": {
+                "sender_username": sender_username,
+                "is_typing": is_typing
+            }
+        }, recipient_id)
+
+    # ---------------- Tareas de fondo ----------------
+
+    async def _run_every(self, seconds: float, func):
+        while True:
+            await asyncio.sleep(seconds)
+            try:
+                await func()
+            except Exception as e:
+                logger.warning("⚠️ Error en presencia (%s): %s", func.__name__, e)
+
+    async def start(self):
+        try:
+            await online_collection.create_index("user_id")
+            await online_collection.create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            logger.warning("⚠️ No se pudieron crear los índices de online_users: %s", e)
+        self._tasks = [asyncio.create_task(self._run_every(PRESENCE_FLUSH_SECONDS, self.flush))]
+        if PRESENCE_TIMEOUT_SECONDS > 0:
+            self._tasks.append(asyncio.create_task(self._run_every(PRESENCE_SWEEP_SECONDS, self.sweep)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Último lote antes de apagar
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning("⚠️ No se pudo guardar last_seen al apagar: %s", e)
+        try:
+            await online_collection.delete_many({"worker": outbox.owner})
+        except Exception as e:
+            logger.warning("⚠️ No se pudieron quitar los usuarios en línea al apagar: %s", e)
+
+
+# Instancia global
+presence = Presence()
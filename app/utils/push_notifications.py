@@ -2,6 +2,11 @@ import httpx
 
 EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
 
+
+class PushNotificationError(Exception):
+    """Expo rechazó la notificación; el outbox la reintenta"""
+
+
 async def send_push_notification(token: str, title: str, body: str, data: dict = {}):
     message = {
         "to": token,
@@ -11,7 +16,7 @@ async def send_push_notification(token: str, title: str, body: str, data: dict =
         "data": data,
     }
 
-    async with httpx.AsyncClient() as client:
+    async with httpx.AsyncClient(timeout=10) as client:
         response = await client.post(EXPO_PUSH_URL, json=message)
         if response.status_code != 200:
-            print("Error al enviar notificación:", response.text)
+            raise PushNotificationError(f"Error al enviar notificación ({response.status_code}): {response.text}")
@@ -1,7 +1,108 @@
+import asyncio
+import logging
+import math
+import statistics
+import time
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from app.config import (
+    BCRYPT_MAX_WORKERS,
+    BCRYPT_MAX_PENDING,
+    BCRYPT_TARGET_MS,
+    BCRYPT_MIN_ROUNDS,
+    BCRYPT_MAX_ROUNDS,
+    BCRYPT_ROUNDS
+)
+
+logger = logging.getLogger(__name__)
+
+# bcrypt libera el GIL, así que un pool de hilos basta para sacarlo del event loop
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+
+# Operaciones en curso o en cola (solo se modifica desde el event loop)
+_pending = 0
+
+# Costo actual; se recalibra al arrancar si no hay BCRYPT_ROUNDS fijo
+_rounds = int(BCRYPT_ROUNDS) if BCRYPT_ROUNDS else 12
+
+# Mediciones del costo mínimo al calibrar (se usa la mediana)
+CALIBRATION_SAMPLES = 5
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=_rounds)).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+def get_hash_rounds(hashed: str) -> int:
+    """Extrae el costo de un hash bcrypt ($2b$12$...)"""
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+def needs_rehash(hashed: str) -> bool:
+    """
+    Indica si el hash guardado usa un costo menor al actual. Solo hacia
+    arriba: cada worker calibra por su cuenta y dos workers pueden quedar a
+    una ronda de distancia; con != cada login reescribiría la contraseña.
+    """
+    return get_hash_rounds(hashed) < _rounds
+
+def calibrate_rounds(target_ms: float = BCRYPT_TARGET_MS, samples: int = CALIBRATION_SAMPLES) -> int:
+    """
+    Calcula el mayor costo cuyo hash tarda como máximo target_ms.
+    Cada ronda extra duplica el tiempo, así que basta medir el costo mínimo;
+    se toma la mediana de varias mediciones para no calibrar con una pausa
+    del sistema.
+    """
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=BCRYPT_MIN_ROUNDS))
+        timings.append((time.perf_counter() - started) * 1000)
+    elapsed_ms = max(statistics.median(timings), 0.001)
+
+    extra = math.floor(math.log2(target_ms / elapsed_ms)) if target_ms > elapsed_ms else 0
+    return max(BCRYPT_MIN_ROUNDS, min(BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS + extra))
+
+async def calibrate_bcrypt_cost() -> int:
+    """Ajusta el costo de bcrypt al objetivo de latencia (se llama al arrancar)"""
+    global _rounds
+
+    if BCRYPT_ROUNDS:
+        logger.info("🔐 Costo bcrypt fijo: %s", _rounds)
+        return _rounds
+
+    loop = asyncio.get_running_loop()
+    _rounds = await loop.run_in_executor(_executor, calibrate_rounds, BCRYPT_TARGET_MS)
+    logger.info("🔐 Costo bcrypt calibrado: %s (objetivo %.0fms)", _rounds, BCRYPT_TARGET_MS)
+    return _rounds
+
+async def _run_bounded(func, *args):
+    """Ejecuta func en el pool de bcrypt; responde 503 si la cola está llena"""
+    global _pending
+
+    if _pending >= BCRYPT_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, intenta de nuevo en unos segundos",
+            headers={"Retry-After": "1"}
+        )
+
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        _pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_bounded(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _run_bounded(verify_password, password, hashed)
+
+def shutdown_executor():
+    _executor.shutdown(wait=False, cancel_futures=True)
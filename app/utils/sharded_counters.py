@@ -0,0 +1,196 @@
+# app/utils/sharded_counters.py
+import asyncio
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from bson import ObjectId
+from cachetools import TTLCache
+from pymongo import ReturnDocument
+from app.database import post_collection, post_counter_collection
+from app.config import (
+    SHARDED_COUNTERS_ENABLED,
+    COUNTER_SHARDS,
+    COUNTER_HOT_THRESHOLD,
+    COUNTER_HOT_WINDOW_SECONDS,
+    COUNTER_HOT_TTL_SECONDS,
+    COUNTER_FOLD_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Campos del post que pueden ir por shards. likes_count no: el like ya escribe
+# el array de likes del post, así que sus shards no quitarían contención
+COUNTER_FIELDS = ("comments_count",)
+
+# Un fold que no termina en este tiempo (worker caído) lo retoma otro
+FOLD_LEASE_SECONDS = 60
+
+
+def _frozen(field: str) -> str:
+    """Campo del shard con el valor que se está consolidando"""
+    return f"folding_{field}"
+
+
+class ShardedCounters:
+    """
+    Contadores por shards para posts calientes (comments_count).
+
+    - Cada escritura del contador pasa por `is_hot`, que cuenta las
+      escrituras por post en ventanas de COUNTER_HOT_WINDOW_SECONDS. Al
+      superar COUNTER_HOT_THRESHOLD el post queda caliente por
+      COUNTER_HOT_TTL_SECONDS (se renueva mientras siga el ritmo). La
+      detección es por worker: los dos caminos terminan en el mismo campo.
+    - Con el post caliente, el `$inc` va a uno de COUNTER_SHARDS documentos de
+      `post_counters` elegido al azar, en lugar del documento del post.
+    - Cada COUNTER_FOLD_SECONDS cada shard se consolida en tres pasos: se
+      reclama (el valor pasa a `folding_<campo>` en la misma escritura, con
+      un lease), se suma al post marcando el reclamo en `counter_folds` (un
+      reintento del mismo reclamo no suma dos veces) y se libera. Si el
+      worker cae a mitad, otro retoma el reclamo vencido: no se pierde ni se
+      duplica nada. Los incrementos que llegan mientras tanto van al campo vivo.
+    - El detalle y las listas muestran el valor consolidado, con a lo más
+      COUNTER_FOLD_SECONDS de atraso; los contadores en vivo suman los
+      shards pendientes (`apply_pending`).
+    """
+
+    def __init__(self, shards: int = COUNTER_SHARDS):
+        self.shards = shards
+        # {post_id: escrituras en la ventana actual}
+        self._writes: Dict[str, int] = {}
+        self._window = 0
+        # {post_id: True} mientras el post está caliente
+        self._hot = TTLCache(maxsize=10000, ttl=COUNTER_HOT_TTL_SECONDS)
+        self._task = None
+
+    def is_hot(self, post_id) -> bool:
+        """Registra una escritura del post y dice si sus contadores van por shards"""
+        if not SHARDED_COUNTERS_ENABLED:
+            return False
+
+        post_id = str(post_id)
+        window = int(time.monotonic() // COUNTER_HOT_WINDOW_SECONDS)
+        if window != self._window:
+            self._window = window
+            self._writes.clear()
+
+        writes = self._writes[post_id] = self._writes.get(post_id, 0) + 1
+        if writes >= COUNTER_HOT_THRESHOLD:
+            if post_id not in self._hot:
+                logger.info("🔥 Post %s caliente: contadores por shards", post_id, extra={"post_id": post_id})
+            self._hot[post_id] = True
+        return post_id in self._hot
+
+    async def add(self, post_id: ObjectId, field: str, delta: int):
+        shard = random.randrange(self.shards)
+        await post_counter_collection.update_one(
+            {"_id": f"{post_id}:{shard}"},
+            {"$inc": {field: delta}, "$setOnInsert": {"post_id": post_id}},
+            upsert=True
+        )
+
+    async def apply_pending(self, posts: list):
+        """
+        Suma en cada post (in-place) lo pendiente en shards. Consulta siempre:
+        otro worker pudo marcar el post como caliente sin que este lo viera.
+        Los posts deben traer `counter_folds` para no sumar dos veces un
+        reclamo que ya se aplicó al post pero aún no se libera.
+        """
+        if not posts:
+            return
+
+        by_id = {post["_id"]: post for post in posts}
+        async for shard in post_counter_collection.find({"post_id": {"$in": list(by_id)}}):
+            post = by_id[shard["post_id"]]
+            applied = (post.get("counter_folds") or {}).get(shard["_id"].rsplit(":", 1)[-1])
+            for field in COUNTER_FIELDS:
+                pending = shard.get(field, 0)
+                if shard.get("fold_claim") != applied:
+                    pending += shard.get(_frozen(field), 0)
+                if pending:
+                    post[field] = post.get(field, 0) + pending
+
+    async def _claim(self, shard_id: str) -> Optional[dict]:
+        """Reclama un shard para consolidarlo, o retoma un reclamo vencido"""
+        lease = {"fold_until": datetime.utcnow() + timedelta(seconds=FOLD_LEASE_SECONDS)}
+        shard = await post_counter_collection.find_one_and_update(
+            {"_id": shard_id, "fold_claim": {"$exists": False}},
+            {
+                "$rename": {field: _frozen(field) for field in COUNTER_FIELDS},
+                "$set": {"fold_claim": uuid.uuid4().hex, **lease}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        if shard is None:
+            # Mismo reclamo: si ya se sumó al post, el filtro de counter_folds lo salta
+            shard = await post_counter_collection.find_one_and_update(
+                {"_id": shard_id, "fold_until": {"$lt": datetime.utcnow()}},
+                {"$set": lease},
+                return_document=ReturnDocument.AFTER
+            )
+        return shard
+
+    async def fold_shard(self, shard_id: str):
+        shard = await self._claim(shard_id)
+        if shard is None:
+            return
+
+        claim = shard["fold_claim"]
+        increments = {field: shard[_frozen(field)] for field in COUNTER_FIELDS if shard.get(_frozen(field))}
+        if increments:
+            # counter_folds guarda el último reclamo aplicado por shard (a lo más COUNTER_SHARDS entradas)
+            marker = f"counter_folds.{shard_id.rsplit(':', 1)[-1]}"
+            await post_collection.update_one(
+                {"_id": shard["post_id"], marker: {"$ne": claim}},
+                {"$inc": increments, "$set": {marker: claim}}
+            )
+
+        await post_counter_collection.update_one(
+            {"_id": shard_id, "fold_claim": claim},
+            {"$unset": {"fold_claim": "", "fold_until": "", **{_frozen(field): "" for field in COUNTER_FIELDS}}}
+        )
+        # Sin incrementos nuevos el shard sobra; si llega uno después, el upsert lo recrea
+        await post_counter_collection.delete_one({
+            "_id": shard_id,
+            "fold_claim": {"$exists": False},
+            **{field: {"$in": [0, None]} for field in COUNTER_FIELDS}
+        })
+
+    async def fold(self):
+        """Pasa los shards acumulados a los posts"""
+        shard_ids = await post_counter_collection.find({}, {"_id": 1}).to_list(length=None)
+        for doc in shard_ids:
+            await self.fold_shard(doc["_id"])
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(COUNTER_FOLD_SECONDS)
+            try:
+                await self.fold()
+            except Exception as e:
+                logger.warning("⚠️ Error consolidando contadores: %s", e)
+
+    async def start(self):
+        try:
+            await post_counter_collection.create_index("post_id")
+        except Exception as e:
+            logger.warning("⚠️ No se pudo crear el índice de post_counters: %s", e)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        # Consolidar lo pendiente antes de apagar
+        try:
+            await self.fold()
+        except Exception as e:
+            logger.warning("⚠️ No se pudieron consolidar los contadores al apagar: %s", e)
+
+
+# Instancia global
+sharded_counters = ShardedCounters()
@@ -0,0 +1,177 @@
+# app/utils/skill_cooccurrence.py
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List
+import numpy as np
+from app.database import post_collection, user_collection
+from app.schemas.authSchema import PREDEFINED_SKILLS
+from app.utils.skill_matcher import NUM_SKILLS, skills_to_mask
+from app.config import (
+    SKILL_COOCCURRENCE_PATH,
+    SKILL_COOCCURRENCE_REBUILD_SECONDS,
+    RELATED_SKILLS_LIMIT
+)
+
+logger = logging.getLogger(__name__)
+
+# Documentos por bloque al recorrer posts y usuarios
+CHUNK_SIZE = 10000
+
+# Bit de cada habilidad, para pasar bloques de máscaras a matrices 0/1
+_BITS = np.left_shift(np.uint64(1), np.arange(NUM_SKILLS, dtype=np.uint64))
+
+
+def accumulate(counts: np.ndarray, masks: List[int]):
+    """Suma al conteo (in-place) los pares de habilidades de un bloque de máscaras"""
+    if not masks:
+        return
+    # float32 usa BLAS; es exacto mientras el bloque tenga menos de 2^24 documentos
+    present = ((np.array(masks, dtype=np.uint64)[:, None] & _BITS) != 0).astype(np.float32)
+    counts += (present.T @ present).astype(np.uint32)
+
+
+def _post_skills(post: dict) -> List[str]:
+    skills = post.get("skills") or {}
+    return (skills.get("offering") or []) + (skills.get("seeking") or [])
+
+
+def _user_skills(user: dict) -> List[str]:
+    return (user.get("interests_offered") or []) + (user.get("interests_wanted") or [])
+
+
+class SkillCooccurrence:
+    """
+    Habilidades relacionadas: cuántas veces aparecen juntas dos habilidades
+    en un mismo post (offering + seeking) o en los intereses de un usuario
+    (ofrece + busca).
+
+    - La matriz NUM_SKILLS × NUM_SKILLS (uint32, la diagonal es la frecuencia
+      de cada habilidad) se recalcula en segundo plano cada
+      SKILL_COOCCURRENCE_REBUILD_SECONDS recorriendo posts y usuarios por
+      bloques, sin cargar las colecciones en memoria.
+    - Se guarda en SKILL_COOCCURRENCE_PATH (.npz con los nombres de las
+      habilidades) y se carga al arrancar; un archivo de otra lista de
+      habilidades se descarta. Por defecto es data/skill_cooccurrence.npz,
+      fuera de git (/data/ en .gitignore): cada despliegue lo genera.
+    - Las relacionadas de cada habilidad se precalculan al cargar: la consulta
+      desde explore es un acceso a diccionario.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros((NUM_SKILLS, NUM_SKILLS), dtype=np.uint32)
+        # {skill: [{"skill_name", "score"}, ...]}
+        self._related: Dict[str, List[dict]] = {}
+        self._tasks = []
+
+    def related(self, skill_name: str) -> List[dict]:
+        return self._related.get(skill_name, [])
+
+    def set_counts(self, counts: np.ndarray):
+        """
+        Publica una matriz nueva. El puntaje es la similitud coseno entre
+        habilidades (co-ocurrencias / √(frecuencia_a · frecuencia_b)), para que
+        las habilidades más comunes no salgan relacionadas con todo.
+        """
+        frequency = np.sqrt(np.diag(counts).astype(np.float64))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = counts / np.outer(frequency, frequency)
+        scores = np.nan_to_num(scores, nan=0.0, posinf=0.0)
+        np.fill_diagonal(scores, 0.0)
+
+        related = {}
+        for i, skill in enumerate(PREDEFINED_SKILLS):
+            order = np.argsort(-scores[i], kind="stable")[:RELATED_SKILLS_LIMIT]
+            related[skill] = [
+                {"skill_name": PREDEFINED_SKILLS[j], "score": round(float(scores[i, j]), 3)}
+                for j in order if j != i and counts[i, j] > 0
+            ]
+
+        self.counts = counts
+        self._related = related
+
+    # ---------------- Archivo ----------------
+
+    def load(self) -> bool:
+        if not os.path.exists(SKILL_COOCCURRENCE_PATH):
+            return False
+        try:
+            with np.load(SKILL_COOCCURRENCE_PATH) as data:
+                skills, counts = list(data["skills"]), data["counts"]
+        except Exception as e:
+            logger.warning("⚠️ No se pudo leer %s: %s", SKILL_COOCCURRENCE_PATH, e)
+            return False
+
+        if skills != PREDEFINED_SKILLS or counts.shape != (NUM_SKILLS, NUM_SKILLS):
+            logger.info("🔁 La matriz de habilidades guardada es de otra lista de habilidades; se recalcula")
+            return False
+
+        self.set_counts(counts.astype(np.uint32))
+        return True
+
+    def save(self):
+        """Bloqueante (np.savez + os.replace): desde el loop va en asyncio.to_thread"""
+        directory = os.path.dirname(SKILL_COOCCURRENCE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Escribir aparte y reemplazar: otro worker nunca lee un archivo a medias
+        tmp_path = f"{SKILL_COOCCURRENCE_PATH}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, skills=np.array(PREDEFINED_SKILLS), counts=self.counts)
+        os.replace(tmp_path, SKILL_COOCCURRENCE_PATH)
+
+    # ---------------- Reconstrucción ----------------
+
+    async def rebuild(self):
+        started = time.perf_counter()
+        counts = np.zeros((NUM_SKILLS, NUM_SKILLS), dtype=np.uint32)
+        documents = 0
+
+        sources = [
+            (post_collection.find({"skills": {"$ne": None}}, {"skills": 1}), _post_skills),
+            (user_collection.find({}, {"interests_offered": 1, "interests_wanted": 1}), _user_skills)
+        ]
+        for cursor, skills_of in sources:
+            masks = []
+            async for doc in cursor.batch_size(5000):
+                mask = skills_to_mask(skills_of(doc))
+                if mask:
+                    masks.append(mask)
+                if len(masks) >= CHUNK_SIZE:
+                    accumulate(counts, masks)
+                    documents += len(masks)
+                    masks = []
+            accumulate(counts, masks)
+            documents += len(masks)
+
+        self.set_counts(counts)
+        await asyncio.to_thread(self.save)
+        logger.info(
+            "🧮 Matriz de habilidades recalculada: %s documentos en %.0f ms",
+            documents, (time.perf_counter() - started) * 1000
+        )
+
+    async def _run(self, rebuild_now: bool):
+        while True:
+            if rebuild_now:
+                try:
+                    await self.rebuild()
+                except Exception as e:
+                    logger.warning("⚠️ Error recalculando la matriz de habilidades: %s", e)
+            rebuild_now = True
+            await asyncio.sleep(SKILL_COOCCURRENCE_REBUILD_SECONDS)
+
+    async def start(self):
+        # Con archivo guardado se sirve de inmediato y se recalcula en el próximo ciclo
+        loaded = await asyncio.to_thread(self.load)
+        self._tasks = [asyncio.create_task(self._run(rebuild_now=not loaded))]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# Instancia global
+skill_cooccurrence = SkillCooccurrence()
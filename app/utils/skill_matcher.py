@@ -0,0 +1,396 @@
+# app/utils/skill_matcher.py
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from bson import ObjectId
+from app.database import user_collection
+from app.schemas.authSchema import PREDEFINED_SKILLS
+from app.config import SKILL_MATCHER_RELOAD_SECONDS, SKILL_MATCHER_COMPACT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Las 50 habilidades caben en un uint64 por usuario y lado (ofrece / busca)
+SKILL_BITS = {skill: 1 << i for i, skill in enumerate(PREDEFINED_SKILLS)}
+NUM_SKILLS = len(PREDEFINED_SKILLS)
+
+# Peso de la parte recíproca del puntaje: un match en ambos sentidos
+# siempre queda por encima de cualquier match en un solo sentido
+RECIPROCAL_WEIGHT = 2 * NUM_SKILLS + 1
+
+
+def skills_to_mask(skills: Optional[Iterable[str]]) -> int:
+    """Habilidades fuera de la lista predefinida se ignoran"""
+    mask = 0
+    for skill in skills or ():
+        mask |= SKILL_BITS.get(skill, 0)
+    return mask
+
+
+def mask_to_skills(mask: int) -> List[str]:
+    return [skill for skill, bit in SKILL_BITS.items() if mask & bit]
+
+
+# Niveles que `top_positions` baja el umbral antes de particionar
+THRESHOLD_LEVELS = 32
+
+
+def top_positions(scores: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Posiciones de los `limit` puntajes más altos (> 0), de mayor a menor.
+    Los puntajes son enteros chicos: se baja el umbral desde el máximo
+    contando (pasadas baratas sobre uint8) en lugar de ordenar o particionar
+    todo el arreglo.
+    """
+    top = int(scores.max()) if len(scores) else 0
+    threshold = top
+    while threshold > 1 and np.count_nonzero(scores >= threshold) < limit:
+        if top - threshold >= THRESHOLD_LEVELS:
+            # Puntajes muy dispersos (p. ej. un match recíproco y el resto de un
+            # solo sentido): bajar nivel por nivel ya no conviene
+            positive = np.flatnonzero(scores)
+            if len(positive) > limit:
+                positive = positive[np.argpartition(-scores[positive].astype(np.int32), limit - 1)[:limit]]
+            return positive[np.argsort(-scores[positive].astype(np.int32), kind="stable")]
+        threshold -= 1
+
+    above = np.flatnonzero(scores > threshold)
+    if len(above) > limit:
+        # Más niveles de los previstos (pocos candidatos y muy dispersos): particionar lo que queda
+        above = above[np.argpartition(-scores[above].astype(np.int32), limit - 1)[:limit]]
+    ties = np.flatnonzero(scores == threshold)[:limit - len(above)] if threshold > 0 else above[:0]
+    positions = np.concatenate([above, ties])
+    return positions[np.argsort(-scores[positions].astype(np.int32), kind="stable")]
+
+
+def score_rows(their_offered: np.ndarray, their_wanted: np.ndarray, my_offered: int, my_wanted: int, scratch: dict = None) -> np.ndarray:
+    """
+    Puntaje de cada fila con el mismo orden que la fórmula pública, pero con
+    el peso recíproco más chico posible para esta consulta
+    (get ≤ |W| y give ≤ |O|), de modo que casi siempre cabe en uint8.
+    `scratch` reutiliza buffers del tamaño del índice en lugar de reservar
+    arreglos de varios MB por consulta.
+    """
+    max_get, max_give = bin(my_wanted).count("1"), bin(my_offered).count("1")
+    weight = max_get + max_give + 1
+    dtype = np.uint8 if min(max_get, max_give) * weight + max_get + max_give <= 255 else np.uint16
+
+    count = len(their_offered)
+    if scratch is None:
+        bits = np.empty(count, dtype=np.uint64)
+        get = np.empty(count, dtype=np.uint8)
+        give = np.empty(count, dtype=np.uint8)
+        scores = np.empty(count, dtype=dtype)
+    else:
+        bits, get, give = scratch["bits"][:count], scratch["get"][:count], scratch["give"][:count]
+        scores = scratch[np.dtype(dtype).name][:count]
+
+    np.bitwise_and(their_offered, np.uint64(my_wanted), out=bits)
+    np.bitwise_count(bits, out=get)
+    np.bitwise_and(their_wanted, np.uint64(my_offered), out=bits)
+    np.bitwise_count(bits, out=give)
+
+    np.minimum(get, give, out=scores)
+    np.multiply(scores, dtype(weight), out=scores)
+    np.add(scores, get, out=scores)
+    np.add(scores, give, out=scores)
+    return scores
+
+
+class _SkillIndex:
+    """
+    Estado del índice: bitsets por usuario en arreglos NumPy más un índice
+    invertido habilidad → filas para cada lado.
+
+    Las listas invertidas se construyen de golpe (`compact`); los cambios de
+    perfil posteriores solo agregan filas en `added`. Una fila que dejó de
+    tener la habilidad queda en la lista hasta compactar, lo cual es inocuo:
+    el puntaje se calcula siempre con los bitsets, que sí están al día.
+
+    Para compactar sin bloquear el event loop: `begin_compact` copia los
+    bitsets y congela `added` en `frozen` (las consultas siguen leyendo
+    ambos), las listas se arman en un hilo y `finish_compact` las publica.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.offered = np.zeros(capacity, dtype=np.uint64)
+        self.wanted = np.zeros(capacity, dtype=np.uint64)
+        # ObjectId binario; "V12" no recorta los bytes nulos del final como "S12"
+        self.user_ids = np.zeros(capacity, dtype="V12")
+        self.size = 0
+        # {ObjectId binario: fila}
+        self.rows: Dict[bytes, int] = {}
+        empty = np.empty(0, dtype=np.int32)
+        self.postings = {"offered": [empty] * NUM_SKILLS, "wanted": [empty] * NUM_SKILLS}
+        self.added = self._empty_added()
+        # `added` de antes de la copia, mientras se compacta en un hilo
+        self.frozen: Optional[dict] = None
+        self.pending = 0
+        self._scratch = None
+
+    @staticmethod
+    def _empty_added() -> dict:
+        return {"offered": [set() for _ in range(NUM_SKILLS)], "wanted": [set() for _ in range(NUM_SKILLS)]}
+
+    def scratch(self) -> dict:
+        """Buffers para puntuar todo el arreglo (el event loop es un solo hilo: se comparten)"""
+        if self._scratch is None or len(self._scratch["bits"]) < self.size:
+            capacity = len(self.offered)
+            self._scratch = {
+                "bits": np.empty(capacity, dtype=np.uint64),
+                "get": np.empty(capacity, dtype=np.uint8),
+                "give": np.empty(capacity, dtype=np.uint8),
+                "uint8": np.empty(capacity, dtype=np.uint8),
+                "uint16": np.empty(capacity, dtype=np.uint16)
+            }
+        return self._scratch
+
+    def _grow(self, needed: int):
+        capacity = len(self.offered)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("offered", "wanted", "user_ids"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def bulk_load(self, keys: List[bytes], offered: List[int], wanted: List[int]):
+        self._grow(len(keys))
+        count = len(keys)
+        self.offered[:count] = np.array(offered, dtype=np.uint64)
+        self.wanted[:count] = np.array(wanted, dtype=np.uint64)
+        self.user_ids[:count] = keys
+        self.size = count
+        self.rows = {key: row for row, key in enumerate(keys)}
+        self.compact()
+
+    def set(self, key: bytes, offered: Optional[int], wanted: Optional[int]):
+        row = self.rows.get(key)
+        if row is None:
+            row = self.size
+            self._grow(row + 1)
+            self.user_ids[row] = key
+            self.rows[key] = row
+            self.size += 1
+            old_offered = old_wanted = 0
+        else:
+            old_offered, old_wanted = int(self.offered[row]), int(self.wanted[row])
+
+        for side, old, new in (("offered", old_offered, offered), ("wanted", old_wanted, wanted)):
+            if new is None:
+                continue
+            getattr(self, side)[row] = new
+            gained = new & ~old
+            for bit in range(NUM_SKILLS):
+                if gained >> bit & 1:
+                    self.added[side][bit].add(row)
+                    self.pending += 1
+
+    @staticmethod
+    def build_postings(offered: np.ndarray, wanted: np.ndarray) -> dict:
+        """Listas invertidas desde los bitsets (≈100 pasadas vectorizadas; no toca el índice)"""
+        return {
+            side: [np.flatnonzero(masks & np.uint64(1 << bit)).astype(np.int32) for bit in range(NUM_SKILLS)]
+            for side, masks in (("offered", offered), ("wanted", wanted))
+        }
+
+    def compact(self):
+        """Compactación síncrona, para índices que aún no están publicados"""
+        self.postings = self.build_postings(self.offered[:self.size], self.wanted[:self.size])
+        self.added = self._empty_added()
+        self.pending = 0
+
+    def begin_compact(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Copia los bitsets a compactar; los cambios desde aquí van a un `added` nuevo"""
+        self.frozen, self.added = self.added, self._empty_added()
+        self.pending = 0
+        return self.offered[:self.size].copy(), self.wanted[:self.size].copy()
+
+    def finish_compact(self, postings: Optional[dict]):
+        """Publica las listas nuevas, o con None (falló) devuelve lo congelado a `added`"""
+        if postings is None:
+            for side in ("offered", "wanted"):
+                for bit in range(NUM_SKILLS):
+                    self.added[side][bit] |= self.frozen[side][bit]
+        else:
+            self.postings = postings
+        self.frozen = None
+        self.pending = sum(len(rows) for side in self.added.values() for rows in side)
+
+    def candidates(self, offered: int, wanted: int) -> Optional[np.ndarray]:
+        """
+        Filas que ofrecen algo que busco o buscan algo que ofrezco.
+        None si son tantas que conviene recorrer todo el arreglo.
+        """
+        lists = []
+        added = [self.added] if self.frozen is None else [self.added, self.frozen]
+        for side, mask in (("offered", wanted), ("wanted", offered)):
+            for bit in range(NUM_SKILLS):
+                if mask >> bit & 1:
+                    lists.append(self.postings[side][bit])
+                    for rows in added:
+                        if rows[side][bit]:
+                            lists.append(np.fromiter(rows[side][bit], dtype=np.int32))
+
+        total = sum(len(rows) for rows in lists)
+        if total * 3 >= self.size:
+            return None
+        if not total:
+            return np.empty(0, dtype=np.int32)
+
+        # Marcar en un arreglo booleano deduplica sin ordenar
+        seen = np.zeros(self.size, dtype=bool)
+        for rows in lists:
+            seen[rows] = True
+        return np.flatnonzero(seen)
+
+
+class SkillMatcher:
+    """
+    Recomendaciones de intercambio de habilidades.
+
+    Puntaje entre el usuario actual (ofrece O, busca W) y otro usuario u:
+      get  = |O_u ∩ W|  (lo que u me puede enseñar)
+      give = |W_u ∩ O|  (lo que yo le puedo enseñar a u)
+      score = min(get, give) * RECIPROCAL_WEIGHT + get + give
+    Los intercambios en ambos sentidos van primero; entre ellos, más habilidades en común.
+
+    - El índice vive en memoria: se carga al arrancar (en segundo plano) y se
+      recarga cada SKILL_MATCHER_RELOAD_SECONDS para ver cambios de otros workers.
+    - Los cambios de perfil de este proceso se aplican con `update` al instante.
+    - Las consultas se vectorizan con np.bitwise_count sobre los candidatos del
+      índice invertido, o sobre todo el arreglo si los candidatos son muchos.
+    """
+
+    def __init__(self):
+        self.index = _SkillIndex()
+        self.ready = False
+        # Cambios recibidos mientras se recarga, para aplicarlos al índice nuevo
+        self._during_load: Optional[List[Tuple[bytes, Optional[int], Optional[int]]]] = None
+        self._tasks = []
+
+    def update(self, user_id: str, offered: Optional[Iterable[str]] = None, wanted: Optional[Iterable[str]] = None):
+        """Aplica un cambio de perfil; None deja ese lado como estaba"""
+        key = ObjectId(user_id).binary
+        offered_mask = None if offered is None else skills_to_mask(offered)
+        wanted_mask = None if wanted is None else skills_to_mask(wanted)
+        self.index.set(key, offered_mask, wanted_mask)
+        if self._during_load is not None:
+            self._during_load.append((key, offered_mask, wanted_mask))
+
+    def top_matches(self, user_id: str, offered: Iterable[str], wanted: Iterable[str], limit: int = 20) -> List[dict]:
+        """Top `limit` usuarios con {"user_id", "score", "they_offer", "they_want"} (habilidades)"""
+        index = self.index
+        my_offered, my_wanted = skills_to_mask(offered), skills_to_mask(wanted)
+        if not index.size or not (my_offered or my_wanted):
+            return []
+
+        rows = index.candidates(my_offered, my_wanted)
+        if rows is None:
+            their_offered, their_wanted = index.offered[:index.size], index.wanted[:index.size]
+        elif not len(rows):
+            return []
+        else:
+            their_offered, their_wanted = index.offered[rows], index.wanted[rows]
+
+        scores = score_rows(
+            their_offered, their_wanted, my_offered, my_wanted,
+            index.scratch() if rows is None else None
+        )
+
+        # El propio usuario no es candidato
+        self_row = index.rows.get(ObjectId(user_id).binary)
+        if self_row is not None:
+            if rows is None:
+                scores[self_row] = 0
+            else:
+                scores[rows == self_row] = 0
+
+        positions = top_positions(scores, limit)
+
+        matches = []
+        for position in positions:
+            row = position if rows is None else rows[position]
+            matches.append({
+                "user_id": str(ObjectId(index.user_ids[row].tobytes())),
+                "they_offer": mask_to_skills(int(index.offered[row]) & my_wanted),
+                "they_want": mask_to_skills(int(index.wanted[row]) & my_offered)
+            })
+            get, give = len(matches[-1]["they_offer"]), len(matches[-1]["they_want"])
+            matches[-1]["score"] = min(get, give) * RECIPROCAL_WEIGHT + get + give
+        return matches
+
+    @staticmethod
+    def _build_index(keys: List[bytes], offered: List[int], wanted: List[int]) -> _SkillIndex:
+        # Corre en un hilo: el índice nuevo no es visible hasta publicarlo
+        index = _SkillIndex(capacity=max(1024, len(keys)))
+        index.bulk_load(keys, offered, wanted)
+        return index
+
+    async def compact(self):
+        """Compacta el índice publicado armando las listas en un hilo"""
+        index = self.index
+        offered, wanted = index.begin_compact()
+        postings = None
+        try:
+            postings = await asyncio.to_thread(_SkillIndex.build_postings, offered, wanted)
+        finally:
+            index.finish_compact(postings)
+
+    async def load(self):
+        """
+        Carga completa desde Mongo; el índice anterior sigue sirviendo mientras
+        tanto. Los arreglos y las listas invertidas se arman en un hilo.
+        """
+        started = time.perf_counter()
+        self._during_load = []
+        try:
+            keys, offered, wanted = [], [], []
+            cursor = user_collection.find({}, {"interests_offered": 1, "interests_wanted": 1}).batch_size(5000)
+            async for user in cursor:
+                keys.append(user["_id"].binary)
+                offered.append(skills_to_mask(user.get("interests_offered")))
+                wanted.append(skills_to_mask(user.get("interests_wanted")))
+
+            index = await asyncio.to_thread(self._build_index, keys, offered, wanted)
+            for key, offered_mask, wanted_mask in self._during_load:
+                index.set(key, offered_mask, wanted_mask)
+            self.index = index
+        finally:
+            self._during_load = None
+
+        self.ready = True
+        logger.info(
+            "🧩 Índice de habilidades cargado: %s usuarios en %.0f ms",
+            self.index.size, (time.perf_counter() - started) * 1000
+        )
+
+    async def _run(self):
+        last_load = 0.0
+        while True:
+            try:
+                if time.monotonic() - last_load >= SKILL_MATCHER_RELOAD_SECONDS:
+                    await self.load()
+                    last_load = time.monotonic()
+                elif self.index.pending:
+                    await self.compact()
+            except Exception as e:
+                logger.warning("⚠️ Error actualizando el índice de habilidades: %s", e)
+            await asyncio.sleep(SKILL_MATCHER_COMPACT_SECONDS)
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._run())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# Instancia global
+skill_matcher = SkillMatcher()
@@ -0,0 +1,72 @@
+# app/utils/swr_cache.py
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SWRCache:
+    """
+    Cache en memoria stale-while-revalidate con singleflight.
+
+    - Dentro de `fresh_ttl` se sirve el valor cacheado tal cual.
+    - Hasta `fresh_ttl + stale_ttl` se sirve el valor viejo y se lanza un
+      único refresco en segundo plano.
+    - Si no hay valor, las peticiones concurrentes de la misma llave esperan
+      a un solo cálculo en lugar de repetirlo (thundering herd).
+    """
+
+    def __init__(self, name: str, fresh_ttl: float, stale_ttl: float, maxsize: int = 256):
+        self.name = name
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]]):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+
+            if age < self.fresh_ttl:
+                return value
+
+            if age < self.fresh_ttl + self.stale_ttl:
+                self._start(key, compute)
+                return value
+
+        # Sin valor utilizable: esperar al cálculo compartido
+        return await asyncio.shield(self._start(key, compute))
+
+    def _start(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.warning("⚠️ Error recalculando cache %s[%s]: %s", self.name, key, task.exception())
+            return
+
+        self._entries.pop(key, None)
+        self._entries[key] = (task.result(), time.monotonic())
+        while len(self._entries) > self.maxsize:
+            self._entries.pop(next(iter(self._entries)))
+
+    def invalidate(self, key: Hashable = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -0,0 +1,157 @@
+# app/utils/token_revocation.py
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+from app.database import revoked_token_collection
+from app.config import (
+    REVOCATION_BLOOM_CAPACITY,
+    REVOCATION_BLOOM_ERROR_RATE,
+    REVOCATION_SYNC_SECONDS,
+    REVOCATION_REBUILD_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Filtro de Bloom sencillo sobre un bytearray (doble hashing con blake2b)"""
+
+    def __init__(self, capacity: int, error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> bool:
+        """
+        Agrega el item; solo cuenta si encendió algún bit. Así los jti que ya
+        estaban (traslape del sync, o revocados en este worker) no inflan
+        `count` ni fuerzan reconstrucciones.
+        """
+        added = False
+        for pos in self._positions(item):
+            byte, bit = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & bit:
+                self.bits[byte] |= bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationStore:
+    """
+    Almacén de refresh tokens revocados.
+
+    - Cada revocación se guarda en Mongo con `expires_at` (índice TTL).
+    - Cada worker mantiene un filtro de Bloom en memoria: si el jti no está
+      en el filtro no está revocado y no se consulta la base de datos.
+    - Los workers sincronizan las revocaciones nuevas leyendo por `revoked_at`
+      y reconstruyen el filtro periódicamente para soltar las que expiraron.
+    """
+
+    def __init__(self, capacity: int = REVOCATION_BLOOM_CAPACITY):
+        self.min_capacity = capacity
+        self.bloom = BloomFilter(capacity)
+        self._cursor = datetime.min
+        self._tasks = []
+
+    async def _ensure_indexes(self):
+        await revoked_token_collection.create_index("expires_at", expireAfterSeconds=0)
+        await revoked_token_collection.create_index([("revoked_at", ASCENDING)])
+
+    async def rebuild(self):
+        """Reconstruye el filtro con las revocaciones vigentes"""
+        now = datetime.utcnow()
+        active = await revoked_token_collection.count_documents({"expires_at": {"$gt": now}})
+
+        bloom = BloomFilter(max(self.min_capacity, active * 2))
+        cursor = self._cursor
+        async for doc in revoked_token_collection.find(
+            {"expires_at": {"$gt": now}},
+            {"_id": 1, "revoked_at": 1}
+        ):
+            bloom.add(doc["_id"])
+            if doc["revoked_at"] > cursor:
+                cursor = doc["revoked_at"]
+
+        self.bloom = bloom
+        self._cursor = cursor
+        logger.info("🚫 Filtro de revocación reconstruido: %s tokens", bloom.count)
+
+    async def sync(self):
+        """Agrega al filtro las revocaciones hechas por otros workers"""
+        # Pequeño traslape para tolerar relojes desfasados entre workers
+        since = self._cursor - timedelta(seconds=REVOCATION_SYNC_SECONDS)
+        async for doc in revoked_token_collection.find(
+            {"revoked_at": {"$gt": since}},
+            {"_id": 1, "revoked_at": 1}
+        ):
+            self.bloom.add(doc["_id"])
+            if doc["revoked_at"] > self._cursor:
+                self._cursor = doc["revoked_at"]
+
+        # Si el filtro se llenó, su tasa de falsos positivos sube: reconstruir
+        if self.bloom.count > self.bloom.capacity:
+            await self.rebuild()
+
+    async def revoke(self, jti: str, user_id: str, expires_at: datetime):
+        now = datetime.utcnow()
+        await revoked_token_collection.update_one(
+            {"_id": jti},
+            {"$setOnInsert": {"user_id": user_id, "expires_at": expires_at, "revoked_at": now}},
+            upsert=True
+        )
+        self.bloom.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        # Camino común: no está en el filtro → no revocado, sin consultar Mongo
+        if jti not in self.bloom:
+            return False
+
+        # Posible falso positivo: confirmar en la base de datos
+        return await revoked_token_collection.find_one({"_id": jti}, {"_id": 1}) is not None
+
+    async def _run_every(self, seconds: float, func):
+        while True:
+            await asyncio.sleep(seconds)
+            try:
+                await func()
+            except Exception as e:
+                logger.warning("⚠️ Error sincronizando revocaciones: %s", e)
+
+    async def start(self):
+        try:
+            await self._ensure_indexes()
+            await self.rebuild()
+        except Exception as e:
+            logger.warning("⚠️ No se pudo cargar el filtro de revocación: %s", e)
+
+        self._tasks = [
+            asyncio.create_task(self._run_every(REVOCATION_SYNC_SECONDS, self.sync)),
+            asyncio.create_task(self._run_every(REVOCATION_REBUILD_SECONDS, self.rebuild))
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# Instancia global
+revocation_store = RevocationStore()
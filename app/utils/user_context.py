@@ -0,0 +1,69 @@
+# app/utils/user_context.py
+from fastapi import Depends, HTTPException, status
+from bson import ObjectId
+from bson.errors import InvalidId
+from cachetools import TTLCache
+from typing import Optional
+from app.database import user_collection
+from app.utils.auth_guardUtils import auth_required_depends
+from app.config import USER_CONTEXT_CACHE_SIZE, USER_CONTEXT_TTL_SECONDS
+
+# Proyección del usuario actual (sin password): incluye lo que necesita /auth/me
+# para que un request lea el usuario a lo sumo una vez
+USER_CONTEXT_PROJECTION = {
+    "username": 1,
+    "email": 1,
+    "first_name": 1,
+    "last_name": 1,
+    "about_me": 1,
+    "interests_offered": 1,
+    "interests_wanted": 1,
+    "profile_image": 1,
+    "followers": 1,
+    "following": 1,
+    "created_at": 1,
+    "last_login": 1
+}
+
+# {user_id: documento proyectado}
+_user_context_cache = TTLCache(maxsize=USER_CONTEXT_CACHE_SIZE, ttl=USER_CONTEXT_TTL_SECONDS)
+
+async def get_user_context(user_id: str) -> Optional[dict]:
+    """
+    Obtiene la proyección ligera de un usuario, pasando por un cache con TTL corto.
+    El dict retornado es compartido: no modificarlo.
+    """
+    user = _user_context_cache.get(user_id)
+    if user is not None:
+        return user
+
+    try:
+        user_obj_id = ObjectId(user_id)
+    except (InvalidId, TypeError):
+        return None
+
+    user = await user_collection.find_one({"_id": user_obj_id}, USER_CONTEXT_PROJECTION)
+    if user:
+        _user_context_cache[user_id] = user
+
+    return user
+
+def invalidate_user_context(user_id: str):
+    """Descarta el contexto cacheado tras actualizar el perfil, seguidores o último login"""
+    _user_context_cache.pop(user_id, None)
+
+async def current_user_context(user_id: str = Depends(auth_required_depends)) -> dict:
+    """
+    Dependency con el usuario actual ya resuelto.
+    FastAPI la resuelve una sola vez por request aunque varias dependencias la usen.
+    Usar como: async def my_route(current_user: dict = Depends(current_user_context))
+    """
+    user = await get_user_context(user_id)
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario no encontrado"
+        )
+
+    return user
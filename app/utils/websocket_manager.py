@@ -1,35 +1,92 @@
 # app/utils/websocket_manager.py
+import asyncio
+import logging
 from fastapi import WebSocket
 from typing import Dict, List
-import json
+from app.utils.ws_codec import JSON
+from app.config import WS_SEND_TIMEOUT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Código de cierre para sockets que no aceptan envíos a tiempo
+CLOSE_SLOW_CONSUMER = 4009
 
 class ConnectionManager:
     def __init__(self):
         # {user_id: [websocket_connections]}
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        # {websocket: codec negociado al conectar}
+        self.codecs: Dict[WebSocket, object] = {}
+        # {websocket: user_id}
+        self.owners: Dict[WebSocket, str] = {}
         
-    async def connect(self, websocket: WebSocket, user_id: str):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, user_id: str, codec=JSON):
+        await websocket.accept(subprotocol=codec.subprotocol)
+        self.codecs[websocket] = codec
+        self.owners[websocket] = user_id
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
         self.active_connections[user_id].append(websocket)
         
     def disconnect(self, websocket: WebSocket, user_id: str):
+        """Idempotente: un envío fallido ya pudo sacar el socket"""
+        self.codecs.pop(websocket, None)
+        if self.owners.pop(websocket, None) is None:
+            return
         if user_id in self.active_connections:
             self.active_connections[user_id].remove(websocket)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
     
+    async def send(self, websocket: WebSocket, message: dict):
+        """Envía a un socket con el codec que negoció"""
+        codec = self.codecs.get(websocket, JSON)
+        await codec.send(websocket, codec.encode(message))
+    
+    async def send_many(self, websockets: List[WebSocket], message: dict):
+        """
+        Envía a todos en paralelo: un cliente lento no retrasa a los demás.
+        Se codifica una vez por codec, no una vez por socket.
+        """
+        frames = {}
+        sends = []
+        for connection in websockets:
+            if connection not in self.owners:
+                # Ya descartado; la ruta lo termina de limpiar al cerrarse
+                continue
+            codec = self.codecs[connection]
+            if codec not in frames:
+                frames[codec] = codec.encode(message)
+            sends.append(self._deliver(connection, codec, frames[codec]))
+        await asyncio.gather(*sends)
+    
+    async def _deliver(self, websocket: WebSocket, codec, frame):
+        try:
+            await asyncio.wait_for(codec.send(websocket, frame), timeout=WS_SEND_TIMEOUT_SECONDS)
+        except Exception as e:
+            # Muerto o demasiado lento: se saca ya para no reintentarlo en cada envío
+            user_id = self.owners.get(websocket)
+            if user_id is None:
+                return
+            logger.info("🔌 Socket de %s descartado al enviar: %s", user_id, e or type(e).__name__)
+            self.disconnect(websocket, user_id)
+            asyncio.create_task(self._close(websocket))
+    
+    async def _close(self, websocket: WebSocket):
+        """El cierre termina el loop de la ruta, que limpia presencia y suscripciones"""
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=CLOSE_SLOW_CONSUMER, reason="Envío fallido o demasiado lento"), timeout=5
+            )
+        except Exception:
+            pass
+    
     async def send_personal_message(self, message: dict, user_id: str):
         if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    pass  # Conexión muerta
+            await self.send_many(list(self.active_connections[user_id]), message)
     
     def is_user_online(self, user_id: str) -> bool:
         return user_id in self.active_connections
 
 # Instancia global
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -0,0 +1,119 @@
+# app/utils/ws_codec.py
+import zlib
+from datetime import datetime
+import msgpack
+import orjson
+from bson import ObjectId
+from fastapi import WebSocket, WebSocketDisconnect
+from app.utils.fast_json import dumps
+from app.config import WS_COMPRESS_MIN_BYTES, WS_MAX_FRAME_BYTES
+
+# Subprotocolo que el cliente pide al conectar: new WebSocket(url, ["skillswap.msgpack"])
+MSGPACK_SUBPROTOCOL = "skillswap.msgpack"
+
+# Primer byte de cada frame binario
+FLAG_PLAIN = 0x00
+FLAG_ZLIB = 0x01
+
+# Código de cierre para frames demasiado grandes (RFC 6455)
+CLOSE_TOO_BIG = 1009
+
+
+class FrameTooLarge(Exception):
+    """El frame del cliente (descomprimido) pasa de WS_MAX_FRAME_BYTES"""
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+class JSONCodec:
+    """Frames de texto JSON (clientes que no negocian subprotocolo)"""
+    subprotocol = None
+
+    def encode(self, message: dict) -> str:
+        return dumps(message).decode("utf-8")
+
+    async def send(self, websocket: WebSocket, frame: str):
+        await websocket.send_text(frame)
+
+
+class MsgpackCodec:
+    """
+    Frames binarios: un byte de flag y luego MessagePack. Los payloads de
+    WS_COMPRESS_MIN_BYTES o más (replay, listas de notificaciones) van con
+    zlib si así quedan más chicos; los frames cortos no pagan la compresión.
+    """
+    subprotocol = MSGPACK_SUBPROTOCOL
+
+    def encode(self, message: dict) -> bytes:
+        payload = msgpack.packb(message, default=_default)
+        if len(payload) >= WS_COMPRESS_MIN_BYTES:
+            compressed = zlib.compress(payload)
+            if len(compressed) < len(payload):
+                return bytes([FLAG_ZLIB]) + compressed
+        return bytes([FLAG_PLAIN]) + payload
+
+    async def send(self, websocket: WebSocket, frame: bytes):
+        await websocket.send_bytes(frame)
+
+
+JSON = JSONCodec()
+MSGPACK = MsgpackCodec()
+
+
+def negotiate(websocket: WebSocket):
+    """Codec según los subprotocolos que ofrece el cliente; JSON por defecto"""
+    if MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        return MSGPACK
+    return JSON
+
+
+def _inflate(data: bytes) -> bytes:
+    """zlib con tope de salida: un frame chico no puede inflarse a gigabytes"""
+    inflater = zlib.decompressobj()
+    payload = inflater.decompress(data, WS_MAX_FRAME_BYTES)
+    if inflater.unconsumed_tail:
+        raise FrameTooLarge()
+    if not inflater.eof:
+        raise ValueError("Frame zlib incompleto")
+    return payload
+
+
+def decode_frame(message: dict) -> dict:
+    """
+    Decodifica un frame del cliente sin importar el codec negociado: texto es
+    JSON y binario es MessagePack con el mismo byte de flag que los envíos.
+    Lanza ValueError si el frame no es válido y FrameTooLarge si pasa de
+    WS_MAX_FRAME_BYTES.
+    """
+    try:
+        if message.get("text") is not None:
+            if len(message["text"]) > WS_MAX_FRAME_BYTES:
+                raise FrameTooLarge()
+            frame = orjson.loads(message["text"])
+        else:
+            data = message.get("bytes") or b""
+            if not data:
+                raise ValueError("Frame vacío")
+            if len(data) - 1 > WS_MAX_FRAME_BYTES:
+                raise FrameTooLarge()
+            payload = _inflate(data[1:]) if data[0] == FLAG_ZLIB else data[1:]
+            frame = msgpack.unpackb(payload)
+    except (ValueError, TypeError, zlib.error, msgpack.UnpackException) as e:
+        raise ValueError(str(e))
+
+    if not isinstance(frame, dict):
+        raise ValueError("El frame debe ser un objeto")
+    return frame
+
+
+async def receive_frame(websocket: WebSocket) -> dict:
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    return decode_frame(message)
@@ -0,0 +1,132 @@
+# app/utils/ws_replay.py
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from bson import ObjectId
+from fastapi import WebSocket
+from pymongo import ASCENDING
+from app.database import user_collection, notification_collection, conversation_collection, message_collection
+from app.utils.websocket_manager import manager
+from app.utils.notifications import render_notifications, unread_count
+from app.config import WS_REPLAY_BATCH_SIZE, WS_REPLAY_MAX_ITEMS
+
+logger = logging.getLogger(__name__)
+
+
+def parse_since(value: str) -> Optional[datetime]:
+    """Acepta epoch en milisegundos o ISO 8601; retorna UTC sin tzinfo (como se guarda en Mongo)"""
+    try:
+        return datetime.utcfromtimestamp(int(value) / 1000)
+    except (ValueError, OverflowError, OSError):
+        pass
+
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+async def ensure_replay_indexes():
+    try:
+        await message_collection.create_index([("conversation_id", ASCENDING), ("created_at", ASCENDING)])
+        await conversation_collection.create_index("participants")
+    except Exception as e:
+        logger.warning("⚠️ No se pudieron crear los índices de mensajes: %s", e)
+
+
+async def _send(websocket: WebSocket, frame: dict):
+    await manager.send(websocket, frame)
+
+
+async def _send_messages(websocket: WebSocket, messages: list):
+    senders = {
+        user["_id"]: user["username"]
+        async for user in user_collection.find(
+            {"_id": {"$in": list({msg["sender_id"] for msg in messages})}},
+            {"username": 1}
+        )
+    }
+    await _send(websocket, {
+        "type": "replay_messages",
+        "data": [
+            {
+                "id": str(msg["_id"]),
+                "conversation_id": str(msg["conversation_id"]),
+                "sender_username": senders.get(msg["sender_id"]),
+                "content": msg["content"],
+                "created_at": msg["created_at"].isoformat(),
+                "is_read": msg.get("is_read", False)
+            }
+            for msg in messages
+        ]
+    })
+
+
+async def replay_missed(websocket: WebSocket, user_id: str, since: datetime):
+    """
+    Envía los mensajes y notificaciones posteriores a `since` en lotes de
+    WS_REPLAY_BATCH_SIZE, hasta WS_REPLAY_MAX_ITEMS en total.
+
+    El socket ya está registrado en el manager, así que un evento en vivo
+    puede llegar también en el replay: el cliente descarta repetidos por `id`.
+    Si se alcanza el tope, `truncated` indica que debe recargar por REST.
+    """
+    user_obj_id = ObjectId(user_id)
+    budget = WS_REPLAY_MAX_ITEMS
+    latest = since
+    counts = {"messages": 0, "notifications": 0}
+
+    conversation_ids = [
+        conv["_id"]
+        async for conv in conversation_collection.find({"participants": user_obj_id}, {"_id": 1})
+    ]
+    if conversation_ids:
+        cursor = message_collection.find(
+            {"conversation_id": {"$in": conversation_ids}, "created_at": {"$gt": since}},
+            {"conversation_id": 1, "sender_id": 1, "content": 1, "created_at": 1, "is_read": 1}
+        ).sort("created_at", 1).limit(budget).batch_size(WS_REPLAY_BATCH_SIZE)
+
+        batch = []
+        async for msg in cursor:
+            batch.append(msg)
+            latest = max(latest, msg["created_at"])
+            if len(batch) == WS_REPLAY_BATCH_SIZE:
+                await _send_messages(websocket, batch)
+                counts["messages"] += len(batch)
+                batch = []
+        if batch:
+            await _send_messages(websocket, batch)
+            counts["messages"] += len(batch)
+        budget -= counts["messages"]
+
+    if budget > 0:
+        cursor = notification_collection.find(
+            {"to_user": user_obj_id, "created_at": {"$gt": since}}
+        ).sort("created_at", 1).limit(budget).batch_size(WS_REPLAY_BATCH_SIZE)
+
+        batch = []
+        async for notif in cursor:
+            batch.append(notif)
+            latest = max(latest, notif["created_at"])
+            if len(batch) == WS_REPLAY_BATCH_SIZE:
+                await _send(websocket, {"type": "replay_notifications", "data": await render_notifications(batch)})
+                counts["notifications"] += len(batch)
+                batch = []
+        if batch:
+            await _send(websocket, {"type": "replay_notifications", "data": await render_notifications(batch)})
+            counts["notifications"] += len(batch)
+
+    total = counts["messages"] + counts["notifications"]
+    await _send(websocket, {
+        "type": "replay_complete",
+        "data": {
+            **counts,
+            "cursor": latest.isoformat(),
+            "truncated": total >= WS_REPLAY_MAX_ITEMS,
+            "unread_count": await unread_count(user_obj_id)
+        }
+    })
+    logger.info("🔁 Replay enviado: %s mensajes, %s notificaciones", counts["messages"], counts["notifications"])
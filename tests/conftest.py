@@ -0,0 +1,5 @@
+# tests/conftest.py
+import os
+
+# app.config lee el entorno al importar; los tests no se conectan a Mongo
+os.environ.setdefault("DB_NAME", "skillswap_test")
@@ -0,0 +1,19 @@
+# tests/test_auth_utils.py
+from app.utils.authUtils import create_access_token, create_refresh_token, verify_access_token
+
+
+def test_cached_payload_is_not_shared():
+    token = create_access_token({"sub": "abc"})
+    first = verify_access_token(token)
+    first["sub"] = "otro"
+    first["extra"] = True
+
+    # El segundo request sale del cache y no ve los cambios del primero
+    second = verify_access_token(token)
+    assert second["sub"] == "abc" and "extra" not in second
+    second["sub"] = "otro"
+    assert verify_access_token(token)["sub"] == "abc"
+
+
+def test_refresh_token_is_not_an_access_token():
+    assert verify_access_token(create_refresh_token({"sub": "abc"})) is None
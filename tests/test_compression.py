@@ -0,0 +1,103 @@
+# tests/test_compression.py
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from app.utils.compression import CompressionMiddleware, accepts_gzip, compression_stats, no_compression
+
+BODY = "hola " * 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("GZIP;q=0.5", True),
+    ("x-gzip", True),
+    ("*", True),
+    ("", False),
+    ("deflate, br", False),
+    ("identity", False),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0", False),
+    ("gzip;q=abc", False),
+    ("*;q=0", False),
+    # Una entrada explícita de gzip manda sobre *, en cualquier orden
+    ("*, gzip;q=0", False),
+    ("gzip;q=0, *", False),
+    ("*;q=0, gzip", True),
+    ("br, *;q=0.1", True),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("hola")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(10):
+                yield BODY.encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/image")
+    async def image():
+        return Response(BODY.encode(), media_type="image/png")
+
+    @app.get("/skip")
+    @no_compression
+    async def skip():
+        return PlainTextResponse(BODY)
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+
+def get(client, path, accept_encoding="gzip"):
+    return client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+
+def test_large_body_is_compressed(client):
+    response = get(client, "/large")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.text == BODY
+    assert compression_stats.snapshot()["routes"]["/large"]["bytes_in"] >= len(BODY)
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "gzip;q=0", "*, gzip;q=0"])
+def test_refused_gzip_is_not_compressed(client, accept_encoding):
+    response = get(client, "/large", accept_encoding)
+    assert "content-encoding" not in response.headers
+    assert response.text == BODY
+
+
+def test_small_body_is_not_compressed(client):
+    response = get(client, "/small")
+    assert "content-encoding" not in response.headers
+    assert response.text == "hola"
+
+
+def test_streaming_body_is_compressed(client):
+    response = get(client, "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == BODY * 10
+
+
+@pytest.mark.parametrize("path", ["/image", "/skip"])
+def test_excluded_responses_pass_through(client, path):
+    response = get(client, path)
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY.encode()
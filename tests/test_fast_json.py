@@ -0,0 +1,51 @@
+# tests/test_fast_json.py
+import asyncio
+import json
+from datetime import datetime
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from app.routes.posts.postRoute import format_post
+from app.schemas.posts.postSchema import PostResponse
+from app.utils.fast_json import fast_response
+
+
+def fast_and_model_bodies(post: dict, author: dict):
+    formatted = asyncio.run(format_post(post, None, author))
+    fast = orjson.loads(fast_response([formatted], list).body)
+    # Lo que habría enviado FastAPI con response_model=List[PostResponse]
+    model = jsonable_encoder([PostResponse.model_validate(formatted)])
+    return fast, json.loads(json.dumps(model))
+
+
+def make_post(**fields) -> dict:
+    now = datetime(2025, 5, 1, 12, 30, 15, 123000)
+    return {
+        "_id": ObjectId(),
+        "user_id": ObjectId(),
+        "content": "Enseño guitarra",
+        "type": "skill_offer",
+        "created_at": now,
+        "updated_at": now,
+        **fields
+    }
+
+
+AUTHOR = {"_id": ObjectId(), "username": "ana", "first_name": "Ana", "last_name": "Pérez"}
+
+
+def test_post_missing_skill_lists_matches_response_model():
+    fast, model = fast_and_model_bodies(make_post(skills={"offering": ["Guitarra"]}), AUTHOR)
+    assert fast == model
+    assert fast[0]["skills"] == {"offering": ["Guitarra"], "seeking": []}
+
+
+def test_post_with_empty_skills_matches_response_model():
+    fast, model = fast_and_model_bodies(make_post(skills={}), AUTHOR)
+    assert fast == model
+
+
+def test_general_post_matches_response_model():
+    fast, model = fast_and_model_bodies(make_post(type="general", skills=None, likes=[]), AUTHOR)
+    assert fast == model
+    assert fast[0]["skills"] is None
@@ -0,0 +1,119 @@
+# tests/test_follow_graph.py
+import asyncio
+from bson import ObjectId
+import pytest
+from app.utils import follow_graph as follow_graph_module
+from app.utils.follow_graph import FollowGraph
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeUsers:
+    """Colección de usuarios en memoria con lo que usa build()"""
+
+    def __init__(self, following):
+        self.following = following
+
+    def find(self, query, projection):
+        return FakeCursor([{"_id": user, "following": list(targets)} for user, targets in self.following.items()])
+
+
+@pytest.fixture
+def users():
+    return {name: ObjectId() for name in "abcdefg"}
+
+
+@pytest.fixture
+def graph(users, monkeypatch):
+    u = users
+    following = {
+        # a sigue a b, c y d
+        u["a"]: [u["b"], u["c"], u["d"]],
+        # Para a: e lo siguen b, c y d (3 en común); f, b y c (2); g, d (1)
+        u["b"]: [u["e"], u["f"], u["a"]],
+        u["c"]: [u["e"], u["f"], u["d"]],
+        u["d"]: [u["e"], u["g"]],
+        u["e"]: [],
+        u["f"]: [u["g"]],
+        u["g"]: [],
+    }
+    monkeypatch.setattr(follow_graph_module, "user_collection", FakeUsers(following))
+    graph = FollowGraph()
+    asyncio.run(graph.build())
+    return graph
+
+
+def names(users, suggestions):
+    by_id = {str(oid): name for name, oid in users.items()}
+    return [(by_id[user_id], count) for user_id, count in suggestions]
+
+
+def test_build_loads_every_edge(graph):
+    assert graph.ready
+    assert len(graph.graph.keys) == 7
+    assert graph.graph.base.nnz == 12
+
+
+def test_ranking_by_mutual_friends(graph, users):
+    # Fuera: a mismo y los que ya sigue (b, c, d)
+    assert names(users, graph.suggestions(str(users["a"]), 10)) == [("e", 3), ("f", 2), ("g", 1)]
+    assert names(users, graph.suggestions(str(users["a"]), 1)) == [("e", 3)]
+
+
+def test_ties_break_by_followers(graph, users):
+    a = str(users["a"])
+    graph.unfollow(a, str(users["d"]))
+    # Sin d: e y f quedan con 2 en común; e tiene más seguidores (b, c, d)
+    assert names(users, graph.suggestions(a, 10)) == [("e", 2), ("f", 2), ("d", 1)]
+
+
+def test_follow_invalidates_cached_suggestions(graph, users):
+    a = str(users["a"])
+    assert names(users, graph.suggestions(a, 10))[0] == ("e", 3)
+
+    graph.follow(a, str(users["e"]))
+    assert names(users, graph.suggestions(a, 10)) == [("f", 2), ("g", 1)]
+
+
+def test_rebuild_refreshes_cache_and_keeps_changes(graph, users):
+    a = str(users["a"])
+    graph.suggestions(a, 10)
+
+    # Cambio en Mongo hecho por otro worker: la reconstrucción lo recoge
+    follow_graph_module.user_collection.following[users["a"]].append(users["e"])
+    asyncio.run(graph.build())
+    assert names(users, graph._cache[a]) == [("f", 2), ("g", 1)]
+    assert graph.graph.delta == {}
+
+
+def test_changes_during_build_survive(graph, users):
+    a = str(users["a"])
+    graph.suggestions(a, 10)
+
+    # Follow hecho en este worker mientras la reconstrucción lee Mongo
+    collection = follow_graph_module.user_collection
+    find = collection.find
+
+    def find_and_follow(query, projection):
+        graph.follow(a, str(users["e"]))
+        return find(query, projection)
+
+    collection.find = find_and_follow
+    asyncio.run(graph.build())
+
+    # Sus sugerencias recalculadas (sin el follow) no se publican
+    assert a not in graph._cache
+    assert names(users, graph.suggestions(a, 10)) == [("f", 2), ("g", 1)]
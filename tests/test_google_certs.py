@@ -0,0 +1,199 @@
+# tests/test_google_certs.py
+import asyncio
+import time
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+from app.utils import google_oauth_utils
+from app.utils.google_oauth_utils import GoogleCertsCache, verify_google_token
+
+CLIENT_ID = "cliente-de-prueba.apps.googleusercontent.com"
+
+
+class FakeJWKS:
+    """Endpoint de certificados falso: cuenta las descargas y permite rotar llaves"""
+
+    def __init__(self, kids, cache_control="public, max-age=3600", delay=0.0, age=None, keys=None):
+        self.kids = list(kids)
+        self.cache_control = cache_control
+        self.delay = delay
+        self.age = age
+        # {kid: JWK}; sin llave real se sirve una de relleno
+        self.keys = keys or {}
+        self.fetches = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.fetches += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        keys = [
+            {**self.keys.get(kid, {"kty": "RSA", "alg": "RS256", "n": "x", "e": "AQAB"}), "kid": kid}
+            for kid in self.kids
+        ]
+        headers = {"cache-control": self.cache_control}
+        if self.age is not None:
+            headers["age"] = str(self.age)
+        return httpx.Response(200, json={"keys": keys}, headers=headers)
+
+
+def make_cache(server: FakeJWKS, **kwargs) -> GoogleCertsCache:
+    return GoogleCertsCache(url="https://certs.test/jwks", transport=httpx.MockTransport(server), **kwargs)
+
+
+def test_hit_within_max_age_does_not_fetch():
+    async def scenario():
+        server = FakeJWKS(["a", "b"], cache_control="public, max-age=600")
+        cache = make_cache(server)
+
+        assert (await cache.get_key("a"))["kid"] == "a"
+        for _ in range(20):
+            assert (await cache.get_key("b"))["kid"] == "b"
+        assert server.fetches == 1
+
+        # Sin Age, el ttl es el max-age completo
+        assert cache._expires_at - cache._last_fetch == pytest.approx(600)
+
+    asyncio.run(scenario())
+
+
+def test_age_is_subtracted_from_max_age():
+    async def scenario():
+        server = FakeJWKS(["a"], cache_control="public, max-age=600", age=200)
+        cache = make_cache(server)
+        await cache.get_key("a")
+        assert cache._expires_at - cache._last_fetch == pytest.approx(400)
+
+        # Nunca por debajo de min_ttl
+        server.age = 590
+        await cache.refresh()
+        assert cache._expires_at - cache._last_fetch == pytest.approx(cache.min_ttl)
+
+    asyncio.run(scenario())
+
+
+def test_unknown_kid_triggers_refresh():
+    async def scenario():
+        server = FakeJWKS(["old"])
+        cache = make_cache(server, unknown_kid_cooldown=0)
+        assert await cache.get_key("old")
+
+        # Google rotó las llaves: el kid nuevo fuerza una descarga
+        server.kids = ["old", "new"]
+        assert (await cache.get_key("new"))["kid"] == "new"
+        assert server.fetches == 2
+
+    asyncio.run(scenario())
+
+
+def test_unknown_kid_respects_cooldown():
+    async def scenario():
+        server = FakeJWKS(["a"])
+        cache = make_cache(server, unknown_kid_cooldown=30)
+        await cache.get_key("a")
+
+        for _ in range(5):
+            assert await cache.get_key("unknown") is None
+        assert server.fetches == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def scenario():
+        server = FakeJWKS(["a"], delay=0.05)
+        cache = make_cache(server)
+
+        keys = await asyncio.gather(*(cache.get_key("a") for _ in range(50)))
+        assert all(key["kid"] == "a" for key in keys)
+        assert server.fetches == 1
+
+    asyncio.run(scenario())
+
+
+# ============================================
+# VERIFICACIÓN DE ID TOKENS
+# ============================================
+
+def rsa_private_pem() -> bytes:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+
+def public_jwk(private_pem: bytes) -> dict:
+    public = jwk.construct(private_pem, "RS256").public_key().to_dict()
+    return {key: value.decode() if isinstance(value, bytes) else value for key, value in public.items()}
+
+
+SIGNING_KEY = rsa_private_pem()
+OTHER_KEY = rsa_private_pem()
+
+
+def id_token(key: bytes = SIGNING_KEY, kid: str = "google-1", **overrides) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "1234567890",
+        "email": "ana@example.com",
+        "email_verified": True,
+        "name": "Ana Pérez",
+        "iat": now,
+        "exp": now + 3600,
+        **overrides
+    }
+    return jwt.encode(claims, key, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def google(monkeypatch):
+    """Endpoint de Google falso con la llave pública de SIGNING_KEY"""
+    server = FakeJWKS(["google-1"], keys={"google-1": public_jwk(SIGNING_KEY)})
+    monkeypatch.setattr(google_oauth_utils, "google_certs", make_cache(server))
+    monkeypatch.setattr(google_oauth_utils, "GOOGLE_CLIENT_ID", CLIENT_ID)
+    return server
+
+
+def verify(token: str):
+    return asyncio.run(verify_google_token(token))
+
+
+def rejected(token: str) -> str:
+    with pytest.raises(HTTPException) as error:
+        verify(token)
+    assert error.value.status_code == 401
+    return error.value.detail
+
+
+def test_valid_token(google):
+    info = verify(id_token())
+    assert info["google_id"] == "1234567890"
+    assert info["email"] == "ana@example.com" and info["email_verified"]
+    # El emisor sin https también es válido
+    assert verify(id_token(iss="accounts.google.com"))["google_id"] == "1234567890"
+
+
+def test_wrong_audience(google):
+    rejected(id_token(aud="otra-app.apps.googleusercontent.com"))
+
+
+def test_wrong_issuer(google):
+    rejected(id_token(iss="https://evil.example.com"))
+
+
+def test_expired(google):
+    now = int(time.time())
+    rejected(id_token(iat=now - 7200, exp=now - 3600))
+
+
+def test_bad_signature(google):
+    # Mismo kid, firmado con otra llave
+    rejected(id_token(key=OTHER_KEY))
+
+
+def test_unknown_kid(google):
+    assert "desconocida" in rejected(id_token(kid="no-existe"))
@@ -0,0 +1,20 @@
+# tests/test_http_cache.py
+from starlette.requests import Request
+from app.utils.http_cache import make_etag, etag_matches
+
+
+def request_with(if_none_match: str) -> Request:
+    return Request({"type": "http", "headers": [(b"if-none-match", if_none_match.encode())]})
+
+
+def test_etag_is_weak():
+    # El mismo ETag acompaña al cuerpo identity y al gzip
+    assert make_etag({"a": 1}).startswith('W/"')
+
+
+def test_weak_comparison():
+    etag = make_etag({"a": 1})
+    assert etag_matches(request_with(etag), etag)
+    assert etag_matches(request_with(etag.removeprefix("W/")), etag)
+    assert etag_matches(request_with(f'"otro", {etag}'), etag)
+    assert not etag_matches(request_with(make_etag({"a": 2})), etag)
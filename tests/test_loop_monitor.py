@@ -0,0 +1,98 @@
+# tests/test_loop_monitor.py
+import asyncio
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routes import monitoringRoute
+from app.utils.loop_monitor import LagHistogram, LoopMonitor, LoopMonitorMiddleware
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = LagHistogram(buckets=[1, 10, 100])
+    for value in (0.5, 5, 5, 50, 500):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert [bucket["count"] for bucket in snapshot["buckets"]] == [1, 3, 4, 5]
+    assert snapshot["buckets"][-1]["le"] == "+Inf"
+    assert snapshot["count"] == 5 and snapshot["max_ms"] == 500
+    assert snapshot["avg_ms"] == pytest.approx(112.1)
+
+
+def block_the_loop(seconds: float):
+    # Código síncrono dentro de una corrutina: bloquea el event loop
+    time.sleep(seconds)
+
+
+def test_watchdog_captures_blocked_loop():
+    monitor = LoopMonitor(interval_ms=10, slow_callback_ms=50)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+
+    # El sampler registra el lag al despertar y el watchdog el stack del bloqueo
+    assert monitor.histogram.max_ms >= 200
+    assert len(monitor.slow_events) == 1
+    event = monitor.slow_events[0]
+    assert event["blocked_ms"] >= 50
+    assert "block_the_loop" in event["stack"]
+    assert event["route"] == "sin ruta (tarea de fondo)"
+
+
+def test_middleware_attributes_block_to_route():
+    monitor = LoopMonitor(interval_ms=10, slow_callback_ms=50)
+
+    async def slow_app(scope, receive, send):
+        block_the_loop(0.3)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    app = LoopMonitorMiddleware(slow_app, monitor)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+
+        async def receive():
+            return {"type": "http.request"}
+
+        async def send(message):
+            pass
+
+        await app({"type": "http", "method": "POST", "path": "/posts/lento"}, receive, send)
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+
+    assert [event["route"] for event in monitor.slow_events] == ["POST /posts/lento"]
+    # Al terminar el request la ruta deja de estar activa
+    assert monitor._active_routes == {}
+
+
+@pytest.fixture
+def monitoring_client():
+    app = FastAPI()
+    app.include_router(monitoringRoute.router)
+    return TestClient(app)
+
+
+def test_monitoring_requires_token(monitoring_client, monkeypatch):
+    monkeypatch.setattr(monitoringRoute, "MONITORING_TOKEN", "secreto")
+
+    for path in ("/monitoring/loop-lag", "/monitoring/compression"):
+        assert monitoring_client.get(path).status_code == 401
+        assert monitoring_client.get(path, headers={"X-Monitoring-Token": "otro"}).status_code == 401
+        assert monitoring_client.get(path, headers={"X-Monitoring-Token": "secreto"}).status_code == 200
+
+
+def test_monitoring_disabled_without_token(monitoring_client, monkeypatch):
+    monkeypatch.setattr(monitoringRoute, "MONITORING_TOKEN", "")
+    assert monitoring_client.get("/monitoring/loop-lag", headers={"X-Monitoring-Token": ""}).status_code == 404
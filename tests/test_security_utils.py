@@ -0,0 +1,65 @@
+# tests/test_security_utils.py
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from app.utils import securityUtils
+
+
+def test_needs_rehash_only_below_target(monkeypatch):
+    monkeypatch.setattr(securityUtils, "_rounds", 12)
+    assert securityUtils.needs_rehash("$2b$10$" + "a" * 53)
+    assert not securityUtils.needs_rehash("$2b$12$" + "a" * 53)
+    # Otro worker calibró una ronda más: no se baja el costo en cada login
+    assert not securityUtils.needs_rehash("$2b$13$" + "a" * 53)
+    # Hash ilegible: se re-hashea
+    assert securityUtils.needs_rehash("no-es-bcrypt")
+
+
+def test_calibration_uses_median(monkeypatch):
+    # Mediciones de 10 ms con una pausa de 1 s: la mediana ignora la pausa
+    timings = iter([0.0, 0.010, 1.0, 2.0, 2.0, 2.010, 3.0, 3.010, 4.0, 4.010])
+    monkeypatch.setattr(securityUtils.time, "perf_counter", lambda: next(timings))
+    monkeypatch.setattr(securityUtils.bcrypt, "hashpw", lambda password, salt: b"")
+    monkeypatch.setattr(securityUtils, "BCRYPT_MIN_ROUNDS", 10)
+    monkeypatch.setattr(securityUtils, "BCRYPT_MAX_ROUNDS", 14)
+
+    # 10 ms por hash al costo 10 → 4 rondas más caben en 160 ms
+    assert securityUtils.calibrate_rounds(target_ms=160, samples=5) == 14
+    timings = iter([0.0, 0.010, 1.0, 2.0, 2.0, 2.010, 3.0, 3.010, 4.0, 4.010])
+    monkeypatch.setattr(securityUtils.time, "perf_counter", lambda: next(timings))
+    assert securityUtils.calibrate_rounds(target_ms=40, samples=5) == 12
+
+
+def test_run_bounded_rejects_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(securityUtils, "BCRYPT_MAX_PENDING", 2)
+    release = threading.Event()
+
+    async def scenario():
+        busy = [asyncio.create_task(securityUtils._run_bounded(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(HTTPException) as error:
+            await securityUtils._run_bounded(lambda: None)
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == "1"
+
+        release.set()
+        assert await asyncio.gather(*busy) == [True, True]
+        # Con la cola libre vuelve a aceptar
+        assert await securityUtils._run_bounded(lambda: "ok") == "ok"
+        assert securityUtils._pending == 0
+
+    asyncio.run(scenario())
+
+
+def test_async_hash_round_trip(monkeypatch):
+    monkeypatch.setattr(securityUtils, "_rounds", 4)
+
+    async def scenario():
+        hashed = await securityUtils.hash_password_async("secreto")
+        assert securityUtils.get_hash_rounds(hashed) == 4
+        assert await securityUtils.verify_password_async("secreto", hashed)
+        assert not await securityUtils.verify_password_async("otro", hashed)
+
+    asyncio.run(scenario())
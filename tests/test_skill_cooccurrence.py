@@ -0,0 +1,123 @@
+# tests/test_skill_cooccurrence.py
+import asyncio
+import numpy as np
+import pytest
+from app.schemas.authSchema import PREDEFINED_SKILLS
+from app.utils import skill_cooccurrence as cooccurrence_module
+from app.utils.skill_cooccurrence import SkillCooccurrence
+from app.utils.skill_matcher import NUM_SKILLS
+
+PROGRAMMING, DESIGN, MARKETING, COOKING = PREDEFINED_SKILLS[:4]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        return FakeCursor(self.docs)
+
+
+@pytest.fixture
+def matrix_path(tmp_path, monkeypatch):
+    path = tmp_path / "data" / "skill_cooccurrence.npz"
+    monkeypatch.setattr(cooccurrence_module, "SKILL_COOCCURRENCE_PATH", str(path))
+    return path
+
+
+def counts_with(pairs):
+    counts = np.zeros((NUM_SKILLS, NUM_SKILLS), dtype=np.uint32)
+    for (a, b), value in pairs.items():
+        i, j = PREDEFINED_SKILLS.index(a), PREDEFINED_SKILLS.index(b)
+        counts[i, j] = counts[j, i] = value
+    return counts
+
+
+def test_set_counts_scores_by_cosine_and_skips_itself():
+    counts = counts_with({
+        (PROGRAMMING, PROGRAMMING): 100,
+        (DESIGN, DESIGN): 4,
+        (MARKETING, MARKETING): 100,
+        (PROGRAMMING, DESIGN): 4,
+        (PROGRAMMING, MARKETING): 10
+    })
+    matrix = SkillCooccurrence()
+    matrix.set_counts(counts)
+
+    # Diseño aparece menos veces junto a Programación, pero siempre que aparece
+    assert matrix.related(PROGRAMMING) == [
+        {"skill_name": DESIGN, "score": 0.2},
+        {"skill_name": MARKETING, "score": 0.1}
+    ]
+    assert matrix.related(DESIGN) == [{"skill_name": PROGRAMMING, "score": 0.2}]
+    assert matrix.related(COOKING) == []
+    assert matrix.related("No existe") == []
+
+
+def test_set_counts_respects_limit(monkeypatch):
+    monkeypatch.setattr(cooccurrence_module, "RELATED_SKILLS_LIMIT", 2)
+    pairs = {(skill, skill): 10 for skill in PREDEFINED_SKILLS[:5]}
+    pairs.update({(PROGRAMMING, skill): 10 - n for n, skill in enumerate(PREDEFINED_SKILLS[1:5])})
+    matrix = SkillCooccurrence()
+    matrix.set_counts(counts_with(pairs))
+
+    assert [r["skill_name"] for r in matrix.related(PROGRAMMING)] == [DESIGN, MARKETING]
+
+
+def test_rebuild_counts_posts_and_users_and_saves(matrix_path, monkeypatch):
+    posts = FakeCollection([
+        {"skills": {"offering": [PROGRAMMING], "seeking": [DESIGN]}},
+        {"skills": {"offering": [PROGRAMMING, MARKETING], "seeking": None}},
+        {"skills": {}}
+    ])
+    users = FakeCollection([
+        {"interests_offered": [DESIGN], "interests_wanted": [PROGRAMMING]},
+        {"interests_offered": [COOKING]}
+    ])
+    monkeypatch.setattr(cooccurrence_module, "post_collection", posts)
+    monkeypatch.setattr(cooccurrence_module, "user_collection", users)
+
+    matrix = SkillCooccurrence()
+    asyncio.run(matrix.rebuild())
+
+    index = PREDEFINED_SKILLS.index
+    assert matrix.counts[index(PROGRAMMING), index(PROGRAMMING)] == 3
+    assert matrix.counts[index(PROGRAMMING), index(DESIGN)] == 2
+    assert matrix.counts[index(PROGRAMMING), index(MARKETING)] == 1
+    assert matrix.counts[index(COOKING), index(COOKING)] == 1
+    assert matrix.counts.sum() == 3 + 2 + 1 + 1 + 2 * (2 + 1)
+    assert matrix.related(PROGRAMMING)[0]["skill_name"] == DESIGN
+
+    # El archivo queda escrito (sin temporales) y otra instancia lo carga igual
+    assert matrix_path.exists()
+    assert [p.name for p in matrix_path.parent.iterdir()] == [matrix_path.name]
+    loaded = SkillCooccurrence()
+    assert loaded.load()
+    assert np.array_equal(loaded.counts, matrix.counts)
+    assert loaded.related(PROGRAMMING) == matrix.related(PROGRAMMING)
+
+
+def test_load_discards_other_skill_list(matrix_path):
+    matrix_path.parent.mkdir()
+    np.savez(matrix_path, skills=np.array(["Otra"]), counts=np.ones((1, 1), dtype=np.uint32))
+
+    assert not SkillCooccurrence().load()
+
+
+def test_load_without_file(matrix_path):
+    assert not SkillCooccurrence().load()
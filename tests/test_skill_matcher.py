@@ -0,0 +1,100 @@
+# tests/test_skill_matcher.py
+import asyncio
+import random
+import numpy as np
+import pytest
+from bson import ObjectId
+from app.schemas.authSchema import PREDEFINED_SKILLS
+from app.utils.skill_matcher import SkillMatcher, RECIPROCAL_WEIGHT, top_positions
+
+
+def brute_force_top(scores: np.ndarray, limit: int) -> list:
+    return sorted((int(score) for score in scores if score > 0), reverse=True)[:limit]
+
+
+def test_top_positions_wide_score_range():
+    scores = np.array([200, 100, 100, 50, 3], dtype=np.uint8)
+    assert list(top_positions(scores, 5)) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_top_positions_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    size = int(rng.integers(1, 2000))
+    dtype = np.uint8 if seed % 2 else np.uint16
+    high = 255 if dtype is np.uint8 else 2000
+    # Mayoría de ceros y puntajes bajos, con algunos muy altos
+    scores = np.where(rng.random(size) < 0.7, 0, rng.integers(1, 4, size)).astype(dtype)
+    spikes = rng.integers(0, size, int(rng.integers(0, 5)))
+    scores[spikes] = rng.integers(high // 2, high, len(spikes))
+    limit = int(rng.integers(1, 60))
+
+    positions = top_positions(scores, limit)
+
+    assert len(set(positions.tolist())) == len(positions)
+    assert [int(scores[p]) for p in positions] == brute_force_top(scores, limit)
+
+
+def test_top_matches_matches_brute_force():
+    rng = random.Random(7)
+    users = {
+        str(ObjectId()): (rng.sample(PREDEFINED_SKILLS, rng.randint(0, 5)), rng.sample(PREDEFINED_SKILLS, rng.randint(0, 3)))
+        for _ in range(3000)
+    }
+    matcher = SkillMatcher()
+    for user_id, (offered, wanted) in users.items():
+        matcher.update(user_id, offered, wanted)
+    matcher.index.compact()
+
+    def expected(me):
+        my_offered, my_wanted = set(users[me][0]), set(users[me][1])
+        scores = []
+        for user_id, (offered, wanted) in users.items():
+            if user_id == me:
+                continue
+            get, give = len(set(offered) & my_wanted), len(set(wanted) & my_offered)
+            scores.append(min(get, give) * RECIPROCAL_WEIGHT + get + give)
+        return brute_force_top(np.array(scores), 20)
+
+    for me in rng.sample(list(users), 300):
+        matches = matcher.top_matches(me, *users[me], limit=20)
+        assert [match["score"] for match in matches] == expected(me)
+        assert me not in [match["user_id"] for match in matches]
+
+
+def test_updates_during_compaction_are_kept():
+    matcher = SkillMatcher()
+    me, other, late = str(ObjectId()), str(ObjectId()), str(ObjectId())
+    matcher.update(me, ["Guitarra"], ["Programación"])
+    matcher.update(other, ["Cocina"], [])
+    matcher.index.compact()
+
+    # Cambios que llegan mientras el hilo arma las listas
+    index = matcher.index
+    offered, wanted = index.begin_compact()
+    matcher.update(other, ["Programación"], ["Guitarra"])
+    matcher.update(late, ["Programación"], [])
+    assert {match["user_id"] for match in matcher.top_matches(me, ["Guitarra"], ["Programación"])} == {other, late}
+
+    index.finish_compact(index.build_postings(offered, wanted))
+    matches = matcher.top_matches(me, ["Guitarra"], ["Programación"])
+    assert [match["user_id"] for match in matches] == [other, late]
+    assert index.frozen is None and index.pending == 3
+
+    # Una compactación completa deja todo en las listas
+    asyncio.run(matcher.compact())
+    assert index.pending == 0
+    assert [match["user_id"] for match in matcher.top_matches(me, ["Guitarra"], ["Programación"])] == [other, late]
+
+
+def test_failed_compaction_keeps_added_rows():
+    matcher = SkillMatcher()
+    me, other = str(ObjectId()), str(ObjectId())
+    matcher.update(me, [], ["Programación"])
+    matcher.update(other, ["Programación"], [])
+
+    index = matcher.index
+    index.begin_compact()
+    index.finish_compact(None)
+    assert [match["user_id"] for match in matcher.top_matches(me, [], ["Programación"])] == [other]
+    assert index.pending == 2
@@ -0,0 +1,14 @@
+# tests/test_token_revocation.py
+from app.utils.token_revocation import BloomFilter
+
+
+def test_readding_does_not_count():
+    bloom = BloomFilter(1000)
+    jtis = [f"jti-{i}" for i in range(500)]
+    assert all(bloom.add(jti) for jti in jtis)
+
+    # El traslape del sync vuelve a leer los mismos jti en cada ronda
+    for _ in range(10):
+        assert not any(bloom.add(jti) for jti in jtis)
+    assert bloom.count == 500
+    assert all(jti in bloom for jti in jtis)
@@ -0,0 +1,25 @@
+# tests/test_ws_codec.py
+import zlib
+import msgpack
+import pytest
+from app.config import WS_MAX_FRAME_BYTES
+from app.utils.ws_codec import MSGPACK, FLAG_ZLIB, FrameTooLarge, decode_frame
+
+
+def test_compressed_round_trip():
+    message = {"type": "send_message", "content": "hola " * 1000}
+    assert decode_frame({"bytes": MSGPACK.encode(message)}) == message
+
+
+def test_decompression_bomb_is_rejected():
+    payload = msgpack.packb({"type": "x", "pad": "a" * (WS_MAX_FRAME_BYTES * 20)})
+    bomb = bytes([FLAG_ZLIB]) + zlib.compress(payload, 9)
+    assert len(bomb) < WS_MAX_FRAME_BYTES
+    with pytest.raises(FrameTooLarge):
+        decode_frame({"bytes": bomb})
+
+
+def test_truncated_zlib_is_invalid():
+    frame = bytes([FLAG_ZLIB]) + zlib.compress(msgpack.packb({"type": "ping"}))[:-4]
+    with pytest.raises(ValueError):
+        decode_frame({"bytes": frame})